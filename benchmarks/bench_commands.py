@@ -0,0 +1,113 @@
+"""
+Keypress throughput and literal typing rate against an emulated device.
+
+Sends keypresses one after another with the blocking and async clients,
+then types text with `literal` and with `type_text`. Prints one JSON
+object per measurement.
+
+    python benchmarks/bench_commands.py --keypresses 500 --text-length 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import emit
+
+from roku import Roku
+from roku._async import AsyncRoku
+from roku.emulator.server import BackgroundFleet, EmulatorServer
+
+
+def bench_sync(args):
+    with BackgroundFleet(1, latency=args.latency) as fleet:
+        host, port = fleet.addresses[0]
+        roku = Roku(host, port=port)
+        roku.prewarm()
+
+        start = time.perf_counter()
+        for _ in range(args.keypresses):
+            roku.right()
+        elapsed = time.perf_counter() - start
+        emit(
+            "commands.keypress",
+            client="sync",
+            count=args.keypresses,
+            seconds=elapsed,
+            per_second=args.keypresses / elapsed,
+        )
+
+        text = "x" * args.text_length
+        start = time.perf_counter()
+        roku.literal(text)
+        elapsed = time.perf_counter() - start
+        emit(
+            "commands.literal",
+            client="sync",
+            method="literal",
+            chars=len(text),
+            seconds=elapsed,
+            per_second=len(text) / elapsed,
+        )
+        roku.close()
+
+
+async def bench_async(args):
+    async with EmulatorServer(port=0, latency=args.latency) as server:
+        async with AsyncRoku(server.host, port=server.port) as roku:
+            await roku.prewarm()
+
+            start = time.perf_counter()
+            for _ in range(args.keypresses):
+                await roku.right()
+            elapsed = time.perf_counter() - start
+            emit(
+                "commands.keypress",
+                client="async",
+                count=args.keypresses,
+                seconds=elapsed,
+                per_second=args.keypresses / elapsed,
+            )
+
+            text = "x" * args.text_length
+            start = time.perf_counter()
+            await roku.literal(text)
+            elapsed = time.perf_counter() - start
+            emit(
+                "commands.literal",
+                client="async",
+                method="literal",
+                chars=len(text),
+                seconds=elapsed,
+                per_second=len(text) / elapsed,
+            )
+
+            start = time.perf_counter()
+            result = await roku.type_text(text)
+            elapsed = time.perf_counter() - start
+            emit(
+                "commands.literal",
+                client="async",
+                method="type_text",
+                chars=len(text),
+                failures=len(result.failures),
+                seconds=elapsed,
+                per_second=len(text) / elapsed,
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--keypresses", type=int, default=500)
+    parser.add_argument("--text-length", type=int, default=200)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds added to each response"
+    )
+    args = parser.parse_args()
+
+    bench_sync(args)
+    asyncio.run(bench_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Time from starting discovery to the first and the last device found.
+
+Devices are simulated by injecting SSDP responses into the discovery
+socket's protocol after a delay, so no multicast network is needed and
+the measurement isolates the client's own overhead. Prints one JSON
+object per measurement.
+
+    python benchmarks/bench_discovery.py --devices 1,10,100 --delay 0.05
+"""
+
+import argparse
+import asyncio
+
+from common import emit, sizes
+
+from roku._async.discovery import discover_iter
+
+
+def ssdp_response(i):
+    return "\r\n".join(
+        [
+            "HTTP/1.1 200 OK",
+            "Cache-Control: max-age=3600",
+            "ST: roku:ecp",
+            f"USN: uuid:roku:ecp:YH009N{i:06d}",
+            f"LOCATION: http://10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}:8060/",
+            "",
+            "",
+        ]
+    ).encode()
+
+
+class Responders(object):
+    """A stand-in for the network: every search is answered by `count`
+    devices, the first after `delay` seconds and the rest spread evenly
+    up to twice `delay`.
+    """
+
+    def __init__(self, loop, count, delay):
+        self.loop = loop
+        self.payloads = [ssdp_response(i) for i in range(count)]
+        self.delay = delay
+
+    async def create_datagram_endpoint(self, protocol_factory, **kwargs):
+        protocol = protocol_factory()
+        transport = _Transport(self, protocol)
+        protocol.connection_made(transport)
+        return transport, protocol
+
+
+class _Transport(object):
+    def __init__(self, responders, protocol):
+        self.responders = responders
+        self.protocol = protocol
+
+    def sendto(self, data, addr):
+        responders = self.responders
+        count = len(responders.payloads)
+        for i, payload in enumerate(responders.payloads):
+            delay = responders.delay * (1 + i / count)
+            responders.loop.call_later(
+                delay, self.protocol.datagram_received, payload, addr
+            )
+
+    def close(self):
+        pass
+
+
+async def measure(count, delay, timeout):
+    loop = asyncio.get_running_loop()
+    loop.create_datagram_endpoint = Responders(
+        loop, count, delay
+    ).create_datagram_endpoint
+
+    start = loop.time()
+    first = None
+    found = 0
+    async for _ in discover_iter(timeout=timeout, max_devices=count):
+        found += 1
+        if first is None:
+            first = loop.time() - start
+    return first, loop.time() - start, found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--devices", type=sizes, default=[1, 10, 100, 1000])
+    parser.add_argument(
+        "--delay", type=float, default=0.05, help="seconds before the first reply"
+    )
+    parser.add_argument("--timeout", type=float, default=5)
+    args = parser.parse_args()
+
+    for count in args.devices:
+        first, last, found = asyncio.run(measure(count, args.delay, args.timeout))
+        emit(
+            "discovery.time_to_device",
+            devices=count,
+            found=found,
+            delay=args.delay,
+            first_seconds=first,
+            first_overhead=first - args.delay,
+            all_seconds=last,
+            all_overhead=last - args.delay * (2 - 1 / count),
+        )
+
+
+if __name__ == "__main__":
+    main()
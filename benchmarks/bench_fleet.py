@@ -0,0 +1,68 @@
+"""
+Fan-out time for a fleet broadcast as the number of devices grows.
+
+Runs one emulated device per fleet member in the same process and times a
+keypress broadcast and a device-info query across all of them. Prints one
+JSON object per measurement.
+
+    python benchmarks/bench_fleet.py --devices 1,10,100,1000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+
+from common import async_timed, emit, sizes
+
+from roku._async import AsyncRoku, AsyncRokuFleet, SessionPool
+from roku.emulator.server import EmulatorFleet
+
+
+async def measure(count, args):
+    async with EmulatorFleet(count, latency=args.latency) as emulators:
+        pool = SessionPool(limit=args.concurrency)
+        rokus = [
+            AsyncRoku(host, port=port, pool=pool) for host, port in emulators.addresses
+        ]
+        async with AsyncRokuFleet(rokus, concurrency=args.concurrency) as fleet:
+            # open connections before timing
+            await fleet.run(lambda roku: roku.prewarm())
+
+            for operation, func in (
+                ("keypress", fleet.home),
+                ("device_info", lambda: fleet.query("refresh_device_info")),
+            ):
+                errors = []
+
+                async def broadcast():
+                    results = await func()
+                    errors.append(sum(1 for result in results if not result.ok))
+
+                seconds = await async_timed(broadcast, args.repeat)
+                emit(
+                    "fleet.fan_out",
+                    operation=operation,
+                    devices=count,
+                    concurrency=args.concurrency,
+                    errors=max(errors),
+                    seconds=seconds,
+                    per_device=seconds / count,
+                )
+        await pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--devices", type=sizes, default=[1, 10, 100, 1000])
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds added to each response"
+    )
+    args = parser.parse_args()
+
+    for count in args.devices:
+        asyncio.run(measure(count, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Import time of the package and of each client, in fresh interpreters.
+
+Runs `python -X importtime` for each import statement and reports the
+cumulative time of the package's own modules. Prints one JSON object per
+measurement.
+
+    python benchmarks/bench_import.py --repeat 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+from common import emit
+
+STATEMENTS = (
+    "import roku",
+    "from roku import Roku",
+    "from roku import AsyncRoku",
+    "import roku.cli",
+)
+
+
+def measure(statement):
+    """Microseconds spent on the imports `statement` adds to interpreter
+    startup, as reported by -X importtime.
+    """
+    baseline = set(_top_level(importtime("pass")))
+    return sum(
+        microseconds
+        for module, microseconds in _top_level(importtime(statement)).items()
+        if module not in baseline
+    )
+
+
+def importtime(statement):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stderr
+
+
+def _top_level(output):
+    """Cumulative times of the modules imported directly rather than from
+    within another module.
+    """
+    times = {}
+    for line in output.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or parts[2].startswith("  "):
+            continue
+        try:
+            times[parts[2].strip()] = int(parts[1])
+        except ValueError:
+            continue
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for statement in STATEMENTS:
+        times = [measure(statement) for _ in range(args.repeat)]
+        emit(
+            "import.time",
+            statement=statement,
+            microseconds=statistics.median(times),
+            min_microseconds=min(times),
+        )
+
+
+if __name__ == "__main__":
+    main()
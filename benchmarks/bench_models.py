@@ -0,0 +1,89 @@
+"""
+Memory used by app inventories read from many devices.
+
+Compares the slotted, interned models produced by roku.util with plain
+classes built from uninterned strings, which is how the models were stored
+before. Prints one JSON object per measurement.
+
+    python benchmarks/bench_models.py --devices 300 --apps 150
+"""
+
+import argparse
+import json
+import tracemalloc
+
+from roku.models import Application
+from roku.util import deserialize_apps, serialize_apps
+
+
+class PlainApplication(object):
+    def __init__(self, id, version, name, roku=None, is_screensaver=False):
+        self.id = str(id)
+        self.version = version
+        self.name = name
+        self.is_screensaver = is_screensaver
+        self.roku = roku
+
+
+def make_document(apps):
+    return serialize_apps(
+        Application(str(10000 + i), f"{i % 7}.{i % 13}.{i}", f"Channel Number {i}")
+        for i in range(apps)
+    )
+
+
+def load_plain(document, devices):
+    inventory = []
+    for _ in range(devices):
+        # copy each string so devices do not share them, like separate
+        # responses parsed without interning
+        inventory.append(
+            [
+                PlainApplication(
+                    "".join(app.id), "".join(app.version), "".join(app.name)
+                )
+                for app in deserialize_apps(document)
+            ]
+        )
+    return inventory
+
+
+def load_slotted(document, devices):
+    return [deserialize_apps(document) for _ in range(devices)]
+
+
+def measure(loader, document, devices):
+    tracemalloc.start()
+    inventory = loader(document, devices)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del inventory
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--devices", type=int, default=300)
+    parser.add_argument("--apps", type=int, default=150)
+    args = parser.parse_args()
+
+    document = make_document(args.apps)
+    for name, loader in (("plain", load_plain), ("slotted", load_slotted)):
+        current, peak = measure(loader, document, args.devices)
+        print(
+            json.dumps(
+                {
+                    "benchmark": "models.inventory_memory",
+                    "variant": name,
+                    "devices": args.devices,
+                    "apps": args.apps,
+                    "bytes": current,
+                    "peak_bytes": peak,
+                    "bytes_per_app": current / (args.devices * args.apps),
+                }
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Time to parse /query/apps and /query/tv-channels documents of growing size.
+
+Compares the tree parsers with the streaming iterators that are used when
+responses are read in chunks. Prints one JSON object per measurement.
+
+    python benchmarks/bench_parse.py --sizes 10,100,1000,10000
+"""
+
+import argparse
+import xml.etree.ElementTree as ET
+
+from common import emit, sizes, timed
+
+from roku.models import Application
+from roku.util import (
+    deserialize_apps,
+    deserialize_channels,
+    iter_apps,
+    iter_channels,
+    serialize_apps,
+)
+
+CHUNK_SIZE = 8192
+
+
+def make_apps(count):
+    return serialize_apps(
+        Application(str(10000 + i), f"{i % 7}.{i % 13}.{i}", f"Channel Number {i}")
+        for i in range(count)
+    )
+
+
+def make_channels(count):
+    root = ET.Element("tv-channels")
+    for i in range(count):
+        elem = ET.SubElement(root, "channel")
+        ET.SubElement(elem, "number").text = f"{i // 10 + 1}.{i % 10 + 1}"
+        ET.SubElement(elem, "name").text = f"STATION{i}"
+        ET.SubElement(elem, "type").text = "air-digital"
+    return ET.tostring(root, xml_declaration=True, encoding="utf-8")
+
+
+def chunks(document):
+    return [
+        document[i : i + CHUNK_SIZE]  # noqa: E203
+        for i in range(0, len(document), CHUNK_SIZE)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--sizes", type=sizes, default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        cases = (
+            ("apps", make_apps(size), deserialize_apps, iter_apps),
+            ("tv_channels", make_channels(size), deserialize_channels, iter_channels),
+        )
+        for endpoint, document, parse, iterate in cases:
+            parts = chunks(document)
+            variants = (
+                ("tree", lambda: parse(document)),
+                ("stream", lambda: list(iterate(iter(parts)))),
+            )
+            for variant, func in variants:
+                seconds = timed(func, args.repeat)
+                emit(
+                    f"parse.{endpoint}",
+                    variant=variant,
+                    items=size,
+                    bytes=len(document),
+                    seconds=seconds,
+                    items_per_second=size / seconds,
+                )
+
+
+if __name__ == "__main__":
+    main()
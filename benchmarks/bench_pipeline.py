@@ -0,0 +1,109 @@
+"""
+Client CPU time and throughput per keypress for each transport.
+
+Sends keypresses with the requests client, with aiohttp through AsyncRoku
+and over one pipelined connection with PipelinedRoku, one at a time and
+as bursts. The emulator runs on a background thread, so `cpu_us` is the
+client's own CPU time per keypress. Prints one JSON object per
+measurement.
+
+    python benchmarks/bench_pipeline.py --keypresses 2000 --burst 64
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import emit
+
+from roku import Roku
+from roku._async import AsyncRoku, PipelinedRoku
+from roku.emulator.server import BackgroundFleet
+
+
+def report(client, mode, count, wall, cpu):
+    emit(
+        "pipeline.keypress",
+        client=client,
+        mode=mode,
+        count=count,
+        seconds=wall,
+        per_second=count / wall,
+        cpu_us=cpu / count * 1e6,
+    )
+
+
+def measure(func):
+    wall, cpu = time.perf_counter(), time.thread_time()
+    func()
+    return time.perf_counter() - wall, time.thread_time() - cpu
+
+
+async def async_measure(func):
+    wall, cpu = time.perf_counter(), time.thread_time()
+    await func()
+    return time.perf_counter() - wall, time.thread_time() - cpu
+
+
+def bench_requests(args, host, port):
+    roku = Roku(host, port=port)
+    roku.prewarm()
+
+    def _run():
+        for _ in range(args.keypresses):
+            roku.right()
+
+    report("requests", "sequential", args.keypresses, *measure(_run))
+    roku.close()
+
+
+async def bench_async(args, host, port):
+    text = "x" * args.burst
+    bursts = max(1, args.keypresses // args.burst)
+
+    for client, cls in (("aiohttp", AsyncRoku), ("pipelined", PipelinedRoku)):
+        async with cls(host, port=port) as roku:
+            await roku.prewarm()
+
+            async def _sequential():
+                for _ in range(args.keypresses):
+                    await roku.right()
+
+            async def _literal():
+                for _ in range(bursts):
+                    await roku.literal(text)
+
+            async def _window():
+                for _ in range(bursts):
+                    await roku.type_text(text, window=args.burst)
+
+            count = bursts * len(text)
+            report(
+                client, "sequential", args.keypresses, *await async_measure(_sequential)
+            )
+            report(client, "literal", count, *await async_measure(_literal))
+            if cls is PipelinedRoku:
+                # only a pipelined connection keeps overlapping keypresses
+                # in order
+                report(
+                    client, f"window={args.burst}", count, *await async_measure(_window)
+                )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n")[0])
+    parser.add_argument("--keypresses", type=int, default=2000)
+    parser.add_argument("--burst", type=int, default=64)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="seconds added to each response"
+    )
+    args = parser.parse_args()
+
+    with BackgroundFleet(1, latency=args.latency) as fleet:
+        host, port = fleet.addresses[0]
+        bench_requests(args, host, port)
+        asyncio.run(bench_async(args, host, port))
+
+
+if __name__ == "__main__":
+    main()
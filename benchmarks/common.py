@@ -0,0 +1,39 @@
+"""
+Helpers shared by the benchmark scripts.
+"""
+
+import json
+import statistics
+import sys
+import time
+
+
+def emit(benchmark, **fields):
+    """Print one result as a JSON object on its own line."""
+    print(json.dumps(dict(benchmark=benchmark, **fields)))
+    sys.stdout.flush()
+
+
+def timed(func, repeat=5):
+    """Call `func` `repeat` times and return the median duration."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+async def async_timed(func, repeat=5):
+    """The async equivalent of timed, for a function returning an awaitable."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def sizes(value):
+    """Parse a comma separated list of sizes from the command line."""
+    return [int(size) for size in value.split(",")]
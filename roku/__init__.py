@@ -1,10 +1,34 @@
-from roku.core import Roku, __version__  # noqa
-from roku.models import Application, Channel, RokuException  # noqa
+"""
+Client for the Roku media player.
+
+The clients and their dependencies are imported on first use, so
+`import roku` stays fast for short-lived processes.
+"""
+
+from importlib import import_module
+
+__version__ = "4.1.0"
+
+_LAZY = {
+    "Roku": "roku.core",
+    "AsyncRoku": "roku._async",
+    "Application": "roku.models",
+    "Channel": "roku.models",
+    "RokuException": "roku.models",
+}
+
+# AsyncRoku needs the async extra, so a star import leaves it out
+__all__ = ["__version__"] + [name for name in _LAZY if name != "AsyncRoku"]
 
 
 def __getattr__(name):
-    if name == "AsyncRoku":
-        from roku._async import AsyncRoku
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module 'roku' has no attribute {name}")
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
 
-        return AsyncRoku
-    raise AttributeError(f"module 'roku' has no attribute {name}")
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY))
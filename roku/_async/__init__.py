@@ -1 +1,5 @@
 from roku._async.core import AsyncRoku  # noqa
+from roku._async.fleet import AsyncRokuFleet, FleetResult  # noqa
+from roku._async.pipeline import PipelinedConnection, PipelinedRoku  # noqa
+from roku._async.queue import CommandQueue  # noqa
+from roku._async.session import SessionPool, close_pools, get_pool  # noqa
@@ -1,24 +1,64 @@
+import asyncio
 import logging
-import xml.etree.ElementTree as ET
-from urllib.parse import quote_plus, urlparse
-import socket
+from urllib.parse import urlparse
 
 import aiohttp
 
-from ..constants import COMMANDS, SENSORS, TOUCH_OPS
-from ..models import Application, DeviceInfo, MediaPlayer, RokuException
-from ..util import deserialize_apps, deserialize_channels
+from ..base import BaseRoku
+from ..constants import TOUCH_OPS
+from ..instrumentation import clock
+from ..models import KeyFailure, RokuException, TextEntryResult
+from ..protocol import (
+    ACTIVE_APP,
+    APPS,
+    CURRENT_APP,
+    DEVICE_INFO,
+    MEDIA_PLAYER,
+    TV_CHANNELS,
+    command_requests,
+    icon_request,
+    input_request,
+    is_command,
+    launch_request,
+    literal_request,
+    store_request,
+    touch_request,
+)
+from ..resolver import url_host
+from ..util import ElementStream, app_from_element, channel_from_element
 from .discovery import discover as async_discover
+from .discovery import discover_iter
+from .queue import CommandQueue
+from .watcher import AsyncWatcher
 
 roku_logger = logging.getLogger("roku")
 
 
-class AsyncRoku(object):
-    def __init__(self, host, port=8060, timeout=10):
-        self.host = socket.gethostbyname(host)
-        self.port = port
-        self._session = None
-        self.timeout = timeout
+class AsyncRoku(BaseRoku):
+    def __init__(
+        self,
+        host,
+        port=8060,
+        timeout=10,
+        session=None,
+        pool=None,
+        cache=None,
+        instrumentation=None,
+        icon_cache=None,
+        resolver=None,
+    ):
+        super(AsyncRoku, self).__init__(
+            host,
+            port=port,
+            timeout=timeout,
+            cache=cache,
+            instrumentation=instrumentation,
+            icon_cache=icon_cache,
+            resolver=resolver,
+        )
+        self._session = session
+        self._pool = pool
+        self._owns_session = session is None and pool is None
 
     @classmethod
     async def discover(cls, *args, **kwargs):
@@ -28,43 +68,28 @@ class AsyncRoku(object):
             rokus.append(cls(o.hostname, o.port))
         return rokus
 
+    @classmethod
+    async def discover_iter(cls, *args, **kwargs):
+        """Yield a client for each device as soon as it responds. Takes the
+        same arguments as roku._async.discovery.discover_iter.
+        """
+        async for device in discover_iter(*args, **kwargs):
+            o = urlparse(device.location)
+            yield cls(o.hostname, o.port)
+
     def __repr__(self):
         return f"<AsyncRoku: {self.host}:{self.port}>"
 
     def __getattr__(self, name):
-        if name not in COMMANDS and name not in SENSORS:
+        if not is_command(name):
             raise AttributeError(f"{name} is not a valid method")
 
         async def command(*args, **kwargs):
-            if name in SENSORS:
-                keys = [f"{name}.{axis}" for axis in ("x", "y", "z")]
-                params = dict(zip(keys, args))
-                await self.input(params)
-            elif name == "literal":
-                for char in args[0]:
-                    path = f"/keypress/{COMMANDS[name]}_{quote_plus(char)}"
-                    await self._post(path)
-            elif name == "search":
-                path = "/search/browse"
-                params = {k.replace("_", "-"): v for k, v in kwargs.items()}
-                await self._post(path, params=params)
-            else:
-                if len(args) > 0 and (args[0] == "keydown" or args[0] == "keyup"):
-                    path = f"/{args[0]}/{COMMANDS[name]}"
-                else:
-                    path = f"/keypress/{COMMANDS[name]}"
-                await self._post(path)
+            await self._send_many(command_requests(name, *args, **kwargs))
+            self._invalidate(name)
 
         return command
 
-    def __dir__(self):
-        return sorted(
-            dir(type(self))
-            + list(self.__dict__.keys())
-            + list(COMMANDS.keys())
-            + list(SENSORS)
-        )
-
     async def __aenter__(self):
         return self
 
@@ -72,160 +97,269 @@ class AsyncRoku(object):
         await self.close()
 
     def _connect(self):
+        if self._pool is not None:
+            return self._pool.session
         if self._session is None:
             self._session = aiohttp.ClientSession()
+        return self._session
 
     async def close(self):
-        if self._session:
+        if self._session and self._owns_session:
             await self._session.close()
             self._session = None
 
+    async def prewarm(self):
+        """Open a connection to the device ahead of the first command."""
+        await self._get("/")
+
+    async def _url(self, path):
+        address = await self.resolver.async_resolve(self.host)
+        return f"http://{url_host(address)}:{self.port}{path}"
+
+    async def _send(self, request):
+        if request.params is None:
+            return await self._call(request.method, request.path)
+        return await self._call(request.method, request.path, params=request.params)
+
+    async def _send_many(self, requests):
+        for request in requests:
+            await self._send(request)
+
     async def _get(self, path, **kwargs):
-        return await self._call("GET", path, **kwargs)
+        if self.cache is None or kwargs or not self.cache.cacheable(path):
+            return await self._call("GET", path, **kwargs)
+        content = self.cache.get(path)
+        if content is None:
+            content = await self._call("GET", path)
+            self.cache.set(path, content)
+        return content
 
     async def _post(self, path, **kwargs):
         return await self._call("POST", path, **kwargs)
 
     async def _call(self, method, path, **kwargs):
-        self._connect()
+        session = self._connect()
 
         roku_logger.debug(path)
 
-        url = f"http://{self.host}:{self.port}{path}"
+        url = await self._url(path)
 
         if method not in ("GET", "POST"):
             raise ValueError("only GET and POST HTTP methods are supported")
 
         timeout = aiohttp.ClientTimeout(total=self.timeout)
-        async with self._session.request(
-            method, url, timeout=timeout, **kwargs
-        ) as resp:
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            async with session.request(method, url, timeout=timeout, **kwargs) as resp:
+                if resp.status < 200 or resp.status > 299:
+                    raise RokuException(await resp.read())
+                return await resp.read()
+
+        instrumentation.before_request(self, method, path)
+        start = clock()
+        status, content, first_byte = None, b"", None
+        try:
+            async with session.request(method, url, timeout=timeout, **kwargs) as resp:
+                first_byte = clock() - start
+                status = resp.status
+                content = await resp.read()
+        except Exception as exc:
+            self._record(method, path, status, 0, first_byte, clock() - start, exc)
+            raise
+        self._record(
+            method, path, status, len(content), first_byte, clock() - start, None
+        )
+        if status < 200 or status > 299:
+            raise RokuException(content)
+        return content
+
+    async def _stream(self, path, chunk_size=8192):
+        session = self._connect()
+
+        roku_logger.debug(path)
+
+        url = await self._url(path)
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with session.get(url, timeout=timeout) as resp:
             if resp.status < 200 or resp.status > 299:
                 raise RokuException(await resp.read())
-            return await resp.read()
+            async for chunk in resp.content.iter_chunked(chunk_size):
+                yield chunk
+
+    async def _iter_elements(self, path):
+        stream = ElementStream()
+        chunks = self._stream(path)
+        try:
+            async for chunk in chunks:
+                for elem in stream.feed(chunk):
+                    yield elem
+        finally:
+            await chunks.aclose()
+        for elem in stream.close():
+            yield elem
+
+    async def iter_apps(self):
+        """Yield installed apps as they arrive without buffering the
+        whole response.
+        """
+        async for elem in self._iter_elements("/query/apps"):
+            yield app_from_element(elem, self)
+
+    async def iter_tv_channels(self):
+        """Yield TV channels as they arrive without buffering the whole
+        response. Stop iterating to abandon the rest of the download.
+        """
+        async for elem in self._iter_elements("/query/tv-channels"):
+            yield channel_from_element(elem, self)
+
+    async def _query(self, query):
+        return self._parse(query, await self._get(query.request.path))
 
     async def get_apps(self):
-        resp = await self._get("/query/apps")
-        applications = deserialize_apps(resp)
-        for a in applications:
-            a.roku = self
-        return applications
+        return self._apps_from(await self._get(APPS.request.path))
+
+    async def get_app(self, key):
+        """Find an installed app by name or id."""
+        return self._index(await self.get_apps()).get(str(key))
 
     async def get_active_app(self):
-        resp = await self._get("/query/active-app")
-        active_app = deserialize_apps(resp)
-        if len(active_app):
-            return active_app[0]
-        else:
-            return None
+        return await self._query(ACTIVE_APP)
 
     async def get_tv_channels(self):
-        resp = await self._get("/query/tv-channels")
-        channels = deserialize_channels(resp)
-        for c in channels:
-            c.roku = self
-        return channels
+        return await self._query(TV_CHANNELS)
 
     async def get_device_info(self):
-        resp = await self._get("/query/device-info")
-        root = ET.fromstring(resp)
-
-        roku_type = "Box"
-        if root.find("is-tv") is not None and root.find("is-tv").text == "true":
-            roku_type = "TV"
-        elif root.find("is-stick") is not None and root.find("is-stick").text == "true":
-            roku_type = "Stick"
-        dinfo = DeviceInfo(
-            model_name=root.find("model-name").text,
-            model_num=root.find("model-number").text,
-            software_version=f"{root.find('software-version').text}.{root.find('software-build').text}",
-            serial_num=root.find("serial-number").text,
-            user_device_name=root.find("user-device-name").text,
-            roku_type=roku_type,
-        )
-        return dinfo
+        return (await self.get_device_snapshot()).to_device_info()
 
-    async def get_media_player(self):
-        resp = await self._get("/query/media-player")
-        root = ET.fromstring(resp)
-
-        plugin = root.find("plugin")
-        app = Application(
-            id=plugin.get("id"),
-            version=plugin.get("version"),
-            name=plugin.text or "",
-            roku=self,
-        )
+    async def get_device_snapshot(self, max_age=None):
+        """Return every device-info field from a single fetch.
 
-        mp = MediaPlayer(
-            state=root.get("state"),
-            app=app,
-            position=int(root.find("position").text.split(" ", 1)[0]),
-            duration=int(root.find("duration").text.split(" ", 1)[0]),
-        )
-        return mp
+        A snapshot younger than `max_age` seconds is reused without a
+        request. The response is only parsed again when it has changed;
+        an unchanged response refreshes the snapshot's `fetched_at`.
+        """
+        snapshot = self._fresh_snapshot(max_age)
+        return snapshot or await self.refresh_device_info()
+
+    async def refresh_device_info(self):
+        return self._snapshot_from(await self._get(DEVICE_INFO.request.path))
 
-    @property
-    def commands(self):
-        return sorted(COMMANDS.keys())
+    async def get_media_player(self):
+        return await self._query(MEDIA_PLAYER)
 
     async def get_power_state(self):
-        resp = await self._get("/query/device-info")
-        root = ET.fromstring(resp)
-        if root.find("power-mode").text:
-            if root.find("power-mode").text == "PowerOn":
-                return "On"
-            else:
-                return "Off"
-        return "Unknown"
+        return (await self.get_device_snapshot()).power_state
 
     async def icon(self, app):
-        return await self._get(f"/query/icon/{app.id}")
+        path = icon_request(app).path
+        if self.icon_cache is None:
+            return await self._get(path)
+        content = self.icon_cache.get(app)
+        if content is None:
+            content = await self._get(path)
+            self.icon_cache.set(app, content)
+        return content
+
+    async def prefetch_icons(self, apps=None, concurrency=8):
+        """Fetch the icons for `apps`, or for every installed app, up to
+        `concurrency` at a time. Icons already in the icon cache are not
+        fetched again. Returns a dict of app to icon.
+        """
+        apps = await self.get_apps() if apps is None else list(apps)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _fetch(app):
+            async with semaphore:
+                return await self.icon(app)
+
+        icons = await asyncio.gather(*(_fetch(app) for app in apps))
+        return dict(zip(apps, icons))
 
     def icon_url(self, app):
-        return "http://%s:%s/query/icon/%s" % (self.host, self.port, app.id)
+        address = self.resolver.cached(self.host) or self.host
+        return f"http://{url_host(address)}:{self.port}{icon_request(app).path}"
 
-    async def launch(self, app, params={}):
+    async def launch(self, app, params=None):
         if app.roku and app.roku != self:
             raise RokuException("this app belongs to another Roku")
-        params["contentID"] = app.id
-        return await self._post(f"/launch/{app.id}", params=params)
+        resp = await self._send(launch_request(app, params))
+        self._invalidate("launch")
+        return resp
 
     async def store(self, app):
-        return await self._post("/launch/11", params={"contentID": app.id})
+        resp = await self._send(store_request(app))
+        self._invalidate("store")
+        return resp
 
     async def input(self, params):
-        return await self._post("/input", params=params)
+        return await self._send(input_request(params))
+
+    async def type_text(self, text, pacing=0, stop_on_error=False):
+        """Enter text one character at a time.
+
+        Each keypress is sent once the previous one has been acknowledged,
+        at least `pacing` seconds apart, so the device applies them in
+        order. Failed characters are collected instead of aborting the
+        entry unless `stop_on_error` is set.
+        """
+        return await self._type_text(text, pacing, 1, stop_on_error)
+
+    async def _type_text(self, text, pacing, window, stop_on_error):
+        # Up to `window` keypresses are in flight at once. Only a transport
+        # that keeps requests in order, such as one pipelined connection,
+        # may use a window larger than one.
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(window)
+        failures = []
+        tasks = []
+        last = None
+
+        async def _send(index, char):
+            try:
+                await self._send(literal_request(char))
+            except Exception as exc:
+                failures.append(KeyFailure(index, char, exc))
+            finally:
+                semaphore.release()
+
+        for index, char in enumerate(text):
+            await semaphore.acquire()
+            if stop_on_error and failures:
+                semaphore.release()
+                break
+            if pacing and last is not None:
+                delay = last + pacing - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            last = loop.time()
+            tasks.append(asyncio.ensure_future(_send(index, char)))
+
+        await asyncio.gather(*tasks)
+        failures.sort(key=lambda failure: failure.index)
+        return TextEntryResult(text, len(tasks), failures)
 
     async def touch(self, x, y, op="down"):
         if op not in TOUCH_OPS:
             raise RokuException(f"{op} is not a valid touch operation")
 
-        params = {
-            "touch.0.x": x,
-            "touch.0.y": y,
-            "touch.0.op": op,
-        }
-
-        await self.input(params)
+        await self._send(touch_request(x, y, op))
 
     async def get_current_app(self):
-        resp = await self._get("/query/active-app")
-        root = ET.fromstring(resp)
-        is_screensaver = True
-
-        app_node = root.find("screensaver")
-        if app_node is None:
-            app_node = root.find("app")
-            is_screensaver = False
-
-        if app_node is None:
-            return None
-
-        return Application(
-            id=app_node.get("id"),
-            version=app_node.get("version"),
-            name=app_node.text,
-            is_screensaver=is_screensaver,
-            roku=self,
-        )
+        return await self._query(CURRENT_APP)
+
+    def command_queue(self, **kwargs):
+        """Return a CommandQueue that sends commands to this device in
+        order, coalescing bursts. Keyword arguments set its limits and
+        coalescing rules.
+        """
+        return CommandQueue(self, **kwargs)
+
+    def watch(self, **kwargs):
+        """Return an AsyncWatcher to iterate over this device's change
+        events. Keyword arguments set the polling intervals.
+        """
+        return AsyncWatcher(self, **kwargs)
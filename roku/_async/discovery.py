@@ -4,14 +4,23 @@ Async SSDP discovery for Roku devices.
 
 import asyncio
 import socket
+import struct
 from http.client import HTTPResponse
 
-from ..discovery import ST_ECP, SSDPResponse, _FakeSocket
+from ..discovery import (
+    SSDP_GROUP,
+    ST_ECP,
+    DeviceRegistry,
+    SSDPNotify,
+    SSDPResponse,
+    _FakeSocket,
+)
 
 
 class _SSDPProtocol(asyncio.DatagramProtocol):
     def __init__(self):
         self.responses = {}
+        self.queue = asyncio.Queue()
         self.transport = None
 
     def connection_made(self, transport):
@@ -23,46 +32,193 @@ class _SSDPProtocol(asyncio.DatagramProtocol):
             rhttp.begin()
             if rhttp.status == 200:
                 rssdp = SSDPResponse(rhttp)
+                if rssdp.location not in self.responses:
+                    self.queue.put_nowait(rssdp)
                 self.responses[rssdp.location] = rssdp
         except Exception:
             pass
 
 
-async def discover(timeout=2, retries=1, st=ST_ECP):
-    group = ("239.255.255.250", 1900)
-
-    message = "\r\n".join(
+def _search_message(st, group=SSDP_GROUP):
+    return "\r\n".join(
         [
             "M-SEARCH * HTTP/1.1",
             f"HOST: {group[0]}:{group[1]}",
             'MAN: "ssdp:discover"',
-            "ST: {st}",
+            f"ST: {st}",
             "MX: 3",
             "",
             "",
         ]
+    ).encode()
+
+
+async def discover_iter(timeout=2, retries=1, st=ST_ECP, max_devices=None, serial=None):
+    """Yield each device as soon as its response arrives.
+
+    Searching stops after `timeout` seconds, after `max_devices` devices have
+    been found or once the device with the given `serial` number is found.
+    The `retries` search requests are all sent within the first half of the
+    timeout window rather than one window after another.
+    """
+    if retries < 1:
+        raise ValueError("retries must be at least 1")
+
+    group = SSDP_GROUP
+    message = _search_message(st, group)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+    sock.setblocking(False)
+
+    transport, protocol = await loop.create_datagram_endpoint(
+        _SSDPProtocol,
+        sock=sock,
     )
 
+    async def _search():
+        interval = timeout / 2 / retries
+        for i in range(retries):
+            if i:
+                await asyncio.sleep(interval)
+            transport.sendto(message, group)
+
+    sender = asyncio.ensure_future(_search())
+    found = 0
+
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                rssdp = await asyncio.wait_for(protocol.queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            yield rssdp
+            found += 1
+            if max_devices is not None and found >= max_devices:
+                break
+            if serial is not None and rssdp.serial == serial:
+                break
+    finally:
+        sender.cancel()
+        transport.close()
+
+
+async def discover(timeout=2, retries=1, st=ST_ECP):
     responses = {}
-    loop = asyncio.get_running_loop()
+    async for rssdp in discover_iter(timeout=timeout, retries=retries, st=st):
+        responses[rssdp.location] = rssdp
+    return responses.values()
+
+
+class _ListenerProtocol(asyncio.DatagramProtocol):
+    def __init__(self, registry, st):
+        self.registry = registry
+        self.st = st
+        self.transport = None
 
-    for _ in range(retries):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        try:
+            if data.startswith(b"HTTP/"):
+                rhttp = HTTPResponse(_FakeSocket(data))
+                rhttp.begin()
+                if rhttp.status != 200:
+                    return
+                message = SSDPResponse(rhttp)
+            else:
+                message = SSDPNotify.parse(data)
+                if message is None:
+                    return
+        except Exception:
+            return
+
+        if self.st is not None and message.st != self.st:
+            return
+        if getattr(message, "nts", None) == "ssdp:byebye":
+            self.registry.remove(message.usn)
+        else:
+            self.registry.update(message)
+
+
+class SSDPListener(object):
+    """Keep a DeviceRegistry up to date from the announcements devices
+    multicast when they join or leave the network, without polling.
+
+    The listener joins the SSDP multicast group on port 1900. Call `search`
+    once after starting to learn about devices that are already running.
+    """
+
+    def __init__(
+        self, registry=None, st=ST_ECP, expire_interval=5, interface="0.0.0.0"
+    ):
+        self.registry = registry if registry is not None else DeviceRegistry()
+        self.st = st
+        self.expire_interval = expire_interval
+        self.interface = interface
+        self._transport = None
+        self._expiry = None
+
+    def __repr__(self):
+        state = "listening" if self._transport else "stopped"
+        return f"<SSDPListener: {state}, {len(self.registry)} devices>"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    def _socket(self):
+        group = SSDP_GROUP
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+        sock.bind(("", group[1]))
+        membership = struct.pack(
+            "4s4s", socket.inet_aton(group[0]), socket.inet_aton(self.interface)
+        )
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
         sock.setblocking(False)
+        return sock
 
-        transport, protocol = await loop.create_datagram_endpoint(
-            _SSDPProtocol,
-            sock=sock,
+    async def start(self):
+        if self._transport is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._transport, _ = await loop.create_datagram_endpoint(
+            lambda: _ListenerProtocol(self.registry, self.st),
+            sock=self._socket(),
         )
+        self._expiry = asyncio.ensure_future(self._expire())
 
-        try:
-            m = message.format(st=st)
-            transport.sendto(m.encode(), group)
-            await asyncio.sleep(timeout)
-            responses.update(protocol.responses)
-        finally:
-            transport.close()
+    async def stop(self):
+        if self._expiry is not None:
+            self._expiry.cancel()
+            await asyncio.gather(self._expiry, return_exceptions=True)
+            self._expiry = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
 
-    return responses.values()
+    def search(self, st=None):
+        """Multicast an M-SEARCH; replies are added to the registry."""
+        if self._transport is None:
+            raise RuntimeError("listener is not started")
+        self._transport.sendto(_search_message(st or self.st or ST_ECP), SSDP_GROUP)
+
+    async def _expire(self):
+        while True:
+            await asyncio.sleep(self.expire_interval)
+            self.registry.expire()
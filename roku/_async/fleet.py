@@ -0,0 +1,177 @@
+"""
+Fan commands out to many Roku devices concurrently.
+"""
+
+import asyncio
+import time
+from collections import namedtuple
+
+from ..constants import COMMANDS, SENSORS
+from ..models import Application
+from .core import AsyncRoku
+from .session import SessionPool
+
+
+class FleetResult(
+    namedtuple("FleetResult", ["host", "port", "value", "error", "elapsed"])
+):
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class FleetDeadlineExceeded(asyncio.TimeoutError):
+    pass
+
+
+class AsyncRokuFleet(object):
+    """A group of devices that are sent the same request at the same time.
+
+    At most `concurrency` requests are in flight at once. Each device gets
+    `timeout` seconds to complete an operation and the whole broadcast is
+    abandoned after `deadline` seconds, if set. Every broadcast returns a
+    list of FleetResult, one per device and in the order the devices were
+    given, so a failing device never hides the results of the others.
+
+    Devices given as host names share one connection pool. Pass `pool` to
+    use an existing SessionPool; otherwise the fleet creates one and closes
+    it with the fleet. They also share `instrumentation`, if given.
+    """
+
+    def __init__(
+        self,
+        hosts,
+        port=8060,
+        concurrency=50,
+        timeout=10,
+        deadline=None,
+        pool=None,
+        instrumentation=None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self._owns_pool = pool is None
+        self.pool = pool or SessionPool(limit=concurrency)
+        self.rokus = []
+        seen = set()
+        for host in hosts:
+            if isinstance(host, AsyncRoku):
+                roku = host
+            else:
+                roku = AsyncRoku(
+                    host,
+                    port=port,
+                    timeout=timeout,
+                    pool=self.pool,
+                    instrumentation=instrumentation,
+                )
+            if (roku.host, roku.port) in seen:
+                continue
+            seen.add((roku.host, roku.port))
+            self.rokus.append(roku)
+
+    def __repr__(self):
+        return f"<AsyncRokuFleet: {len(self.rokus)} devices>"
+
+    def __len__(self):
+        return len(self.rokus)
+
+    def __getattr__(self, name):
+        if name not in COMMANDS and name not in SENSORS:
+            raise AttributeError(f"{name} is not a valid method")
+
+        async def command(*args, **kwargs):
+            return await self.run(lambda roku: getattr(roku, name)(*args, **kwargs))
+
+        return command
+
+    def __dir__(self):
+        return sorted(
+            dir(type(self))
+            + list(self.__dict__.keys())
+            + list(COMMANDS.keys())
+            + list(SENSORS)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        await asyncio.gather(
+            *(roku.close() for roku in self.rokus), return_exceptions=True
+        )
+        if self._owns_pool:
+            await self.pool.close()
+
+    async def run(self, func):
+        """Call `func(roku)` for every device and collect the results.
+
+        `func` must return an awaitable.
+        """
+        if not self.rokus:
+            return []
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        started = time.monotonic()
+
+        async def _one(roku):
+            start = time.monotonic()
+            try:
+                async with semaphore:
+                    value = await asyncio.wait_for(func(roku), self.timeout)
+            except Exception as exc:
+                return FleetResult(
+                    roku.host, roku.port, None, exc, time.monotonic() - start
+                )
+            return FleetResult(
+                roku.host, roku.port, value, None, time.monotonic() - start
+            )
+
+        tasks = [asyncio.ensure_future(_one(roku)) for roku in self.rokus]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        results = []
+        for roku, task in zip(self.rokus, tasks):
+            if task in done:
+                results.append(task.result())
+            else:
+                error = FleetDeadlineExceeded(
+                    f"fleet deadline of {self.deadline}s exceeded"
+                )
+                elapsed = time.monotonic() - started
+                results.append(FleetResult(roku.host, roku.port, None, error, elapsed))
+        return results
+
+    async def launch(self, app, params=None):
+        app_id = app.id if isinstance(app, Application) else str(app)
+
+        def _launch(roku):
+            device_app = Application(id=app_id, version=None, name=None, roku=roku)
+            return roku.launch(device_app, dict(params or {}))
+
+        return await self.run(_launch)
+
+    async def input(self, params):
+        return await self.run(lambda roku: roku.input(params))
+
+    async def touch(self, x, y, op="down"):
+        return await self.run(lambda roku: roku.touch(x, y, op=op))
+
+    async def query(self, name, *args, **kwargs):
+        """Call an AsyncRoku query method, such as get_device_info, on
+        every device.
+        """
+        return await self.run(lambda roku: getattr(roku, name)(*args, **kwargs))
@@ -0,0 +1,348 @@
+"""
+ECP requests pipelined over a single raw HTTP/1.1 connection.
+
+Keypresses are tiny POSTs with empty responses, so at high rates the cost
+of a full HTTP client stack, not the device, limits how many commands one
+host can send. A PipelinedConnection keeps one asyncio stream open to a
+device, encodes each distinct request once, writes requests back to back
+without waiting for earlier responses and reads only as much of each
+response as it needs to find its status and body. Responses arrive in the
+order the requests were written, so commands are applied in order.
+"""
+
+import asyncio
+import collections
+from urllib.parse import urlencode
+
+from ..constants import COMMANDS
+from ..instrumentation import clock
+from ..models import RokuException
+from ..resolver import default_resolver, url_host
+from .core import AsyncRoku
+
+
+def encode_request(method, path, params, host):
+    """Return the bytes of an HTTP/1.1 request with an empty body."""
+    if params:
+        path = f"{path}?{urlencode(params)}"
+    return (
+        f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: 0\r\n\r\n"
+    ).encode("latin-1")
+
+
+def _headers(head):
+    """Map lower-cased header names to lower-cased values. Repeated
+    headers are joined with commas.
+    """
+    headers = {}
+    for line in head.split(b"\r\n")[1:]:
+        name, sep, value = line.partition(b":")
+        if not sep:
+            continue
+        name = name.strip().lower()
+        value = value.strip().lower()
+        if name in headers:
+            value = headers[name] + b"," + value
+        headers[name] = value
+    return headers
+
+
+def _tokens(value):
+    return [token.strip() for token in value.split(b",")]
+
+
+async def read_response(reader):
+    """Read one response from `reader`. Returns `(status, body, close)`."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head[9:12])
+    headers = _headers(head)
+    close = b"close" in _tokens(headers.get(b"connection", b""))
+
+    length = headers.get(b"content-length")
+    if b"chunked" in _tokens(headers.get(b"transfer-encoding", b"")):
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                while await reader.readline() not in (b"\r\n", b""):
+                    pass
+                break
+            chunks.append((await reader.readexactly(size + 2))[:-2])
+        body = b"".join(chunks)
+    elif length is not None:
+        length = int(length)
+        body = await reader.readexactly(length) if length else b""
+    elif status == 204 or status == 304 or status < 200:
+        body = b""
+    else:
+        body = await reader.read()
+        close = True
+    return status, body, close
+
+
+class PipelinedConnection(object):
+    """One persistent connection to a device with pipelined requests.
+
+    `submit` writes a request as soon as there is room and returns a future
+    for its `(status, body)`. At most `max_in_flight` requests are written
+    ahead of their responses; the rest wait in order. Encoded requests
+    without parameters are kept, and keypresses for every entry in
+    COMMANDS are encoded up front.
+
+    If connecting or a response takes longer than `timeout` seconds, or the
+    connection fails, every outstanding request fails with the error and
+    the next request opens a new connection.
+    """
+
+    def __init__(self, host, port=8060, timeout=10, max_in_flight=16, resolver=None):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self.resolver = resolver or default_resolver
+        self.connections = 0
+        self._header_host = f"{url_host(host)}:{port}"
+        self._encoded = {}
+        for key in COMMANDS.values():
+            self.encode("POST", f"/keypress/{key}")
+        self._outgoing = collections.deque()
+        self._in_flight = collections.deque()
+        self._reader = None
+        self._writer = None
+        self._task = None
+        self._wake = None
+        self._expired = False
+        self._closing = None
+
+    def __repr__(self):
+        return (
+            f"<PipelinedConnection: {self.host}:{self.port}, "
+            f"{len(self._in_flight)} in flight>"
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def encode(self, method, path, params=None):
+        if params:
+            return encode_request(method, path, params, self._header_host)
+        key = (method, path)
+        data = self._encoded.get(key)
+        if data is None:
+            data = self._encoded[key] = encode_request(
+                method, path, None, self._header_host
+            )
+        return data
+
+    def submit(self, method, path, params=None):
+        """Queue a request and return a future for its `(status, body)`."""
+        data = self.encode(method, path, params)
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        future = self._task.get_loop().create_future()
+        self._outgoing.append((data, future))
+        self._flush()
+        self._wake.set()
+        return future
+
+    async def request(self, method, path, params=None):
+        return await self.submit(method, path, params)
+
+    def _flush(self):
+        writer = self._writer
+        room = self.max_in_flight - len(self._in_flight)
+        if writer is None or room <= 0 or not self._outgoing:
+            return
+        chunks = []
+        while self._outgoing and room:
+            entry = self._outgoing.popleft()
+            if entry[1].done():
+                continue
+            chunks.append(entry[0])
+            self._in_flight.append(entry)
+            room -= 1
+        if chunks:
+            writer.write(b"".join(chunks))
+
+    async def _connect(self):
+        address = await self.resolver.async_resolve(self.host)
+        return await asyncio.open_connection(address, self.port)
+
+    async def _open(self):
+        try:
+            connection = await asyncio.wait_for(self._connect(), self.timeout)
+        except asyncio.TimeoutError:
+            raise asyncio.TimeoutError(f"could not connect within {self.timeout}s")
+        self._reader, self._writer = connection
+        self.connections += 1
+
+    def _disconnect(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._closing = self._writer
+        self._reader = self._writer = None
+
+    def _expire(self):
+        self._expired = True
+        if self._writer is not None:
+            self._writer.transport.abort()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                if not self._in_flight:
+                    self._wake.clear()
+                    if not self._outgoing:
+                        await self._wake.wait()
+                        continue
+                    if self._reader is None or self._reader.at_eof():
+                        self._disconnect()
+                        await self._open()
+                    self._flush()
+                    continue
+
+                timer = loop.call_later(self.timeout, self._expire)
+                try:
+                    status, body, close = await read_response(self._reader)
+                finally:
+                    timer.cancel()
+                future = self._in_flight.popleft()[1]
+                if not future.done():
+                    future.set_result((status, body))
+
+                if close:
+                    # the device ignores requests written after this one;
+                    # send them again on a new connection
+                    self._outgoing.extendleft(reversed(self._in_flight))
+                    self._in_flight.clear()
+                    self._disconnect()
+                else:
+                    self._flush()
+        except asyncio.CancelledError:
+            self._fail(RokuException("connection closed"))
+            raise
+        except Exception as exc:
+            if self._expired:
+                exc = asyncio.TimeoutError(f"no response within {self.timeout}s")
+            self._fail(exc)
+        finally:
+            self._expired = False
+            self._disconnect()
+            self._task = None
+
+    def _fail(self, exc):
+        for _, future in list(self._in_flight) + list(self._outgoing):
+            if not future.done():
+                future.set_exception(exc)
+        self._in_flight.clear()
+        self._outgoing.clear()
+
+    async def close(self):
+        """Close the connection. Outstanding requests fail."""
+        task = self._task
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self._disconnect()
+        if self._closing is not None:
+            writer, self._closing = self._closing, None
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+
+def _content(result):
+    status, content = result
+    if status < 200 or status > 299:
+        raise RokuException(content)
+    return content
+
+
+class PipelinedRoku(AsyncRoku):
+    """An AsyncRoku that sends POST requests over a PipelinedConnection.
+
+    Commands made up of several requests, such as `literal`, are written
+    back to back, as are commands sent concurrently. Queries still go
+    through aiohttp. Extra keyword arguments are passed to AsyncRoku.
+    """
+
+    def __init__(self, host, port=8060, max_in_flight=16, **kwargs):
+        super(PipelinedRoku, self).__init__(host, port=port, **kwargs)
+        self.pipeline = PipelinedConnection(
+            host,
+            port,
+            timeout=self.timeout,
+            max_in_flight=max_in_flight,
+            resolver=self.resolver,
+        )
+
+    def __repr__(self):
+        return f"<PipelinedRoku: {self.host}:{self.port}>"
+
+    async def close(self):
+        await self.pipeline.close()
+        await super(PipelinedRoku, self).close()
+
+    async def prewarm(self):
+        """Open both connections ahead of the first command and query."""
+        await super(PipelinedRoku, self).prewarm()
+        await self.pipeline.request("GET", "/")
+
+    def _submit(self, method, path, params):
+        future = self.pipeline.submit(method, path, params)
+        if self.instrumentation is not None:
+            self._instrument(method, path, future)
+        return future
+
+    def _instrument(self, method, path, future):
+        instrumentation = self.instrumentation
+        instrumentation.before_request(self, method, path)
+        start = clock()
+
+        def _done(future):
+            total = clock() - start
+            if future.cancelled():
+                return
+            exc = future.exception()
+            if exc is not None:
+                self._record(method, path, None, 0, None, total, exc)
+            else:
+                status, content = future.result()
+                self._record(method, path, status, len(content), None, total, None)
+
+        future.add_done_callback(_done)
+
+    async def _call(self, method, path, **kwargs):
+        if method != "POST":
+            return await super(PipelinedRoku, self)._call(method, path, **kwargs)
+        return _content(await self._submit(method, path, kwargs.get("params")))
+
+    async def _send(self, request):
+        if request.method != "POST":
+            return await super(PipelinedRoku, self)._send(request)
+        return _content(await self._submit(*request))
+
+    async def _send_many(self, requests):
+        if any(request.method != "POST" for request in requests):
+            return await super(PipelinedRoku, self)._send_many(requests)
+        futures = [self._submit(*request) for request in requests]
+        if futures:
+            for result in await asyncio.gather(*futures):
+                _content(result)
+
+    async def type_text(self, text, pacing=0, window=None, stop_on_error=False):
+        """Enter text one character at a time. Requests share one
+        connection, so keypresses reach the device in order whatever the
+        window; by default it is the connection's `max_in_flight`.
+        """
+        if window is None:
+            window = self.pipeline.max_in_flight
+        return await self._type_text(text, pacing, window, stop_on_error)
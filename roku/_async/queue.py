@@ -0,0 +1,198 @@
+"""
+An ordered, bounded queue of commands for one device.
+
+Commands are sent one at a time in the order they were queued. While a
+command is in flight, new ones wait in the queue, where bursts are
+coalesced before they reach the device: repeated presses of keys such as
+volume_up are collapsed and a touch move replaces a move that has not been
+sent yet. Key down and key up events are never coalesced, so a held key is
+always released.
+"""
+
+import asyncio
+import logging
+
+from ..constants import COMMANDS, SENSORS, TOUCH_OPS
+from ..models import RokuException
+from ..protocol import command_requests, is_command, touch_request
+
+logger = logging.getLogger("roku")
+
+DEFAULT_COLLAPSE = ("volume_up", "volume_down")
+
+
+class _Entry(object):
+    __slots__ = ("name", "key", "requests", "presses", "futures")
+
+    def __init__(self, name, key, requests, future):
+        self.name = name
+        self.key = key
+        self.requests = requests
+        self.presses = 1
+        self.futures = [future]
+
+
+def _retrieve(future):
+    # mark errors as retrieved; callers that care await the future
+    if not future.cancelled():
+        future.exception()
+
+
+class CommandQueue(object):
+    """Send commands to an AsyncRoku in order, one at a time.
+
+    Queuing a command, as in `await queue.right()`, returns a future that
+    completes once the command, or the command it was coalesced into, has
+    been sent. At most `max_depth`
+    commands wait at once; queuing another waits for room, which pushes
+    back on the producer instead of building an ever-longer backlog.
+
+    Consecutive presses of a command in `collapse` that are waiting to be
+    sent are merged; up to `collapse_limit` of them are sent and the rest
+    are dropped. With `drop_stale_moves`, a touch move that has not been
+    sent is replaced by a newer move.
+    """
+
+    def __init__(
+        self,
+        roku,
+        max_depth=32,
+        collapse=DEFAULT_COLLAPSE,
+        collapse_limit=1,
+        drop_stale_moves=True,
+    ):
+        if max_depth < 1:
+            raise ValueError("max_depth must be at least 1")
+        self.roku = roku
+        self.max_depth = max_depth
+        self.collapse = frozenset(collapse)
+        self.collapse_limit = collapse_limit
+        self.drop_stale_moves = drop_stale_moves
+        self.sent = 0
+        self.coalesced = 0
+        self._pending = []
+        self._current = None
+        self._changed = asyncio.Condition()
+        self._worker = None
+
+    def __repr__(self):
+        return f"<CommandQueue: {self.roku.host}:{self.roku.port}, {len(self)} queued>"
+
+    def __len__(self):
+        return len(self._pending)
+
+    def __getattr__(self, name):
+        if not is_command(name):
+            raise AttributeError(f"{name} is not a valid method")
+
+        async def command(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            requests = command_requests(name, *args, **kwargs)
+            return await self._put(name, key, requests)
+
+        return command
+
+    def __dir__(self):
+        return sorted(
+            dir(type(self))
+            + list(self.__dict__.keys())
+            + list(COMMANDS.keys())
+            + list(SENSORS)
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.join()
+        await self.close()
+
+    async def touch(self, x, y, op="down"):
+        if op not in TOUCH_OPS:
+            raise RokuException(f"{op} is not a valid touch operation")
+        return await self._put("touch", ("touch", op), (touch_request(x, y, op),))
+
+    def _coalesce(self, name, key, requests, future):
+        if not self._pending or self._pending[-1].key != key:
+            return False
+        last = self._pending[-1]
+        if name in self.collapse and not key[1]:
+            if last.presses < self.collapse_limit:
+                last.presses += 1
+            last.futures.append(future)
+            return True
+        if name == "touch" and key[1] == "move" and self.drop_stale_moves:
+            last.requests = requests
+            last.futures.append(future)
+            return True
+        return False
+
+    async def _put(self, name, key, requests):
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve)
+
+        async with self._changed:
+            while True:
+                if self._coalesce(name, key, requests, future):
+                    self.coalesced += 1
+                    return future
+                if len(self._pending) < self.max_depth:
+                    break
+                await self._changed.wait()
+            self._pending.append(_Entry(name, key, requests, future))
+            self._changed.notify_all()
+
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        return future
+
+    async def _run(self):
+        while True:
+            async with self._changed:
+                while not self._pending:
+                    await self._changed.wait()
+                entry = self._current = self._pending.pop(0)
+                self._changed.notify_all()
+
+            try:
+                for _ in range(entry.presses):
+                    for request in entry.requests:
+                        await self.roku._send(request)
+                if entry.name != "touch":
+                    self.roku._invalidate(entry.name)
+            except Exception as exc:
+                logger.debug(f"queued {entry.name} failed: {exc}")
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                self.sent += 1
+                for future in entry.futures:
+                    if not future.done():
+                        future.set_result(None)
+            # left set if cancelled so that close can cancel its futures
+            self._current = None
+
+    async def join(self):
+        """Wait until every queued command has been sent."""
+        entries = list(self._pending)
+        if self._current is not None:
+            entries.append(self._current)
+        futures = [f for entry in entries for f in entry.futures]
+        if futures:
+            await asyncio.wait(futures)
+
+    async def close(self):
+        """Stop sending. Commands still queued are cancelled."""
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        entries = list(self._pending)
+        if self._current is not None:
+            entries.append(self._current)
+            self._current = None
+        for entry in entries:
+            for future in entry.futures:
+                future.cancel()
+        self._pending.clear()
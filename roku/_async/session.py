@@ -0,0 +1,93 @@
+"""
+Shared aiohttp sessions for AsyncRoku.
+
+By default every AsyncRoku opens its own ClientSession, which means one
+connection pool and DNS cache per device. A SessionPool holds a single
+session that any number of AsyncRoku instances can share.
+"""
+
+import aiohttp
+
+
+class SessionPool(object):
+    """A lazily created aiohttp.ClientSession with a tuned connector.
+
+    `limit` caps the total number of open connections, `limit_per_host`
+    caps connections to a single device and `keepalive_timeout` is how long
+    an idle connection is kept open for reuse. Extra keyword arguments are
+    passed to aiohttp.TCPConnector.
+    """
+
+    def __init__(
+        self,
+        limit=100,
+        limit_per_host=4,
+        keepalive_timeout=30,
+        ttl_dns_cache=300,
+        **connector_kwargs,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self.connector_kwargs = connector_kwargs
+        self._session = None
+
+    def __repr__(self):
+        state = "open" if self.is_open else "closed"
+        return f"<SessionPool: {state}, limit={self.limit}/{self.limit_per_host}>"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def is_open(self):
+        return self._session is not None and not self._session.closed
+
+    @property
+    def session(self):
+        if not self.is_open:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=self.ttl_dns_cache,
+                **self.connector_kwargs,
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+_pools = {}
+
+
+def get_pool(name="default", **kwargs):
+    """Return the registered pool called `name`, creating it with `kwargs`
+    if it does not exist yet.
+    """
+    if name not in _pools:
+        _pools[name] = SessionPool(**kwargs)
+    return _pools[name]
+
+
+def register_pool(name, pool):
+    _pools[name] = pool
+    return pool
+
+
+async def close_pools():
+    """Close and forget every registered pool. Call this before the event
+    loop shuts down.
+    """
+    pools = list(_pools.values())
+    _pools.clear()
+    for pool in pools:
+        await pool.close()
@@ -0,0 +1,56 @@
+import asyncio
+import logging
+
+from ..watcher import ACTIVE_APP_PATH, MEDIA_PLAYER_PATH, StateTracker
+
+logger = logging.getLogger("roku")
+
+
+class AsyncWatcher(object):
+    """Poll an AsyncRoku and yield change events.
+
+        async for event in roku.watch():
+            ...
+
+    Errors while polling are logged and retried at the idle interval.
+    Iteration ends when `stop` is called.
+    """
+
+    def __init__(self, roku, **kwargs):
+        self.roku = roku
+        self.tracker = StateTracker(**kwargs)
+        self._stopped = asyncio.Event()
+
+    def __repr__(self):
+        return f"<AsyncWatcher: {self.roku.host}:{self.roku.port}>"
+
+    def __aiter__(self):
+        return self._watch()
+
+    def stop(self):
+        self._stopped.set()
+
+    async def poll(self):
+        tracker = self.tracker
+        events = tracker.update_app(await self.roku._get(ACTIVE_APP_PATH))
+        if tracker.needs_player:
+            events.extend(
+                tracker.update_player(await self.roku._get(MEDIA_PLAYER_PATH))
+            )
+        return events
+
+    async def _watch(self):
+        self._stopped.clear()
+        while not self._stopped.is_set():
+            try:
+                events = await self.poll()
+                interval = self.tracker.interval
+            except Exception:
+                logger.exception("watcher poll failed")
+                events, interval = [], self.tracker.idle_interval
+            for event in events:
+                yield event
+            try:
+                await asyncio.wait_for(self._stopped.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
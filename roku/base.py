@@ -0,0 +1,109 @@
+"""
+What Roku and AsyncRoku have in common apart from how they send requests.
+"""
+
+from .cache import ResponseCache
+from .constants import COMMANDS, SENSORS
+from .instrumentation import RequestRecord, timed_parse
+from .protocol import APPS, DEVICE_INFO
+from .resolver import default_resolver
+from .util import index_apps
+
+
+class BaseRoku(object):
+    """Client state and the parts of each operation that do no I/O.
+
+    Subclasses are transports: they send requests with `_call`, `_get` and
+    `_stream` and hand the responses to the methods here, which parse them
+    with roku.protocol and keep memoized results.
+    """
+
+    def __init__(
+        self,
+        host,
+        port=8060,
+        timeout=10,
+        cache=None,
+        instrumentation=None,
+        icon_cache=None,
+        resolver=None,
+    ):
+        self.host = host
+        self.resolver = resolver or default_resolver
+        self.port = port
+        self.timeout = timeout
+        self.cache = ResponseCache() if cache is True else cache or None
+        self.instrumentation = instrumentation
+        self.icon_cache = icon_cache
+        self._apps = None
+        self._app_index = None
+        self._device_snapshot = None
+
+    def __dir__(self):
+        return sorted(
+            dir(type(self))
+            + list(self.__dict__.keys())
+            + list(COMMANDS.keys())
+            + list(SENSORS)
+        )
+
+    @property
+    def commands(self):
+        return sorted(COMMANDS.keys())
+
+    def _parse(self, query, content):
+        return timed_parse(
+            self, query.request.path, lambda body: query.parse(body, self), content
+        )
+
+    def _apps_from(self, content):
+        # reparse only when the response is new, which with a cache is only
+        # when the cached entry has expired
+        if self._apps is None or self._apps[0] is not content:
+            self._apps = (content, self._parse(APPS, content))
+        return self._apps[1]
+
+    def _index(self, apps):
+        if self._app_index is None or self._app_index[0] is not apps:
+            self._app_index = (apps, index_apps(apps))
+        return self._app_index[1]
+
+    def _fresh_snapshot(self, max_age):
+        snapshot = self._device_snapshot
+        if snapshot is not None and max_age is not None:
+            if not snapshot.is_stale(max_age):
+                return snapshot
+        return None
+
+    def _snapshot_from(self, content):
+        snapshot = self._device_snapshot
+        if snapshot is None or snapshot.content != content:
+            snapshot = DEVICE_INFO.parse(content, self)
+            self._device_snapshot = snapshot
+        elif snapshot.content is not content:
+            # an unchanged document from a new request, not a cache hit
+            snapshot.content = content
+            snapshot.fetched_at = snapshot.clock()
+        return snapshot
+
+    def _invalidate(self, action):
+        if self.cache is not None:
+            self.cache.invalidate_for(action)
+        if action in ("power", "poweron", "poweroff"):
+            self._device_snapshot = None
+
+    def _record(self, method, path, status, size, first_byte, total, error):
+        self.instrumentation.after_request(
+            self,
+            RequestRecord(
+                self.host,
+                self.port,
+                method,
+                path,
+                status,
+                size,
+                first_byte,
+                total,
+                error,
+            ),
+        )
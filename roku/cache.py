@@ -0,0 +1,90 @@
+"""
+Time-based caching of ECP query responses.
+"""
+
+import time
+
+DEFAULT_TTLS = {
+    "/query/apps": 300,
+    "/query/device-info": 60,
+    "/query/tv-channels": 300,
+    "/query/icon/": 3600,
+    "/query/active-app": 1,
+    "/query/media-player": 1,
+}
+
+# Queries whose answers are changed by each kind of command.
+INVALIDATIONS = {
+    "launch": ("/query/active-app", "/query/media-player"),
+    "store": ("/query/active-app", "/query/media-player", "/query/apps"),
+    "power": ("/query/device-info", "/query/active-app", "/query/media-player"),
+}
+INVALIDATIONS["poweron"] = INVALIDATIONS["power"]
+INVALIDATIONS["poweroff"] = INVALIDATIONS["power"]
+
+
+class ResponseCache(object):
+    """Response bodies for a single device, keyed by request path.
+
+    `ttls` maps path prefixes to the number of seconds a response stays
+    fresh; the longest matching prefix wins. Paths without a matching prefix
+    use `default_ttl`, and a TTL of zero disables caching for that path.
+    """
+
+    def __init__(self, ttls=None, default_ttl=0, clock=time.monotonic):
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+
+    def __repr__(self):
+        return f"<ResponseCache: {len(self._entries)} entries, {self.hits} hits, {self.misses} misses>"
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, path):
+        matches = [prefix for prefix in self.ttls if path.startswith(prefix)]
+        if not matches:
+            return self.default_ttl
+        return self.ttls[max(matches, key=len)]
+
+    def cacheable(self, path):
+        return self.ttl_for(path) > 0
+
+    def get(self, path):
+        entry = self._entries.get(path)
+        if entry is not None:
+            expires, content = entry
+            if self.clock() < expires:
+                self.hits += 1
+                return content
+            del self._entries[path]
+        self.misses += 1
+        return None
+
+    def set(self, path, content):
+        ttl = self.ttl_for(path)
+        if ttl > 0:
+            self._entries[path] = (self.clock() + ttl, content)
+
+    def invalidate(self, *prefixes):
+        """Drop entries starting with any of `prefixes`, or every entry if
+        none are given.
+        """
+        if not prefixes:
+            self._entries.clear()
+            return
+        for path in list(self._entries):
+            if path.startswith(prefixes):
+                del self._entries[path]
+
+    def invalidate_for(self, action):
+        prefixes = INVALIDATIONS.get(action)
+        if prefixes:
+            self.invalidate(*prefixes)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
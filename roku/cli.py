@@ -1,4 +1,6 @@
 import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import click
 
@@ -13,9 +15,91 @@ def cli(ctx, use_async):
     ctx.obj["use_async"] = use_async
 
 
+def _device_record(roku, info, error):
+    record = {"host": roku.host, "port": roku.port}
+    if info is not None:
+        record.update((field, getattr(info, field)) for field in info.__slots__)
+    if error is not None:
+        record["error"] = str(error)
+    return record
+
+
+def _echo_device(roku, info, error, output_format):
+    if output_format == "jsonl":
+        click.echo(json.dumps(_device_record(roku, info, error)))
+        return
+    click.echo(f"{roku.host}:{roku.port}")
+    if info is not None:
+        click.echo(f"  Name:     {info.user_device_name}")
+        click.echo(f"  Model:    {info.model_name} ({info.model_num})")
+        click.echo(f"  Type:     {info.roku_type}")
+        click.echo(f"  Software: {info.software_version}")
+        click.echo(f"  Serial:   {info.serial_num}")
+    if error is not None:
+        click.echo(f"  Error:    {error}")
+
+
+async def _discover_async(timeout, retries, inspect, concurrency, output_format):
+    """Inspect each device as soon as it answers discovery, sharing one
+    session pool, and print each one as soon as its details arrive.
+    """
+    from roku._async.core import AsyncRoku
+    from roku._async.session import SessionPool
+
+    semaphore = asyncio.Semaphore(concurrency)
+    found = 0
+
+    async def _inspect(roku):
+        info = error = None
+        if inspect:
+            try:
+                async with semaphore:
+                    info = await roku.get_device_info()
+            except Exception as exc:
+                error = exc
+        _echo_device(roku, info, error, output_format)
+
+    async with SessionPool(limit=concurrency) as pool:
+        tasks = []
+        async for device in AsyncRoku.discover_iter(timeout=timeout, retries=retries):
+            found += 1
+            roku = AsyncRoku(device.host, device.port, pool=pool)
+            tasks.append(asyncio.ensure_future(_inspect(roku)))
+        await asyncio.gather(*tasks)
+    return found
+
+
+def _discover_sync(timeout, retries, inspect, concurrency, output_format):
+    from roku.core import Roku
+    from roku.session import create_session
+
+    rokus = Roku.discover(timeout=timeout, retries=retries)
+    if not inspect:
+        for roku in rokus:
+            _echo_device(roku, None, None, output_format)
+        return len(rokus)
+
+    session = create_session(pool_connections=concurrency, pool_maxsize=concurrency)
+
+    def _inspect(roku):
+        roku = Roku(roku.host, roku.port, session=session)
+        try:
+            return roku, roku.device_info, None
+        except Exception as exc:
+            return roku, None, exc
+
+    with session, ThreadPoolExecutor(concurrency) as executor:
+        futures = [executor.submit(_inspect, roku) for roku in rokus]
+        for future in as_completed(futures):
+            _echo_device(*future.result(), output_format)
+    return len(rokus)
+
+
 @cli.command()
 @click.option("--timeout", type=int, default=2, help="Discovery timeout in seconds")
-@click.option("--retries", type=int, default=1, help="Number of retries")
+@click.option(
+    "--retries", type=click.IntRange(min=1), default=1, help="Number of retries"
+)
 @click.option(
     "-i",
     "--inspect",
@@ -23,36 +107,33 @@ def cli(ctx, use_async):
     default=False,
     help="Fetch and display device details",
 )
+@click.option(
+    "-c",
+    "--concurrency",
+    type=click.IntRange(min=1),
+    default=16,
+    help="Number of devices to inspect at once",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["text", "jsonl"]),
+    default="text",
+    help="Output format; jsonl prints one JSON object per device",
+)
 @click.pass_context
-def discover(ctx, timeout, retries, inspect):
-    """Discover Roku devices on the network."""
-    if ctx.obj["use_async"]:
-        from roku._async.core import AsyncRoku
+def discover(ctx, timeout, retries, inspect, concurrency, output_format):
+    """Discover Roku devices on the network.
 
-        rokus = asyncio.run(AsyncRoku.discover(timeout=timeout, retries=retries))
+    Devices are printed as soon as they have been inspected, in the order
+    they respond.
+    """
+    if ctx.obj["use_async"]:
+        found = asyncio.run(
+            _discover_async(timeout, retries, inspect, concurrency, output_format)
+        )
     else:
-        from roku.core import Roku
-
-        rokus = Roku.discover(timeout=timeout, retries=retries)
+        found = _discover_sync(timeout, retries, inspect, concurrency, output_format)
 
-    if not rokus:
+    if not found and output_format == "text":
         click.echo("No Roku devices found.")
-        return
-
-    for roku in rokus:
-        click.echo(f"{roku.host}:{roku.port}")
-        if inspect:
-            if ctx.obj["use_async"]:
-
-                async def _get_info(r):
-                    async with r:
-                        return await r.get_device_info()
-
-                info = asyncio.run(_get_info(roku))
-            else:
-                info = roku.device_info
-            click.echo(f"  Name:     {info.user_device_name}")
-            click.echo(f"  Model:    {info.model_name} ({info.model_num})")
-            click.echo(f"  Type:     {info.roku_type}")
-            click.echo(f"  Software: {info.software_version}")
-            click.echo(f"  Serial:   {info.serial_num}")
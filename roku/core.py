@@ -1,95 +1,120 @@
 import logging
-import xml.etree.ElementTree as ET
-from urllib.parse import quote_plus, urlparse
-import socket
-import requests
-
-from . import discovery
-from .constants import COMMANDS, SENSORS, TOUCH_OPS
-from .models import Application, DeviceInfo, MediaPlayer, RokuException
-from .util import deserialize_apps, deserialize_channels
-
-__version__ = "4.1.0"
-
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from . import __version__  # noqa
+from .base import BaseRoku
+from .constants import COMMANDS, TOUCH_OPS  # noqa
+from .instrumentation import clock
+from .models import Application, KeyFailure, RokuException, TextEntryResult  # noqa
+from .protocol import (
+    ACTIVE_APP,
+    APPS,
+    CURRENT_APP,
+    DEVICE_INFO,
+    MEDIA_PLAYER,
+    TV_CHANNELS,
+    command_requests,
+    icon_request,
+    input_request,
+    is_command,
+    launch_request,
+    literal_request,
+    store_request,
+    touch_request,
+)
+from .resolver import url_host
+from .util import iter_apps, iter_channels
+from .watcher import Watcher
 
 roku_logger = logging.getLogger("roku")
 
 
-class Roku(object):
+class Roku(BaseRoku):
     @classmethod
     def discover(self, *args, **kwargs):
+        from . import discovery
+
         rokus = []
         for device in discovery.discover(*args, **kwargs):
             o = urlparse(device.location)
             rokus.append(Roku(o.hostname, o.port))
         return rokus
 
-    def __init__(self, host, port=8060, timeout=10):
-        self.host = socket.gethostbyname(host)
-        self.port = port
-        self._conn = None
-        self.timeout = timeout
+    def __init__(
+        self,
+        host,
+        port=8060,
+        timeout=10,
+        session=None,
+        cache=None,
+        instrumentation=None,
+        icon_cache=None,
+        resolver=None,
+    ):
+        super(Roku, self).__init__(
+            host,
+            port=port,
+            timeout=timeout,
+            cache=cache,
+            instrumentation=instrumentation,
+            icon_cache=icon_cache,
+            resolver=resolver,
+        )
+        self._conn = session
+        self._owns_session = session is None
 
     def __repr__(self):
         return f"<Roku: {self.host}:{self.port}>"
 
     def __getattr__(self, name):
-        if name not in COMMANDS and name not in SENSORS:
+        if not is_command(name):
             raise AttributeError(f"{name} is not a valid method")
 
         def command(*args, **kwargs):
-            if name in SENSORS:
-                keys = [f"{name}.{axis}" for axis in ("x", "y", "z")]
-                params = dict(zip(keys, args))
-                self.input(params)
-            elif name == "literal":
-                for char in args[0]:
-                    path = f"/keypress/{COMMANDS[name]}_{quote_plus(char)}"
-                    self._post(path)
-            elif name == "search":
-                path = "/search/browse"
-                params = {k.replace("_", "-"): v for k, v in kwargs.items()}
-                self._post(path, params=params)
-            else:
-                if len(args) > 0 and (args[0] == "keydown" or args[0] == "keyup"):
-                    path = f"/{args[0]}/{COMMANDS[name]}"
-                else:
-                    path = f"/keypress/{COMMANDS[name]}"
-                self._post(path)
+            for request in command_requests(name, *args, **kwargs):
+                self._send(request)
+            self._invalidate(name)
 
         return command
 
     def __getitem__(self, key):
-        key = str(key)
-        app = self._app_for_name(key)
-        if not app:
-            app = self._app_for_id(key)
-        return app
-
-    def __dir__(self):
-        return sorted(
-            dir(type(self))
-            + list(self.__dict__.keys())
-            + list(COMMANDS.keys())
-            + list(SENSORS)
-        )
-
-    def _app_for_name(self, name):
-        for app in self.apps:
-            if app.name == name:
-                return app
-
-    def _app_for_id(self, app_id):
-        for app in self.apps:
-            if app.id == app_id:
-                return app
+        return self._index(self.apps).get(str(key))
 
     def _connect(self):
         if self._conn is None:
-            self._conn = requests.Session()
+            # requests is imported on first use to keep `import roku` fast
+            from .session import create_session
+
+            self._conn = create_session()
+
+    def close(self):
+        if self._conn is not None and self._owns_session:
+            self._conn.close()
+            self._conn = None
+
+    def prewarm(self):
+        """Open a connection to the device ahead of the first command."""
+        self._get("/")
+
+    def _url(self, path):
+        address = self.resolver.resolve(self.host)
+        return f"http://{url_host(address)}:{self.port}{path}"
+
+    def _send(self, request):
+        if request.params is None:
+            return self._call(request.method, request.path)
+        return self._call(request.method, request.path, params=request.params)
 
     def _get(self, path, *args, **kwargs):
-        return self._call("GET", path, *args, **kwargs)
+        if self.cache is None or args or kwargs or not self.cache.cacheable(path):
+            return self._call("GET", path, *args, **kwargs)
+        content = self.cache.get(path)
+        if content is None:
+            content = self._call("GET", path)
+            self.cache.set(path, content)
+        return content
 
     def _post(self, path, *args, **kwargs):
         return self._call("POST", path, *args, **kwargs)
@@ -99,140 +124,177 @@ class Roku(object):
 
         roku_logger.debug(path)
 
-        url = f"http://{self.host}:{self.port}{path}"
+        url = self._url(path)
 
         if method not in ("GET", "POST"):
             raise ValueError("only GET and POST HTTP methods are supported")
 
         func = getattr(self._conn, method.lower())
-        resp = func(url, timeout=self.timeout, *args, **kwargs)
+        instrumentation = self.instrumentation
+        if instrumentation is None:
+            resp = func(url, timeout=self.timeout, *args, **kwargs)
+        else:
+            instrumentation.before_request(self, method, path)
+            start = clock()
+            try:
+                resp = func(url, timeout=self.timeout, *args, **kwargs)
+            except Exception as exc:
+                self._record(method, path, None, 0, None, clock() - start, exc)
+                raise
+            self._record(
+                method,
+                path,
+                resp.status_code,
+                len(resp.content),
+                resp.elapsed.total_seconds(),
+                clock() - start,
+                None,
+            )
 
         if resp.status_code < 200 or resp.status_code > 299:
             raise RokuException(resp.content)
 
         return resp.content
 
+    def _stream(self, path, chunk_size=8192):
+        self._connect()
+
+        roku_logger.debug(path)
+
+        url = self._url(path)
+
+        with self._conn.get(url, timeout=self.timeout, stream=True) as resp:
+            if resp.status_code < 200 or resp.status_code > 299:
+                raise RokuException(resp.content)
+            yield from resp.iter_content(chunk_size)
+
+    def iter_apps(self):
+        """Yield installed apps as they arrive without buffering the
+        whole response.
+        """
+        return iter_apps(self._stream("/query/apps"), roku=self)
+
+    def iter_tv_channels(self):
+        """Yield TV channels as they arrive without buffering the whole
+        response. Stop iterating to abandon the rest of the download.
+        """
+        return iter_channels(self._stream("/query/tv-channels"), roku=self)
+
+    def _query(self, query):
+        return self._parse(query, self._get(query.request.path))
+
     @property
     def apps(self):
-        resp = self._get("/query/apps")
-        applications = deserialize_apps(resp)
-        for a in applications:
-            a.roku = self
-        return applications
+        return self._apps_from(self._get(APPS.request.path))
 
     @property
     def active_app(self):
-        resp = self._get("/query/active-app")
-        active_app = deserialize_apps(resp)
-        if len(active_app):
-            return active_app[0]
-        else:
-            return None
+        return self._query(ACTIVE_APP)
 
     @property
     def tv_channels(self):
-        resp = self._get("/query/tv-channels")
-        channels = deserialize_channels(resp)
-        for c in channels:
-            c.roku = self
-        return channels
+        return self._query(TV_CHANNELS)
 
     @property
     def device_info(self):
-        resp = self._get("/query/device-info")
-        root = ET.fromstring(resp)
-
-        roku_type = "Box"
-        if root.find("is-tv") is not None and root.find("is-tv").text == "true":
-            roku_type = "TV"
-        elif root.find("is-stick") is not None and root.find("is-stick").text == "true":
-            roku_type = "Stick"
-        dinfo = DeviceInfo(
-            model_name=root.find("model-name").text,
-            model_num=root.find("model-number").text,
-            software_version=f"{root.find('software-version').text}.{root.find('software-build').text}",
-            serial_num=root.find("serial-number").text,
-            user_device_name=root.find("user-device-name").text,
-            roku_type=roku_type,
-        )
-        return dinfo
+        return self.device_snapshot().to_device_info()
 
-    @property
-    def media_player(self):
-        resp = self._get("/query/media-player")
-        root = ET.fromstring(resp)
-
-        mp = MediaPlayer(
-            state=root.get("state"),
-            app=self[int(root.find("plugin").get("id"))],
-            position=int(root.find("position").text.split(" ", 1)[0]),
-            duration=int(root.find("duration").text.split(" ", 1)[0]),
-        )
-        return mp
+    def device_snapshot(self, max_age=None):
+        """Return every device-info field from a single fetch.
+
+        A snapshot younger than `max_age` seconds is reused without a
+        request. The response is only parsed again when it has changed;
+        an unchanged response refreshes the snapshot's `fetched_at`.
+        """
+        return self._fresh_snapshot(max_age) or self.refresh_device_info()
+
+    def refresh_device_info(self):
+        return self._snapshot_from(self._get(DEVICE_INFO.request.path))
 
     @property
-    def commands(self):
-        return sorted(COMMANDS.keys())
+    def media_player(self):
+        return self._query(MEDIA_PLAYER)
 
     @property
     def power_state(self):
-        resp = self._get("/query/device-info")
-        root = ET.fromstring(resp)
-        if root.find("power-mode").text:
-            if root.find("power-mode").text == "PowerOn":
-                return "On"
-            else:
-                return "Off"
-        return "Unknown"
+        return self.device_snapshot().power_state
 
     def icon(self, app):
-        return self._get(f"/query/icon/{app.id}")
+        path = icon_request(app).path
+        if self.icon_cache is None:
+            return self._get(path)
+        content = self.icon_cache.get(app)
+        if content is None:
+            content = self._get(path)
+            self.icon_cache.set(app, content)
+        return content
+
+    def prefetch_icons(self, apps=None, concurrency=8):
+        """Fetch the icons for `apps`, or for every installed app, up to
+        `concurrency` at a time. Icons already in the icon cache are not
+        fetched again. Returns a dict of app to icon.
+        """
+        apps = self.apps if apps is None else list(apps)
+        with ThreadPoolExecutor(concurrency) as executor:
+            return dict(zip(apps, executor.map(self.icon, apps)))
 
     def icon_url(self, app):
-        return "http://%s:%s/query/icon/%s" % (self.host, self.port, app.id)
+        return self._url(icon_request(app).path)
 
-    def launch(self, app, params={}):
+    def launch(self, app, params=None):
         if app.roku and app.roku != self:
             raise RokuException("this app belongs to another Roku")
-        params["contentID"] = app.id
-        return self._post(f"/launch/{app.id}", params=params)
+        resp = self._send(launch_request(app, params))
+        self._invalidate("launch")
+        return resp
 
     def store(self, app):
-        return self._post("/launch/11", params={"contentID": app.id})
+        resp = self._send(store_request(app))
+        self._invalidate("store")
+        return resp
 
     def input(self, params):
-        return self._post("/input", params=params)
+        return self._send(input_request(params))
+
+    def type_text(self, text, pacing=0, stop_on_error=False):
+        """Enter text one character at a time over a persistent connection.
+
+        Consecutive keypresses are sent at least `pacing` seconds apart.
+        Failed characters are collected instead of aborting the entry unless
+        `stop_on_error` is set.
+        """
+        self._connect()
+        failures = []
+        sent = 0
+        last = None
+        for index, char in enumerate(text):
+            if pacing and last is not None:
+                delay = last + pacing - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            last = time.monotonic()
+            sent += 1
+            try:
+                self._send(literal_request(char))
+            except Exception as exc:
+                failures.append(KeyFailure(index, char, exc))
+                if stop_on_error:
+                    break
+        return TextEntryResult(text, sent, failures)
 
     def touch(self, x, y, op="down"):
         if op not in TOUCH_OPS:
             raise RokuException(f"{op} is not a valid touch operation")
-
-        params = {
-            "touch.0.x": x,
-            "touch.0.y": y,
-            "touch.0.op": op,
-        }
-
-        self.input(params)
+        self._send(touch_request(x, y, op))
 
     @property
     def current_app(self):
-        resp = self._get("/query/active-app")
-        root = ET.fromstring(resp)
-        is_screensaver = True
-
-        app_node = root.find("screensaver")
-        if app_node is None:
-            app_node = root.find("app")
-            is_screensaver = False
-
-        if app_node is None:
-            return None
-
-        return Application(
-            id=app_node.get("id"),
-            version=app_node.get("version"),
-            name=app_node.text,
-            is_screensaver=is_screensaver,
-            roku=self,
-        )
+        return self._query(CURRENT_APP)
+
+    def watch(self, callback=None, **kwargs):
+        """Start a Watcher that polls this device from a background thread.
+        Keyword arguments set the polling intervals of its StateTracker.
+        """
+        watcher = Watcher(self, callback=callback, **kwargs)
+        watcher.start()
+        return watcher
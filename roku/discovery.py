@@ -5,11 +5,16 @@ http://github.com/dankrause
 """
 
 import socket
-from http.client import HTTPResponse
+import time
+from http.client import HTTPResponse, parse_headers
 from io import BytesIO
 
 ST_DIAL = "urn:dial-multiscreen-org:service:dial:1"
 ST_ECP = "roku:ecp"
+SSDP_GROUP = ("239.255.255.250", 1900)
+
+# SSDP recommends devices re-announce at least every 1800 seconds.
+DEFAULT_MAX_AGE = 1800
 
 
 class _FakeSocket(BytesIO):
@@ -27,9 +32,120 @@ class SSDPResponse(object):
     def __repr__(self):
         return f"<SSDPResponse({self.location}, {self.st}, {self.usn})"
 
+    @property
+    def serial(self):
+        """The device serial number from a USN such as
+        uuid:roku:ecp:P0A070000007.
+        """
+        if self.usn and self.usn.startswith("uuid:roku:ecp:"):
+            return self.usn.rsplit(":", 1)[1]
+        return None
+
+    @property
+    def max_age(self):
+        try:
+            return int(self.cache)
+        except (TypeError, ValueError):
+            return DEFAULT_MAX_AGE
+
+
+class SSDPNotify(SSDPResponse):
+    """An ssdp:alive or ssdp:byebye announcement multicast by a device."""
+
+    def __init__(self, headers):
+        self.location = headers.get("location")
+        self.usn = headers.get("usn")
+        self.st = headers.get("nt")
+        self.nts = headers.get("nts")
+        cache_control = headers.get("cache-control") or ""
+        self.cache = cache_control.split("=")[1] if "=" in cache_control else None
+
+    def __repr__(self):
+        return f"<SSDPNotify({self.nts}, {self.location}, {self.st}, {self.usn})"
+
+    @classmethod
+    def parse(cls, data):
+        """Parse a NOTIFY datagram, returning None for any other message."""
+        if not data.startswith(b"NOTIFY "):
+            return None
+        _, _, rest = data.partition(b"\r\n")
+        return cls(parse_headers(BytesIO(rest)))
+
+
+class DeviceRegistry(object):
+    """Devices known to be alive, keyed by USN.
+
+    Entries expire once the max-age a device announced has passed without a
+    fresh announcement. Callbacks registered with `subscribe` are called as
+    `callback(event, response)` where event is one of "added", "updated",
+    "removed" or "expired".
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._devices = {}
+        self._callbacks = []
+
+    def __repr__(self):
+        return f"<DeviceRegistry: {len(self._devices)} devices>"
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __contains__(self, usn):
+        return usn in self._devices
+
+    def __iter__(self):
+        return iter(self.devices)
+
+    @property
+    def devices(self):
+        self.expire()
+        return [response for response, _ in self._devices.values()]
+
+    def get(self, usn):
+        entry = self._devices.get(usn)
+        return entry[0] if entry else None
+
+    def subscribe(self, callback):
+        self._callbacks.append(callback)
+
+        def unsubscribe():
+            self._callbacks.remove(callback)
+
+        return unsubscribe
+
+    def _emit(self, event, response):
+        for callback in list(self._callbacks):
+            callback(event, response)
+
+    def update(self, response):
+        if not response.usn:
+            return
+        existing = self._devices.get(response.usn)
+        expires = self.clock() + response.max_age
+        self._devices[response.usn] = (response, expires)
+        if existing is None:
+            self._emit("added", response)
+        elif existing[0].location != response.location:
+            self._emit("updated", response)
+
+    def remove(self, usn):
+        entry = self._devices.pop(usn, None)
+        if entry is not None:
+            self._emit("removed", entry[0])
+
+    def expire(self):
+        now = self.clock()
+        expired = [usn for usn, (_, expires) in self._devices.items() if expires <= now]
+        for usn in expired:
+            response, _ = self._devices.pop(usn)
+            self._emit("expired", response)
+        return len(expired)
+
 
 def discover(timeout=2, retries=1, st=ST_ECP):
-    group = ("239.255.255.250", 1900)
+    group = SSDP_GROUP
 
     message = "\r\n".join(
         [
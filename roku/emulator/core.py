@@ -1,4 +1,9 @@
-from roku import Application
+import xml.etree.ElementTree as ET
+from contextlib import closing
+from io import BytesIO
+
+from ..models import Application, Channel
+from ..util import serialize_apps
 
 DEFAULT_APPS = [
     Application(1, "1.0", "Hulu Plus"),
@@ -7,22 +12,202 @@ DEFAULT_APPS = [
     Application(4, "4.0", "Netflix"),
 ]
 
+DEFAULT_CHANNELS = [
+    Channel("2.1", "WMAR-HD"),
+    Channel("11.1", "WBAL-DT"),
+    Channel("13.1", "WJZ-HD"),
+    Channel("45.1", "WBFF"),
+]
+
+STORE_APP_ID = "11"
+TV_APP_ID = "tvinput.dtv"
+
+
+def _serialize(root):
+    with closing(BytesIO()) as bffr:
+        tree = ET.ElementTree(root)
+        tree.write(bffr, xml_declaration=True, encoding="utf-8")
+        return bffr.getvalue()
+
 
 class Emulator(object):
-    def __init__(self, apps=None):
-        self._apps = apps or DEFAULT_APPS
+    """The state of a single virtual Roku.
+
+    Commands change the state the way a real device would: launching an app
+    makes it active, Home returns to the home screen, Play and Pause drive
+    the media player and the power keys toggle the power mode. Every key,
+    launch and input is recorded in `history`.
+    """
+
+    def __init__(
+        self,
+        apps=None,
+        channels=None,
+        serial_num="YH009N000000",
+        user_device_name="Emulated Roku",
+        model_name="Roku Ultra",
+        model_num="4800X",
+        is_tv=False,
+    ):
+        self._apps = list(apps or DEFAULT_APPS)
+        self.channels = list(channels or DEFAULT_CHANNELS)
+        self.serial_num = serial_num
+        self.user_device_name = user_device_name
+        self.model_name = model_name
+        self.model_num = model_num
+        self.is_tv = is_tv
+        self.active_app = None
+        self.channel = None
+        self.power_mode = "PowerOn"
+        self.player_state = "close"
+        self.position = 0
+        self.duration = 0
+        self.text = ""
+        self.held = set()
+        self.history = []
+
+    def __repr__(self):
+        return f"<Emulator: {self.user_device_name} ({self.serial_num})>"
 
     def __call__(self, command, *args, **kwargs):
-        pass
+        """Dispatch a command by name, such as emulator("keypress", "Home")."""
+        func = getattr(self, command, None)
+        if func is None or command.startswith("_"):
+            raise ValueError(f"{command} is not a valid emulator command")
+        return func(*args, **kwargs)
+
+    def _app(self, app_id):
+        for app in self._apps:
+            if app.id == str(app_id):
+                return app
 
     def add_app(self, app):
-        pass
+        if self._app(app.id) is None:
+            self._apps.append(app)
 
     def get_icon(self, app_id):
-        pass
+        app = self._app(app_id)
+        if app is None:
+            return None
+        # a valid PNG signature followed by bytes unique to the app
+        return b"\x89PNG\r\n\x1a\n" + f"{app.id}:{app.version}".encode()
 
-    def launch_app(self, app_id):
-        pass
+    def launch_app(self, app_id, params=None):
+        params = params or {}
+        if str(app_id) == TV_APP_ID and self.is_tv:
+            self.active_app = Application(TV_APP_ID, "1.0", "TV")
+            self.channel = params.get("ch")
+        elif str(app_id) == STORE_APP_ID:
+            # the channel store opens on the page for params["contentID"]
+            self.active_app = Application(STORE_APP_ID, "1.0", "Roku Channel Store")
+        else:
+            app = self._app(app_id)
+            if app is None:
+                return False
+            self.active_app = app
+        self.player_state = "close"
+        self.position = 0
+        self.history.append(("launch", str(app_id), dict(params)))
+        return True
 
     def list_apps(self):
-        pass
+        return list(self._apps)
+
+    def keypress(self, key):
+        self.history.append(("keypress", key))
+        self._apply(key)
+
+    def keydown(self, key):
+        self.history.append(("keydown", key))
+        self.held.add(key)
+
+    def keyup(self, key):
+        self.history.append(("keyup", key))
+        if key in self.held:
+            self.held.discard(key)
+            self._apply(key)
+
+    def input(self, params):
+        self.history.append(("input", dict(params)))
+
+    def search(self, params):
+        self.history.append(("search", dict(params)))
+
+    def _apply(self, key):
+        if key.startswith("Lit_"):
+            self.text += key[4:]
+        elif key == "Backspace":
+            self.text = self.text[:-1]
+        elif key == "Home":
+            self.active_app = None
+            self.player_state = "close"
+        elif key == "Play" and self.active_app is not None:
+            if self.player_state == "play":
+                self.player_state = "pause"
+            else:
+                self.player_state = "play"
+                self.duration = self.duration or 1800000
+        elif key == "Fwd" and self.player_state in ("play", "pause"):
+            self.position = min(self.position + 10000, self.duration)
+        elif key == "Rev" and self.player_state in ("play", "pause"):
+            self.position = max(self.position - 10000, 0)
+        elif key == "PowerOff":
+            self.power_mode = "DisplayOff"
+        elif key == "PowerOn":
+            self.power_mode = "PowerOn"
+        elif key == "Power":
+            self.power_mode = (
+                "DisplayOff" if self.power_mode == "PowerOn" else "PowerOn"
+            )
+
+    def apps_xml(self):
+        return serialize_apps(self._apps)
+
+    def active_app_xml(self):
+        root = ET.Element("active-app")
+        if self.active_app is None:
+            ET.SubElement(root, "app").text = "Roku"
+        else:
+            app = self.active_app
+            attrs = {"id": app.id, "version": app.version or ""}
+            ET.SubElement(root, "app", attrs).text = app.name
+        return _serialize(root)
+
+    def device_info_xml(self):
+        root = ET.Element("device-info")
+        fields = {
+            "udn": f"28780000-0018-1000-8000-{self.serial_num.lower():0>12}",
+            "serial-number": self.serial_num,
+            "vendor-name": "Roku",
+            "model-number": self.model_num,
+            "model-name": self.model_name,
+            "is-tv": "true" if self.is_tv else "false",
+            "is-stick": "false",
+            "user-device-name": self.user_device_name,
+            "software-version": "11.5.0",
+            "software-build": "4312",
+            "power-mode": self.power_mode,
+            "supports-find-remote": "true",
+            "supports-private-listening": "true",
+        }
+        for tag, text in fields.items():
+            ET.SubElement(root, tag).text = text
+        return _serialize(root)
+
+    def media_player_xml(self):
+        root = ET.Element("player", {"error": "false", "state": self.player_state})
+        if self.active_app is not None:
+            app = self.active_app
+            attrs = {"id": app.id, "name": app.name, "bandwidth": "10000000 bps"}
+            ET.SubElement(root, "plugin", attrs)
+        ET.SubElement(root, "position").text = f"{self.position} ms"
+        ET.SubElement(root, "duration").text = f"{self.duration} ms"
+        return _serialize(root)
+
+    def tv_channels_xml(self):
+        root = ET.Element("tv-channels")
+        for channel in self.channels:
+            elem = ET.SubElement(root, "channel")
+            ET.SubElement(elem, "number").text = channel.number
+            ET.SubElement(elem, "name").text = channel.name
+        return _serialize(root)
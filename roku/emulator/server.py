@@ -0,0 +1,276 @@
+"""
+Serve emulated Roku devices over ECP.
+
+Requires the `async` extra. Each EmulatorServer listens on its own port, so
+clients can address many virtual devices from one process.
+"""
+
+import asyncio
+import random
+import threading
+from urllib.parse import unquote_plus
+
+from aiohttp import web
+
+from ..resolver import url_host
+from .core import Emulator
+
+DEVICE_DESCRIPTION = """<?xml version="1.0" encoding="UTF-8" ?>
+<root xmlns="urn:schemas-upnp-org:device-1-0">
+  <specVersion><major>1</major><minor>0</minor></specVersion>
+  <device>
+    <deviceType>urn:roku-com:device:player:1-0</deviceType>
+    <friendlyName>{name}</friendlyName>
+    <manufacturer>Roku</manufacturer>
+    <modelName>{model}</modelName>
+    <serialNumber>{serial}</serialNumber>
+  </device>
+</root>
+"""
+
+XML = "text/xml"
+
+
+class EmulatorServer(object):
+    """An HTTP server exposing one Emulator.
+
+    Every request is delayed by `latency` seconds, plus or minus up to
+    `jitter` seconds, and fails with a 503 with probability `error_rate`.
+    Pass `seed` for a repeatable sequence of delays and failures. A `port` of
+    0 picks a free port, available as `port` once started.
+    """
+
+    def __init__(
+        self,
+        emulator=None,
+        host="127.0.0.1",
+        port=8060,
+        latency=0,
+        jitter=0,
+        error_rate=0,
+        seed=None,
+    ):
+        self.emulator = emulator or Emulator()
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self._runner = None
+
+    def __repr__(self):
+        return f"<EmulatorServer: {self.host}:{self.port}>"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    @property
+    def url(self):
+        return f"http://{url_host(self.host)}:{self.port}"
+
+    def application(self):
+        app = web.Application(middlewares=[self._conditions])
+        app.add_routes(
+            [
+                web.get("/", self.description),
+                web.get("/query/apps", self.apps),
+                web.get("/query/active-app", self.active_app),
+                web.get("/query/device-info", self.device_info),
+                web.get("/query/media-player", self.media_player),
+                web.get("/query/tv-channels", self.tv_channels),
+                web.get("/query/icon/{app_id}", self.icon),
+                web.post("/keypress/{key}", self.key),
+                web.post("/keydown/{key}", self.key),
+                web.post("/keyup/{key}", self.key),
+                web.post("/launch/{app_id}", self.launch),
+                web.post("/input", self.input),
+                web.post("/search/browse", self.search),
+            ]
+        )
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.application(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _conditions(self, request, handler):
+        self.requests += 1
+        delay = self.latency
+        if self.jitter:
+            delay += self.random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.error_rate and self.random.random() < self.error_rate:
+            return web.Response(status=503, text="injected failure")
+        return await handler(request)
+
+    async def description(self, request):
+        emulator = self.emulator
+        body = DEVICE_DESCRIPTION.format(
+            name=emulator.user_device_name,
+            model=emulator.model_name,
+            serial=emulator.serial_num,
+        )
+        return web.Response(text=body, content_type=XML)
+
+    async def apps(self, request):
+        return web.Response(body=self.emulator.apps_xml(), content_type=XML)
+
+    async def active_app(self, request):
+        return web.Response(body=self.emulator.active_app_xml(), content_type=XML)
+
+    async def device_info(self, request):
+        return web.Response(body=self.emulator.device_info_xml(), content_type=XML)
+
+    async def media_player(self, request):
+        return web.Response(body=self.emulator.media_player_xml(), content_type=XML)
+
+    async def tv_channels(self, request):
+        return web.Response(body=self.emulator.tv_channels_xml(), content_type=XML)
+
+    async def icon(self, request):
+        icon = self.emulator.get_icon(request.match_info["app_id"])
+        if icon is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=icon, content_type="image/png")
+
+    async def key(self, request):
+        event = request.path.split("/", 2)[1]
+        # read the key from the raw path so that a quote_plus encoded
+        # literal such as Lit_+ decodes to a space
+        key = unquote_plus(request.raw_path.split("?", 1)[0].rsplit("/", 1)[1])
+        self.emulator(event, key)
+        return web.Response()
+
+    async def launch(self, request):
+        params = dict(request.query)
+        if not self.emulator.launch_app(request.match_info["app_id"], params):
+            raise web.HTTPNotFound()
+        return web.Response()
+
+    async def input(self, request):
+        self.emulator.input(request.query)
+        return web.Response()
+
+    async def search(self, request):
+        self.emulator.search(request.query)
+        return web.Response()
+
+
+class EmulatorFleet(object):
+    """Run `count` emulated devices on consecutive ports starting at
+    `base_port`, or on free ports if `base_port` is 0. Extra keyword
+    arguments are passed to each EmulatorServer.
+    """
+
+    def __init__(self, count, host="127.0.0.1", base_port=0, seed=None, **kwargs):
+        self.servers = []
+        for i in range(count):
+            emulator = Emulator(
+                serial_num=f"YH009N{i:06d}",
+                user_device_name=f"Emulated Roku {i + 1}",
+            )
+            self.servers.append(
+                EmulatorServer(
+                    emulator,
+                    host=host,
+                    port=base_port + i if base_port else 0,
+                    seed=None if seed is None else seed + i,
+                    **kwargs,
+                )
+            )
+
+    def __repr__(self):
+        return f"<EmulatorFleet: {len(self.servers)} devices>"
+
+    def __len__(self):
+        return len(self.servers)
+
+    def __iter__(self):
+        return iter(self.servers)
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    @property
+    def addresses(self):
+        return [(server.host, server.port) for server in self.servers]
+
+    async def start(self):
+        await asyncio.gather(*(server.start() for server in self.servers))
+
+    async def stop(self):
+        await asyncio.gather(*(server.stop() for server in self.servers))
+
+
+class BackgroundFleet(object):
+    """An EmulatorFleet running on an event loop in a daemon thread, for
+    exercising the blocking client.
+    """
+
+    def __init__(self, count=1, **kwargs):
+        self.fleet = EmulatorFleet(count, **kwargs)
+        self._loop = None
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def addresses(self):
+        return self.fleet.addresses
+
+    def start(self):
+        started = threading.Event()
+        errors = []
+        self._loop = asyncio.new_event_loop()
+
+        def _run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.fleet.start())
+            except Exception as exc:
+                errors.append(exc)
+                return
+            finally:
+                started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            self._thread.join()
+            self._loop.close()
+            raise errors[0]
+
+    def stop(self):
+        future = asyncio.run_coroutine_threadsafe(self.fleet.stop(), self._loop)
+        future.result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
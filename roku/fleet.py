@@ -0,0 +1,123 @@
+"""
+Blocking interface for sending the same request to many Roku devices.
+
+Requests are made concurrently with the async client, so the `async` extra
+must be installed. The fleet runs an event loop in a daemon thread, started
+on the first broadcast, so connections are kept alive between broadcasts.
+Close the fleet, or use it as a context manager, to stop the thread.
+"""
+
+import asyncio
+import threading
+
+from .constants import COMMANDS, SENSORS
+
+
+class RokuFleet(object):
+    def __init__(
+        self,
+        hosts,
+        port=8060,
+        concurrency=50,
+        timeout=10,
+        deadline=None,
+        instrumentation=None,
+    ):
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.hosts = list(dict.fromkeys(hosts))
+        self.port = port
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.deadline = deadline
+        self.instrumentation = instrumentation
+        self._fleet = None
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<RokuFleet: {len(self.hosts)} devices>"
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getattr__(self, name):
+        if name not in COMMANDS and name not in SENSORS:
+            raise AttributeError(f"{name} is not a valid method")
+
+        def command(*args, **kwargs):
+            return self._broadcast(name, *args, **kwargs)
+
+        return command
+
+    def __dir__(self):
+        return sorted(
+            dir(type(self))
+            + list(self.__dict__.keys())
+            + list(COMMANDS.keys())
+            + list(SENSORS)
+        )
+
+    def _start(self):
+        from ._async.fleet import AsyncRokuFleet
+
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+
+        async def _create():
+            return AsyncRokuFleet(
+                self.hosts,
+                port=self.port,
+                concurrency=self.concurrency,
+                timeout=self.timeout,
+                deadline=self.deadline,
+                instrumentation=self.instrumentation,
+            )
+
+        try:
+            self._fleet = asyncio.run_coroutine_threadsafe(_create(), loop).result()
+        except BaseException:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+            raise
+        self._loop, self._thread = loop, thread
+
+    def _broadcast(self, method, *args, **kwargs):
+        with self._lock:
+            if self._loop is None:
+                self._start()
+        coro = getattr(self._fleet, method)(*args, **kwargs)
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        """Close the fleet's connections and stop its event loop."""
+        with self._lock:
+            if self._loop is None:
+                return
+            loop, thread, fleet = self._loop, self._thread, self._fleet
+            self._loop = self._thread = self._fleet = None
+        asyncio.run_coroutine_threadsafe(fleet.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    def launch(self, app, params=None):
+        return self._broadcast("launch", app, params)
+
+    def input(self, params):
+        return self._broadcast("input", params)
+
+    def touch(self, x, y, op="down"):
+        return self._broadcast("touch", x, y, op=op)
+
+    def query(self, name, *args, **kwargs):
+        return self._broadcast("query", name, *args, **kwargs)
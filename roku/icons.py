@@ -0,0 +1,117 @@
+"""
+A cache of app icons shared across devices.
+
+An icon only changes when its app is updated, so icons are keyed by app id
+and version rather than by device. Every device with the same version of an
+app shares one entry.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class IconCache(object):
+    """Icons held in memory, least recently used first out once they take
+    more than `max_bytes`, and optionally saved under `directory` so that
+    they outlive the process.
+
+    Apps without a version are never cached, since there is no way to tell
+    when their icon changes. The cache is safe to share between threads and
+    between clients.
+    """
+
+    def __init__(self, max_bytes=8 * 1024 * 1024, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return f"<IconCache: {len(self._entries)} icons, {self.size} bytes>"
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def key(app):
+        if app.version is None:
+            return None
+        return (app.id, app.version)
+
+    def _path(self, key):
+        digest = hashlib.sha256(f"{key[0]}\0{key[1]}".encode()).hexdigest()
+        return os.path.join(self.directory, f"{digest}.icon")
+
+    def get(self, app):
+        """Return the cached icon for `app` or None."""
+        key = self.key(app)
+        if key is None:
+            return None
+        with self._lock:
+            content = self._entries.get(key)
+            if content is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return content
+        if self.directory is not None:
+            try:
+                with open(self._path(key), "rb") as infile:
+                    content = infile.read()
+            except FileNotFoundError:
+                pass
+            else:
+                self._remember(key, content)
+                with self._lock:
+                    self.hits += 1
+                return content
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, app, content):
+        key = self.key(app)
+        if key is None:
+            return
+        self._remember(key, content)
+        if self.directory is not None:
+            # write to a temporary file first so that readers never see a
+            # partially written icon
+            fd, tmp = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(fd, "wb") as outfile:
+                outfile.write(content)
+            os.replace(tmp, self._path(key))
+
+    def _remember(self, key, content):
+        if len(content) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = content
+            self.size += len(content)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        """Forget every icon held in memory. Icons on disk are kept."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
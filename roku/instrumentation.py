@@ -0,0 +1,211 @@
+"""
+Hooks for measuring the requests a client makes.
+
+Pass an Instrumentation to Roku or AsyncRoku as `instrumentation` to be
+told about every request and every response that is parsed. Clients
+without one skip all measurement, so instrumentation costs nothing unless
+it is used. HistogramCollector keeps latency and size histograms per device
+and endpoint, ready to be exported to a metrics system.
+"""
+
+import time
+from bisect import bisect_left
+from collections import namedtuple
+
+RequestRecord = namedtuple(
+    "RequestRecord",
+    [
+        "host",
+        "port",
+        "method",
+        "path",
+        "status",
+        "bytes",
+        "first_byte_time",
+        "total_time",
+        "error",
+    ],
+)
+
+ParseRecord = namedtuple("ParseRecord", ["host", "port", "path", "bytes", "time"])
+
+# Paths that carry a key or an id after the prefix; they are grouped under
+# the prefix so that each command does not get an endpoint of its own.
+GROUPED_PREFIXES = (
+    "/keypress/",
+    "/keydown/",
+    "/keyup/",
+    "/launch/",
+    "/install/",
+    "/query/icon/",
+)
+
+LATENCY_BOUNDS = tuple(0.0005 * 2**i for i in range(16))
+SIZE_BOUNDS = tuple(2**i for i in range(6, 25))
+
+
+def endpoint(path):
+    """The endpoint a request path belongs to, such as /keypress for
+    /keypress/Home.
+    """
+    path = path.split("?", 1)[0]
+    for prefix in GROUPED_PREFIXES:
+        if path.startswith(prefix):
+            return prefix[:-1]
+    return path
+
+
+clock = time.perf_counter
+
+
+class Instrumentation(object):
+    """Base class for instrumentation. Override any of the hooks.
+
+    Hooks are called on the thread or event loop making the request, so
+    they should return quickly.
+    """
+
+    def before_request(self, roku, method, path):
+        pass
+
+    def after_request(self, roku, record):
+        """Called with a RequestRecord once a request has completed or
+        failed. Times are in seconds. `first_byte_time` is the time until
+        the response headers arrived, which includes opening a connection
+        if one was not already open, or None where it is not known, as for
+        pipelined requests. `error` is the exception raised, if any.
+        """
+
+    def after_parse(self, roku, record):
+        """Called with a ParseRecord after a response has been parsed."""
+
+
+class Histogram(object):
+    """Counts of values falling into fixed buckets.
+
+    `bounds` are the upper bounds of the buckets, in ascending order. Values
+    above the last bound are counted in an overflow bucket.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total", "min", "max")
+
+    def __init__(self, bounds=LATENCY_BOUNDS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def __repr__(self):
+        return f"<Histogram: {self.count} values, mean {self.mean}>"
+
+    def record(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, q):
+        """An upper bound on the `q`th percentile, from 0 to 100: the bound
+        of the bucket holding it, or the maximum for the overflow bucket.
+        """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "min": self.min,
+            "max": self.max,
+            "buckets": list(zip(self.bounds + (float("inf"),), self.counts)),
+        }
+
+
+class HistogramCollector(Instrumentation):
+    """Histograms of total time, time to first byte, response size and
+    parse time for each device and endpoint, plus a count of errors.
+
+    Set `enabled` to False to stop collecting without detaching the
+    collector from its clients.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+        self.errors = {}
+
+    def __repr__(self):
+        return f"<HistogramCollector: {len(self.histograms)} histograms>"
+
+    def histogram(self, device, endpoint, metric):
+        key = (device, endpoint, metric)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            bounds = SIZE_BOUNDS if metric == "bytes" else LATENCY_BOUNDS
+            histogram = self.histograms[key] = Histogram(bounds)
+        return histogram
+
+    def after_request(self, roku, record):
+        if not self.enabled:
+            return
+        device = f"{record.host}:{record.port}"
+        name = endpoint(record.path)
+        if record.error is not None:
+            key = (device, name)
+            self.errors[key] = self.errors.get(key, 0) + 1
+            return
+        for metric, value in (
+            ("total_time", record.total_time),
+            ("first_byte_time", record.first_byte_time),
+            ("bytes", record.bytes),
+        ):
+            if value is not None:
+                self.histogram(device, name, metric).record(value)
+
+    def after_parse(self, roku, record):
+        if not self.enabled:
+            return
+        device = f"{record.host}:{record.port}"
+        self.histogram(device, endpoint(record.path), "parse_time").record(record.time)
+
+    def snapshot(self):
+        """Every histogram as a flat list of dicts for export."""
+        return [
+            dict(device=device, endpoint=name, metric=metric, **histogram.as_dict())
+            for (device, name, metric), histogram in sorted(self.histograms.items())
+        ]
+
+    def reset(self):
+        self.histograms.clear()
+        self.errors.clear()
+
+
+def timed_parse(roku, path, parse, content):
+    """Call `parse(content)`, reporting the time taken to the client's
+    instrumentation, if it has any.
+    """
+    instrumentation = roku.instrumentation
+    if instrumentation is None:
+        return parse(content)
+    start = clock()
+    result = parse(content)
+    instrumentation.after_parse(
+        roku, ParseRecord(roku.host, roku.port, path, len(content), clock() - start)
+    )
+    return result
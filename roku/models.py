@@ -1,8 +1,25 @@
+import time
+from collections import namedtuple
+
+
 class RokuException(Exception):
     pass
 
 
+KeyFailure = namedtuple("KeyFailure", ["index", "char", "error"])
+
+
+class TextEntryResult(namedtuple("TextEntryResult", ["text", "sent", "failures"])):
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return not self.failures and self.sent == len(self.text)
+
+
 class Application(object):
+    __slots__ = ("id", "version", "name", "is_screensaver", "roku")
+
     def __init__(self, id, version, name, roku=None, is_screensaver=False):
         self.id = str(id)
         self.version = version
@@ -16,6 +33,9 @@ class Application(object):
             other.version,
         )
 
+    def __hash__(self):
+        return hash((self.id, self.version))
+
     def __repr__(self):
         return f"<Application: [{self.id}] {self.name} v{self.version}>"
 
@@ -39,6 +59,8 @@ class Application(object):
 
 
 class Channel(object):
+    __slots__ = ("number", "name", "roku")
+
     def __init__(self, number, name, roku=None):
         self.number = str(number)
         self.name = name
@@ -50,6 +72,9 @@ class Channel(object):
             other.name,
         )
 
+    def __hash__(self):
+        return hash((self.number, self.name))
+
     def __repr__(self):
         return f"<Channel: [{self.number}] {self.name}>"
 
@@ -62,6 +87,15 @@ class Channel(object):
 
 
 class DeviceInfo(object):
+    __slots__ = (
+        "model_name",
+        "model_num",
+        "software_version",
+        "serial_num",
+        "user_device_name",
+        "roku_type",
+    )
+
     def __init__(
         self,
         model_name,
@@ -87,6 +121,8 @@ class DeviceInfo(object):
 
 
 class MediaPlayer(object):
+    __slots__ = ("state", "app", "position", "duration")
+
     def __init__(self, state, app, position, duration):
         self.state = state
         self.app = app
@@ -96,7 +132,115 @@ class MediaPlayer(object):
     def __repr__(self):
         return "<MediaPlayer: %s in %s at %s/%s ms>" % (
             self.state,
-            self.app.name,
+            self.app.name if self.app is not None else None,
             self.position,
             self.duration,
         )
+
+
+class DeviceInfoSnapshot(object):
+    """Every field of a single /query/device-info response.
+
+    The document is parsed the first time a field is read. Fields are
+    available by their XML tag, `snapshot["power-mode"]`, or as attributes
+    with underscores in place of hyphens, `snapshot.power_mode`.
+    """
+
+    def __init__(self, content, fetched_at=None, clock=time.monotonic):
+        self.content = content
+        self.clock = clock
+        self.fetched_at = clock() if fetched_at is None else fetched_at
+        self._fields = None
+
+    def __repr__(self):
+        return f"<DeviceInfoSnapshot: {self.get('serial-number')}, {self.age:.1f}s old>"
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        key = name.replace("_", "-")
+        if key in self.fields:
+            return self.fields[key]
+        raise AttributeError(f"device info has no field {key}")
+
+    def __getitem__(self, key):
+        return self.fields[key]
+
+    def __contains__(self, key):
+        return key in self.fields
+
+    def __dir__(self):
+        return sorted(
+            dir(type(self))
+            + list(self.__dict__.keys())
+            + [key.replace("-", "_") for key in self.fields]
+        )
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            from .util import deserialize_device_info
+
+            self._fields = deserialize_device_info(self.content)
+        return self._fields
+
+    def get(self, key, default=None):
+        return self.fields.get(key, default)
+
+    def flag(self, key):
+        return self.fields.get(key) == "true"
+
+    @property
+    def age(self):
+        return self.clock() - self.fetched_at
+
+    def is_stale(self, max_age):
+        return self.age >= max_age
+
+    @property
+    def is_tv(self):
+        return self.flag("is-tv")
+
+    @property
+    def is_stick(self):
+        return self.flag("is-stick")
+
+    @property
+    def roku_type(self):
+        if self.is_tv:
+            return "TV"
+        elif self.is_stick:
+            return "Stick"
+        return "Box"
+
+    @property
+    def power_state(self):
+        power_mode = self.get("power-mode")
+        if power_mode:
+            if power_mode == "PowerOn":
+                return "On"
+            else:
+                return "Off"
+        return "Unknown"
+
+    @property
+    def features(self):
+        """Names of the supports-* flags that are enabled."""
+        return sorted(
+            key.removeprefix("supports-")
+            for key, value in self.fields.items()
+            if key.startswith("supports-") and value == "true"
+        )
+
+    def supports(self, feature):
+        return self.flag(f"supports-{feature}")
+
+    def to_device_info(self):
+        return DeviceInfo(
+            model_name=self.get("model-name"),
+            model_num=self.get("model-number"),
+            software_version=f"{self.get('software-version')}.{self.get('software-build')}",
+            serial_num=self.get("serial-number"),
+            user_device_name=self.get("user-device-name"),
+            roku_type=self.roku_type,
+        )
@@ -0,0 +1,190 @@
+"""
+The ECP protocol, independent of any client or HTTP library.
+
+Every command and query is described here as the requests it needs and,
+for queries, the function that turns the response body into models. The
+Roku and AsyncRoku clients only move bytes; anything else that can send a
+Request and hand back the body can use the protocol the same way:
+
+    query = protocol.MEDIA_PLAYER
+    player = query.parse(send(query.request))
+"""
+
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+from urllib.parse import quote_plus
+
+from .constants import COMMANDS, SENSORS
+from .models import Application, DeviceInfoSnapshot, MediaPlayer
+from .util import deserialize_apps, deserialize_channels
+
+Request = namedtuple("Request", ["method", "path", "params"])
+
+# A query's request and the function that parses its response. Parsers are
+# called as parse(content, roku=None); the client, if given, is attached
+# to the models that are returned.
+Query = namedtuple("Query", ["request", "parse"])
+
+# Lightweight states for polling, without the models' client references
+AppState = namedtuple("AppState", ["id", "name", "is_screensaver"])
+PlayerState = namedtuple("PlayerState", ["state", "app_id", "position", "duration"])
+
+STORE_APP_ID = "11"
+
+
+def is_command(name):
+    return name in COMMANDS or name in SENSORS
+
+
+def command_requests(name, *args, **kwargs):
+    """Return the requests that carry out the named command, in the order
+    they must be sent.
+    """
+    if name in SENSORS:
+        keys = [f"{name}.{axis}" for axis in ("x", "y", "z")]
+        return (Request("POST", "/input", dict(zip(keys, args))),)
+    elif name not in COMMANDS:
+        raise ValueError(f"{name} is not a valid command")
+    elif name == "literal":
+        return tuple(literal_request(char) for char in args[0])
+    elif name == "search":
+        params = {k.replace("_", "-"): v for k, v in kwargs.items()}
+        return (Request("POST", "/search/browse", params),)
+    elif len(args) > 0 and (args[0] == "keydown" or args[0] == "keyup"):
+        return (Request("POST", f"/{args[0]}/{COMMANDS[name]}", None),)
+    return (Request("POST", f"/keypress/{COMMANDS[name]}", None),)
+
+
+def literal_request(char):
+    return Request("POST", f"/keypress/{COMMANDS['literal']}_{quote_plus(char)}", None)
+
+
+def input_request(params):
+    return Request("POST", "/input", params)
+
+
+def touch_request(x, y, op="down"):
+    return input_request({"touch.0.x": x, "touch.0.y": y, "touch.0.op": op})
+
+
+def launch_request(app, params=None):
+    params = dict(params or {})
+    params["contentID"] = app.id
+    return Request("POST", f"/launch/{app.id}", params)
+
+
+def store_request(app):
+    return Request("POST", f"/launch/{STORE_APP_ID}", {"contentID": app.id})
+
+
+def icon_request(app):
+    return Request("GET", f"/query/icon/{app.id}", None)
+
+
+def parse_apps(content, roku=None):
+    apps = deserialize_apps(content)
+    for app in apps:
+        app.roku = roku
+    return apps
+
+
+def parse_active_app(content, roku=None):
+    apps = parse_apps(content, roku)
+    return apps[0] if apps else None
+
+
+def parse_current_app(content, roku=None):
+    """Parse /query/active-app, telling a screensaver from an app."""
+    root = ET.fromstring(content)
+    is_screensaver = True
+
+    app_node = root.find("screensaver")
+    if app_node is None:
+        app_node = root.find("app")
+        is_screensaver = False
+
+    if app_node is None:
+        return None
+
+    return Application(
+        id=app_node.get("id"),
+        version=app_node.get("version"),
+        name=app_node.text,
+        is_screensaver=is_screensaver,
+        roku=roku,
+    )
+
+
+def parse_tv_channels(content, roku=None):
+    channels = deserialize_channels(content)
+    for channel in channels:
+        channel.roku = roku
+    return channels
+
+
+def _milliseconds(node):
+    if node is None or not node.text:
+        return None
+    return int(node.text.split(" ", 1)[0])
+
+
+def parse_media_player(content, roku=None):
+    """Parse /query/media-player. The app is built from the response
+    itself, so it has the id and name of the plugin but no version.
+    """
+    root = ET.fromstring(content)
+
+    plugin = root.find("plugin")
+    app = None
+    if plugin is not None:
+        app = Application(
+            id=plugin.get("id"),
+            version=plugin.get("version"),
+            name=plugin.get("name") or plugin.text or "",
+            roku=roku,
+        )
+
+    return MediaPlayer(
+        state=root.get("state"),
+        app=app,
+        position=_milliseconds(root.find("position")),
+        duration=_milliseconds(root.find("duration")),
+    )
+
+
+def parse_app_state(content):
+    """Parse /query/active-app into an AppState, or None on the home
+    screen.
+    """
+    root = ET.fromstring(content)
+    node = root.find("screensaver")
+    is_screensaver = node is not None
+    if node is None:
+        node = root.find("app")
+    if node is None:
+        return None
+    return AppState(node.get("id"), node.text, is_screensaver)
+
+
+def parse_player_state(content):
+    """Parse /query/media-player into a PlayerState."""
+    root = ET.fromstring(content)
+    plugin = root.find("plugin")
+    return PlayerState(
+        root.get("state"),
+        None if plugin is None else plugin.get("id"),
+        _milliseconds(root.find("position")),
+        _milliseconds(root.find("duration")),
+    )
+
+
+def parse_device_info(content, roku=None):
+    return DeviceInfoSnapshot(content)
+
+
+APPS = Query(Request("GET", "/query/apps", None), parse_apps)
+ACTIVE_APP = Query(Request("GET", "/query/active-app", None), parse_active_app)
+CURRENT_APP = Query(Request("GET", "/query/active-app", None), parse_current_app)
+TV_CHANNELS = Query(Request("GET", "/query/tv-channels", None), parse_tv_channels)
+MEDIA_PLAYER = Query(Request("GET", "/query/media-player", None), parse_media_player)
+DEVICE_INFO = Query(Request("GET", "/query/device-info", None), parse_device_info)
@@ -1,3 +1,150 @@
+"""
+A caching ECP reverse proxy that shields a device from many clients.
+
+Requires the `async` extra. Identical GETs that arrive while a request for
+the same path is in flight share its response, /query responses are cached
+for a per-path TTL and icons are stored by content hash. Commands are
+forwarded one at a time, in the order they arrive.
+"""
+
+import asyncio
+import hashlib
+
+import aiohttp
+from aiohttp import web
+
+from .cache import ResponseCache
+from .resolver import url_host
+
+ICON_PREFIX = "/query/icon/"
+STORE_PATH = "/launch/11"
+POWER_KEYS = {"Power": "power", "PowerOff": "poweroff", "PowerOn": "poweron"}
+
+
 class Proxy(object):
-    def __init__(self, remote_host, remote_port=8060, local_port=8060):
-        pass
+    def __init__(
+        self,
+        remote_host,
+        remote_port=8060,
+        local_port=8060,
+        local_host="127.0.0.1",
+        ttls=None,
+        timeout=10,
+    ):
+        self.remote_host = remote_host
+        self.remote_port = remote_port
+        self.local_host = local_host
+        self.local_port = local_port
+        self.timeout = timeout
+        self.cache = ResponseCache(ttls)
+        self.upstream_requests = 0
+        self._icons = {}
+        self._inflight = {}
+        self._commands = asyncio.Lock()
+        self._session = None
+        self._runner = None
+
+    def __repr__(self):
+        return (
+            f"<Proxy: {self.local_host}:{self.local_port} -> "
+            f"{self.remote_host}:{self.remote_port}>"
+        )
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    @property
+    def url(self):
+        return f"http://{url_host(self.local_host)}:{self.local_port}"
+
+    async def start(self):
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit_per_host=2),
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.local_host, self.local_port)
+        await site.start()
+        if self.local_port == 0:
+            self.local_port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def handle(self, request):
+        try:
+            if request.method == "GET":
+                status, content_type, body = await self._get(request.path_qs)
+            elif request.method == "POST":
+                status, content_type, body = await self._post(
+                    request.path_qs, await request.read()
+                )
+            else:
+                raise web.HTTPMethodNotAllowed(request.method, ["GET", "POST"])
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+            raise web.HTTPBadGateway(text=str(exc))
+
+        headers = {}
+        if request.path.startswith(ICON_PREFIX) and status == 200:
+            etag = f'"{hashlib.sha256(body).hexdigest()}"'
+            headers["ETag"] = etag
+            if request.headers.get("If-None-Match") == etag:
+                return web.Response(status=304, headers=headers)
+        return web.Response(
+            status=status, body=body, content_type=content_type, headers=headers
+        )
+
+    async def _upstream(self, method, path, data=None):
+        self.upstream_requests += 1
+        url = f"http://{url_host(self.remote_host)}:{self.remote_port}{path}"
+        async with self._session.request(method, url, data=data) as resp:
+            return resp.status, resp.content_type, await resp.read()
+
+    async def _get(self, path):
+        cached = self.cache.get(path)
+        if cached is not None:
+            if path.startswith(ICON_PREFIX):
+                return self._icons[cached]
+            return cached
+
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch(path))
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        return await asyncio.shield(future)
+
+    async def _fetch(self, path):
+        response = await self._upstream("GET", path)
+        if 200 <= response[0] <= 299:
+            if path.startswith(ICON_PREFIX):
+                digest = hashlib.sha256(response[2]).hexdigest()
+                response = self._icons.setdefault(digest, response)
+                self.cache.set(path, digest)
+            else:
+                self.cache.set(path, response)
+        return response
+
+    async def _post(self, path, data):
+        async with self._commands:
+            response = await self._upstream("POST", path, data=data or None)
+        route = path.split("?", 1)[0]
+        if route == STORE_PATH:
+            self.cache.invalidate_for("store")
+        elif route.startswith("/launch/"):
+            self.cache.invalidate_for("launch")
+        elif route.rsplit("/", 1)[-1] in POWER_KEYS:
+            self.cache.invalidate_for(POWER_KEYS[route.rsplit("/", 1)[-1]])
+        return response
@@ -0,0 +1,96 @@
+"""
+Host name resolution shared by every client.
+
+Clients send requests to a device's IP address rather than its host name.
+Names are resolved the first time a request is made, not when the client is
+created, and the result is cached for `ttl` seconds. The async client
+resolves on the event loop's resolver so it never blocks the loop. Literal
+IPv4 and IPv6 addresses are used as they are.
+"""
+
+import ipaddress
+import socket
+import time
+
+
+def is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def url_host(address):
+    """The host part of a URL for `address`, in brackets for IPv6."""
+    return f"[{address}]" if ":" in address else address
+
+
+class Resolver(object):
+    """A cache of host name to address lookups.
+
+    Lookups return the first IPv4 address the system resolver returns, or
+    its first IPv6 address if there is none, since devices do not always
+    listen on IPv6. Pass `family` to limit lookups to socket.AF_INET or
+    socket.AF_INET6.
+    """
+
+    def __init__(self, ttl=300, family=socket.AF_UNSPEC, clock=time.monotonic):
+        self.ttl = ttl
+        self.family = family
+        self.clock = clock
+        self.lookups = 0
+        self._entries = {}
+
+    def __repr__(self):
+        return f"<Resolver: {len(self._entries)} hosts, ttl {self.ttl}s>"
+
+    def cached(self, host):
+        """The address of `host` if it is known without a lookup."""
+        entry = self._entries.get(host)
+        if entry is not None and (entry[1] is None or entry[1] > self.clock()):
+            return entry[0]
+        if is_ip(host):
+            self._entries[host] = (host, None)
+            return host
+        return None
+
+    def _store(self, host, infos):
+        self.lookups += 1
+        info = next((i for i in infos if i[0] == socket.AF_INET), infos[0])
+        address = info[4][0]
+        self._entries[host] = (address, self.clock() + self.ttl)
+        return address
+
+    def resolve(self, host):
+        address = self.cached(host)
+        if address is None:
+            infos = socket.getaddrinfo(
+                host, None, family=self.family, type=socket.SOCK_STREAM
+            )
+            address = self._store(host, infos)
+        return address
+
+    async def async_resolve(self, host):
+        # asyncio is already loaded by any caller, but importing it here
+        # keeps it out of the blocking client's import time
+        import asyncio
+
+        address = self.cached(host)
+        if address is None:
+            loop = asyncio.get_running_loop()
+            infos = await loop.getaddrinfo(
+                host, None, family=self.family, type=socket.SOCK_STREAM
+            )
+            address = self._store(host, infos)
+        return address
+
+    def invalidate(self, host=None):
+        """Forget the address of `host`, or of every host."""
+        if host is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(host, None)
+
+
+default_resolver = Resolver()
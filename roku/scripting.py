@@ -1,16 +1,93 @@
 import asyncio
+import hashlib
 import logging
 import os
 import re
+import statistics
 import time
 from collections import namedtuple
 
+from .cache import INVALIDATIONS
+from .protocol import command_requests, is_command
+
 SCRIPT_RE = re.compile(
     r"(?P<command>\w+)(?:\:(?P<param>[\w\s]+))?(?:\@(?P<count>\d+))?(?:\*(?P<sleep>[\d\.]+))?"
 )  # noqa
 
 Command = namedtuple("Command", ["command", "param", "count", "sleep"])
 
+Step = namedtuple("Step", ["command", "requests", "count", "sleep", "invalidates"])
+
+Timing = namedtuple(
+    "Timing", ["index", "command", "deadline", "started", "lateness", "elapsed"]
+)
+
+DeviceRun = namedtuple("DeviceRun", ["host", "port", "stats", "error"])
+
+# Nodes of a program parsed by parse_program. Call is a command; its
+# requests are resolved at parse time unless its param uses variables.
+Call = namedtuple("Call", ["command", "param", "count", "sleep", "requests"])
+Set = namedtuple("Set", ["name", "value"])
+Repeat = namedtuple("Repeat", ["count", "body"])
+WaitFor = namedtuple("WaitFor", ["subject", "op", "value", "timeout", "interval"])
+Sleep = namedtuple("Sleep", ["seconds"])
+
+CALL_RE = re.compile(
+    r"^(?P<command>\w+)(?:\:(?P<param>[^@*]+?))?(?:\@(?P<count>\d+|\$\{?\w+\}?))?"
+    r"(?:\*(?P<sleep>[\d\.]+))?$"
+)
+SET_RE = re.compile(r"^set\s+(?P<name>\w+)\s*=\s*(?P<value>.*)$")
+REPEAT_RE = re.compile(r"^repeat\s+(?P<count>\d+|\$\{?\w+\}?)\s*\{$")
+WAIT_FOR_RE = re.compile(
+    r"^wait_for\s+(?P<subject>\w+)\s*(?P<op>==|!=)\s*(?P<value>.+?)"
+    r"(?:\s+timeout\s+(?P<timeout>[\d\.]+))?(?:\s+every\s+(?P<interval>[\d\.]+))?$"
+)
+SLEEP_RE = re.compile(r"^sleep\s+(?P<seconds>[\d\.]+)$")
+VARIABLE_RE = re.compile(r"\$(?:\{(\w+)\}|(\w+))")
+
+WAIT_SUBJECTS = ("active_app", "power_state")
+
+# commands that send nothing sensible without a param
+REQUIRES_PARAM = ("literal",)
+
+
+class ScriptError(ValueError):
+    pass
+
+
+class ScriptTimeout(ScriptError):
+    pass
+
+
+class Plan(object):
+    """A validated script with every command resolved to its requests."""
+
+    __slots__ = ("steps",)
+
+    def __init__(self, steps):
+        self.steps = tuple(steps)
+
+    def __repr__(self):
+        return f"<Plan: {len(self)} steps, {self.duration:.1f}s>"
+
+    def __len__(self):
+        return sum(step.count for step in self.steps)
+
+    def __iter__(self):
+        for step in self.steps:
+            for _ in range(step.count):
+                yield step
+
+    @property
+    def duration(self):
+        """Seconds spent sleeping between steps, excluding request time."""
+        return sum(step.count * step.sleep for step in self.steps)
+
+    @property
+    def request_count(self):
+        return sum(step.count * len(step.requests) for step in self.steps)
+
+
 logger = logging.getLogger("roku.scripting")
 
 
@@ -64,3 +141,514 @@ async def async_run_script(roku, script, sleep=0.5):
                 else:
                     await func()
                 await asyncio.sleep(cmd.sleep or sleep)
+
+
+def compile_script(script, sleep=0.5):
+    """Validate a parsed script and resolve each command to the requests it
+    sends, raising ScriptError for unknown commands or missing params
+    before anything runs.
+    """
+    steps = []
+    for lineno, cmd in enumerate(script, 1):
+        if not is_command(cmd.command):
+            raise ScriptError(f"step {lineno}: {cmd.command} is not a valid command")
+        if cmd.command in REQUIRES_PARAM and not cmd.param:
+            raise ScriptError(f"step {lineno}: {cmd.command} requires a param")
+        args = (cmd.param,) if cmd.param else ()
+        requests = command_requests(cmd.command, *args)
+        delay = sleep if cmd.sleep is None else cmd.sleep
+        steps.append(
+            Step(
+                cmd.command,
+                requests,
+                cmd.count or 1,
+                delay,
+                cmd.command in INVALIDATIONS,
+            )
+        )
+    return Plan(steps)
+
+
+def run_plan(roku, plan):
+    send = roku._send
+    for step in plan:
+        for request in step.requests:
+            send(request)
+        if step.invalidates:
+            roku._invalidate(step.command)
+        time.sleep(step.sleep)
+
+
+async def async_run_plan(roku, plan):
+    send = roku._send
+    for step in plan:
+        for request in step.requests:
+            await send(request)
+        if step.invalidates:
+            roku._invalidate(step.command)
+        await asyncio.sleep(step.sleep)
+
+
+class ScheduleStats(object):
+    """Per-step timings from a scheduled run. Lateness is how long after its
+    deadline a step was sent and elapsed is how long the device took to
+    acknowledge it, both in seconds.
+    """
+
+    def __init__(self, timings):
+        self.timings = list(timings)
+
+    def __repr__(self):
+        return (
+            f"<ScheduleStats: {self.count} steps, "
+            f"mean lateness {self.mean_lateness * 1000:.2f}ms, "
+            f"jitter {self.jitter * 1000:.2f}ms>"
+        )
+
+    @property
+    def count(self):
+        return len(self.timings)
+
+    @property
+    def mean_lateness(self):
+        if not self.timings:
+            return 0.0
+        return statistics.fmean(t.lateness for t in self.timings)
+
+    @property
+    def max_lateness(self):
+        return max((t.lateness for t in self.timings), default=0.0)
+
+    @property
+    def jitter(self):
+        """Standard deviation of lateness."""
+        if len(self.timings) < 2:
+            return 0.0
+        return statistics.pstdev(t.lateness for t in self.timings)
+
+    @property
+    def mean_elapsed(self):
+        if not self.timings:
+            return 0.0
+        return statistics.fmean(t.elapsed for t in self.timings)
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "mean_lateness": self.mean_lateness,
+            "max_lateness": self.max_lateness,
+            "jitter": self.jitter,
+            "mean_elapsed": self.mean_elapsed,
+        }
+
+
+def run_scheduled(roku, plan, max_rate=False, clock=time.monotonic):
+    """Run a plan with each step sent at a fixed offset from the start.
+
+    Unlike run_plan, which sleeps after each request, deadlines do not move
+    when the device is slow, so request latency does not accumulate as
+    drift. With `max_rate` the sleeps are ignored and each step is sent as
+    soon as the previous one is acknowledged.
+    """
+    send = roku._send
+    timings = []
+    deadline = clock()
+    for index, step in enumerate(plan):
+        now = clock()
+        if not max_rate and deadline > now:
+            time.sleep(deadline - now)
+        started = clock()
+        if max_rate:
+            deadline = started
+        for request in step.requests:
+            send(request)
+        if step.invalidates:
+            roku._invalidate(step.command)
+        finished = clock()
+        timings.append(
+            Timing(
+                index,
+                step.command,
+                deadline,
+                started,
+                started - deadline,
+                finished - started,
+            )
+        )
+        deadline += step.sleep
+    return ScheduleStats(timings)
+
+
+async def async_run_scheduled(roku, plan, max_rate=False, timings=None):
+    """The async equivalent of run_scheduled, timed with the event loop's
+    monotonic clock.
+    """
+    loop = asyncio.get_running_loop()
+    send = roku._send
+    timings = [] if timings is None else timings
+    deadline = loop.time()
+    for index, step in enumerate(plan):
+        now = loop.time()
+        if not max_rate and deadline > now:
+            await asyncio.sleep(deadline - now)
+        started = loop.time()
+        if max_rate:
+            deadline = started
+        for request in step.requests:
+            await send(request)
+        if step.invalidates:
+            roku._invalidate(step.command)
+        finished = loop.time()
+        timings.append(
+            Timing(
+                index,
+                step.command,
+                deadline,
+                started,
+                started - deadline,
+                finished - started,
+            )
+        )
+        deadline += step.sleep
+    return ScheduleStats(timings)
+
+
+async def async_run_many(
+    rokus, script, sleep=0.5, lockstep=False, max_rate=False, port=8060, pool=None
+):
+    """Run one script on many devices concurrently under a single event loop.
+
+    `rokus` may mix AsyncRoku instances, host names and (host, port)
+    tuples; clients created for hosts share one connection pool and are
+    closed afterwards. `script`
+    is a parsed script or a compiled Plan.
+
+    Devices run freely by default, each keeping its own schedule. With
+    `lockstep`, every device sends a step before any device moves on to the
+    next, and steps start on a shared schedule. A device that fails stops
+    running but does not affect the others. Cancelling the calling task
+    cancels every device.
+
+    Returns a DeviceRun with timing stats or the error for each device, in
+    the order the devices were given.
+    """
+    from ._async.core import AsyncRoku
+    from ._async.session import SessionPool
+
+    plan = script if isinstance(script, Plan) else compile_script(script, sleep)
+
+    owned_pool = None
+    if pool is None and not all(isinstance(r, AsyncRoku) for r in rokus):
+        pool = owned_pool = SessionPool(limit=max(len(rokus), 1))
+    clients = []
+    for r in rokus:
+        if isinstance(r, AsyncRoku):
+            clients.append(r)
+        elif isinstance(r, tuple):
+            clients.append(AsyncRoku(r[0], port=r[1], pool=pool))
+        else:
+            clients.append(AsyncRoku(r, port=port, pool=pool))
+    timings = [[] for _ in clients]
+    errors = [None] * len(clients)
+
+    async def _free(i, roku):
+        try:
+            await async_run_scheduled(roku, plan, max_rate, timings[i])
+        except Exception as exc:
+            errors[i] = exc
+
+    try:
+        if lockstep:
+            await _lockstep(clients, plan, max_rate, timings, errors)
+        else:
+            await asyncio.gather(*(_free(i, r) for i, r in enumerate(clients)))
+    finally:
+        for roku, given in zip(clients, rokus):
+            if roku is not given:
+                await roku.close()
+        if owned_pool is not None:
+            await owned_pool.close()
+
+    return [
+        DeviceRun(roku.host, roku.port, ScheduleStats(timings[i]), errors[i])
+        for i, roku in enumerate(clients)
+    ]
+
+
+async def _lockstep(clients, plan, max_rate, timings, errors):
+    loop = asyncio.get_running_loop()
+
+    async def _step(i, roku, index, step, deadline):
+        started = loop.time()
+        try:
+            for request in step.requests:
+                await roku._send(request)
+            if step.invalidates:
+                roku._invalidate(step.command)
+        except Exception as exc:
+            errors[i] = exc
+            return
+        finished = loop.time()
+        timings[i].append(
+            Timing(
+                index,
+                step.command,
+                deadline,
+                started,
+                started - deadline,
+                finished - started,
+            )
+        )
+
+    deadline = loop.time()
+    for index, step in enumerate(plan):
+        now = loop.time()
+        if not max_rate and deadline > now:
+            await asyncio.sleep(deadline - now)
+        if max_rate:
+            deadline = loop.time()
+        running = [
+            _step(i, roku, index, step, deadline)
+            for i, roku in enumerate(clients)
+            if errors[i] is None
+        ]
+        if not running:
+            break
+        await asyncio.gather(*running)
+        deadline += step.sleep
+
+
+def parse_program(text):
+    """Parse a script into a tree of nodes, raising ScriptError with the
+    line number for anything that is not valid.
+
+    Beyond the `command:param@count*sleep` lines of parse_script, programs
+    support comments starting with #, `set name = value`, `$name` or
+    `${name}` substitution, `repeat N {` ... `}` blocks, `sleep N`,
+    `launch:<app name or id>` and `wait_for active_app == <name or id>`,
+    optionally followed by `timeout N` and `every N` in seconds.
+    """
+    stack = [[]]
+    opened = []
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        if line == "}":
+            if len(stack) == 1:
+                raise ScriptError(f"line {lineno}: unexpected }}")
+            body = stack.pop()
+            opened.pop()
+            count = stack[-1].pop()
+            stack[-1].append(Repeat(count, tuple(body)))
+            continue
+
+        m = REPEAT_RE.match(line)
+        if m:
+            stack[-1].append(m.group("count"))
+            stack.append([])
+            opened.append(lineno)
+            continue
+
+        stack[-1].append(_parse_statement(line, lineno))
+
+    if len(stack) > 1:
+        raise ScriptError(f"line {opened[-1]}: unclosed repeat block")
+    return tuple(stack[0])
+
+
+def _parse_statement(line, lineno):
+    m = SET_RE.match(line)
+    if m:
+        return Set(m.group("name"), m.group("value").strip())
+
+    m = SLEEP_RE.match(line)
+    if m:
+        return Sleep(float(m.group("seconds")))
+
+    m = WAIT_FOR_RE.match(line)
+    if m:
+        if m.group("subject") not in WAIT_SUBJECTS:
+            raise ScriptError(f"line {lineno}: cannot wait for {m.group('subject')}")
+        return WaitFor(
+            m.group("subject"),
+            m.group("op"),
+            m.group("value").strip(),
+            float(m.group("timeout") or 10),
+            float(m.group("interval") or 0.25),
+        )
+
+    m = CALL_RE.match(line)
+    if m:
+        command, param = m.group("command"), m.group("param")
+        if command != "launch" and not is_command(command):
+            raise ScriptError(f"line {lineno}: {command} is not a valid command")
+        if command == "launch" and not param:
+            raise ScriptError(f"line {lineno}: launch requires an app")
+        if command in REQUIRES_PARAM and not param:
+            raise ScriptError(f"line {lineno}: {command} requires a param")
+        requests = None
+        if command != "launch" and not (param and VARIABLE_RE.search(param)):
+            requests = command_requests(command, *((param,) if param else ()))
+        return Call(
+            command,
+            param,
+            m.group("count") or "1",
+            float(m.group("sleep")) if m.group("sleep") else None,
+            requests,
+        )
+
+    raise ScriptError(f"line {lineno}: cannot parse {line!r}")
+
+
+_programs = {}
+
+
+def load_program(path):
+    """Load and parse a program, reusing the parsed tree while the file is
+    unchanged. Files are re-read only when their size or modification time
+    changes, and reparsed only when their content does.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise ValueError(f"script at {path} not found")
+    key = os.path.abspath(path)
+    cached = _programs.get(key)
+    if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+        return cached[2]
+
+    with open(path, "rb") as infile:
+        content = infile.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if cached is not None and cached[1] == digest:
+        program = cached[2]
+    else:
+        program = parse_program(content.decode("utf-8"))
+    _programs[key] = ((stat.st_mtime_ns, stat.st_size), digest, program)
+    return program
+
+
+def _substitute(value, env):
+    def _replace(m):
+        name = m.group(1) or m.group(2)
+        if name not in env:
+            raise ScriptError(f"variable {name} is not set")
+        return str(env[name])
+
+    return VARIABLE_RE.sub(_replace, value)
+
+
+def _matches(state, node):
+    if node.subject == "active_app":
+        matched = state is not None and node.value in (state.name, state.id)
+    else:
+        matched = state == node.value
+    return matched if node.op == "==" else not matched
+
+
+def _call_requests(node, env):
+    if node.requests is not None:
+        return node.requests
+    param = _substitute(node.param, env)
+    return command_requests(node.command, param)
+
+
+def run_program(roku, program, variables=None, sleep=0.5):
+    """Run a program from parse_program or load_program on a Roku.
+    `variables` sets initial values for `$name` substitutions.
+    """
+    _run_nodes(roku, program, dict(variables or {}), sleep)
+
+
+def _run_nodes(roku, nodes, env, sleep):
+    for node in nodes:
+        logger.debug(node)
+        if isinstance(node, Set):
+            env[node.name] = _substitute(node.value, env)
+        elif isinstance(node, Repeat):
+            for _ in range(int(_substitute(node.count, env))):
+                _run_nodes(roku, node.body, env, sleep)
+        elif isinstance(node, Sleep):
+            time.sleep(node.seconds)
+        elif isinstance(node, WaitFor):
+            _wait_for(roku, node, env)
+        else:
+            for _ in range(int(_substitute(node.count, env))):
+                if node.command == "launch":
+                    app = roku[_substitute(node.param, env)]
+                    if app is None:
+                        raise ScriptError(f"app {node.param} is not installed")
+                    roku.launch(app)
+                else:
+                    for request in _call_requests(node, env):
+                        roku._send(request)
+                    roku._invalidate(node.command)
+                time.sleep(sleep if node.sleep is None else node.sleep)
+
+
+def _wait_for(roku, node, env):
+    node = node._replace(value=_substitute(node.value, env))
+    deadline = time.monotonic() + node.timeout
+    while True:
+        if node.subject == "active_app":
+            state = roku.current_app
+        else:
+            state = roku.power_state
+        if _matches(state, node):
+            return
+        if time.monotonic() >= deadline:
+            raise ScriptTimeout(
+                f"{node.subject} {node.op} {node.value} not met in {node.timeout}s"
+            )
+        time.sleep(node.interval)
+
+
+async def async_run_program(roku, program, variables=None, sleep=0.5):
+    """The async equivalent of run_program."""
+    await _async_run_nodes(roku, program, dict(variables or {}), sleep)
+
+
+async def _async_run_nodes(roku, nodes, env, sleep):
+    for node in nodes:
+        logger.debug(node)
+        if isinstance(node, Set):
+            env[node.name] = _substitute(node.value, env)
+        elif isinstance(node, Repeat):
+            for _ in range(int(_substitute(node.count, env))):
+                await _async_run_nodes(roku, node.body, env, sleep)
+        elif isinstance(node, Sleep):
+            await asyncio.sleep(node.seconds)
+        elif isinstance(node, WaitFor):
+            await _async_wait_for(roku, node, env)
+        else:
+            for _ in range(int(_substitute(node.count, env))):
+                if node.command == "launch":
+                    app = await roku.get_app(_substitute(node.param, env))
+                    if app is None:
+                        raise ScriptError(f"app {node.param} is not installed")
+                    await roku.launch(app)
+                else:
+                    for request in _call_requests(node, env):
+                        await roku._send(request)
+                    roku._invalidate(node.command)
+                await asyncio.sleep(sleep if node.sleep is None else node.sleep)
+
+
+async def _async_wait_for(roku, node, env):
+    loop = asyncio.get_running_loop()
+    node = node._replace(value=_substitute(node.value, env))
+    deadline = loop.time() + node.timeout
+    while True:
+        if node.subject == "active_app":
+            state = await roku.get_current_app()
+        else:
+            state = await roku.get_power_state()
+        if _matches(state, node):
+            return
+        if loop.time() >= deadline:
+            raise ScriptTimeout(
+                f"{node.subject} {node.op} {node.value} not met in {node.timeout}s"
+            )
+        await asyncio.sleep(node.interval)
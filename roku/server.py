@@ -1,32 +1,48 @@
-from flask import Flask, request
-
-app = Flask(__name__)
-
-
-@app.route("/keypress/<key>")
-def keypress(key):
-    pass
-
-
-@app.route("/launch/<code>")
-def launch(code):
-    request.args.get("contentID", None)
-
-
-@app.route("/query/apps")
-def list_apps():
-    pass
-
-
-@app.route("/query/active-app")
-def active_app():
-    pass
-
-
-@app.route("/query/icon/<app_id>")
-def app_icon(app_id):
-    pass
+"""
+Run emulated Roku devices from the command line.
+
+    python -m roku.server --devices 10 --port 8060 --latency 0.02
+"""
+
+import argparse
+import asyncio
+
+from .emulator.server import EmulatorFleet
+
+
+async def serve(devices, host, port, **kwargs):
+    async with EmulatorFleet(devices, host=host, base_port=port, **kwargs) as fleet:
+        for server in fleet:
+            print(f"{server.emulator.user_device_name}: {server.url}")
+        await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run emulated Roku devices")
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8060, help="first port to use")
+    parser.add_argument("--latency", type=float, default=0, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(
+            serve(
+                args.devices,
+                args.host,
+                args.port,
+                latency=args.latency,
+                jitter=args.jitter,
+                error_rate=args.error_rate,
+                seed=args.seed,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
 
 
 if __name__ == "__main__":
-    app.run(port=8060, debug=True)
+    main()
@@ -0,0 +1,51 @@
+"""
+Tuned requests sessions for Roku.
+
+A single session can be shared by any number of Roku instances so that
+they draw from one pool of keep-alive connections.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_session(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=0,
+    backoff_factor=0,
+    retry_commands=False,
+):
+    """Build a requests.Session with a configured connection pool.
+
+    `pool_connections` is the number of devices to keep pools for and
+    `pool_maxsize` the number of connections kept per device. Failed
+    connections are retried up to `max_retries` times, sleeping
+    `backoff_factor * 2 ** (retry - 1)` seconds between attempts.
+
+    Queries are also retried when the connection is reset, but commands are
+    only retried when `retry_commands` is set since a reset POST may already
+    have reached the device and a retry would repeat the keypress.
+    """
+    allowed_methods = {"GET", "POST"} if retry_commands else {"GET"}
+    retry = Retry(
+        total=max_retries,
+        connect=max_retries,
+        # read=False re-raises read timeouts as they are, so that without
+        # retries they surface as requests.ReadTimeout, as with a plain
+        # requests.Session
+        read=max_retries or False,
+        status=0,
+        backoff_factor=backoff_factor,
+        allowed_methods=frozenset(allowed_methods),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    return session
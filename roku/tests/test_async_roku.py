@@ -2,10 +2,12 @@ import os
 from unittest.mock import AsyncMock, patch
 from urllib.parse import quote_plus
 
-from roku._async import AsyncRoku
+import aiohttp
+
+from roku._async import AsyncRoku, SessionPool, close_pools, get_pool
 from roku.constants import COMMANDS
 from roku.discovery import SSDPResponse
-from roku.models import Application
+from roku.models import Application, RokuException
 from roku.util import serialize_apps
 
 TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -154,3 +156,85 @@ async def test_discover():
     assert rokus[0].host == "192.168.1.100"
     assert rokus[0].port == 8060
     mock_discover.assert_awaited_once()
+
+
+async def test_shared_pool():
+    async with SessionPool(limit_per_host=2) as pool:
+        first = AsyncRoku("0.0.0.0", pool=pool)
+        second = AsyncRoku("127.0.0.1", pool=pool)
+
+        session = first._connect()
+        assert second._connect() is session
+        assert session.connector.limit_per_host == 2
+
+        await first.close()
+        assert not session.closed
+
+    assert session.closed
+
+
+async def test_external_session():
+    session = aiohttp.ClientSession()
+    roku = AsyncRoku("0.0.0.0", session=session)
+    assert roku._connect() is session
+
+    await roku.close()
+    assert not session.closed
+    await session.close()
+
+
+async def test_pool_registry():
+    pool = get_pool("test", limit=10)
+    assert get_pool("test") is pool
+    session = pool.session
+
+    await close_pools()
+
+    assert session.closed
+    assert get_pool("test") is not pool
+    await close_pools()
+
+
+async def test_type_text(async_roku):
+    text = "Star gate!"
+    result = await async_roku.type_text(text)
+
+    assert result.ok
+    paths = [call[1] for call in async_roku.calls()]
+    assert paths == [f"/keypress/Lit_{quote_plus(c)}" for c in text]
+
+
+async def test_type_text_failures(async_roku):
+    async def _call(method, path, **kwargs):
+        if path.endswith("_b"):
+            raise RokuException(b"nope")
+        return b""
+
+    async_roku._call = _call
+
+    result = await async_roku.type_text("abcb")
+    assert not result.ok
+    assert [(f.index, f.char) for f in result.failures] == [(1, "b"), (3, "b")]
+
+    result = await async_roku.type_text("abc", stop_on_error=True)
+    assert result.sent == 2
+
+
+async def test_iter_apps(async_roku):
+    faux_apps = [
+        Application("11", "1.0.1", "Fauxku Channel Store"),
+        Application("22", "2.0.2", "Faux Netflix"),
+    ]
+    content = serialize_apps(faux_apps)
+
+    async def _stream(path):
+        assert path == "/query/apps"
+        yield content[:40]
+        yield content[40:]
+
+    async_roku._stream = _stream
+
+    streamed = [app async for app in async_roku.iter_apps()]
+
+    assert streamed == faux_apps
+    assert streamed[0].roku is async_roku
@@ -0,0 +1,119 @@
+from roku.cache import ResponseCache
+from roku.util import serialize_apps
+
+from .conftest import AsyncFauxku, Fauxku
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class CachedFauxku(Fauxku):
+    def __init__(self, apps, *args, **kwargs):
+        super(CachedFauxku, self).__init__(*args, **kwargs)
+        self._content = serialize_apps(apps)
+
+    def _call(self, method, path, *args, **kwargs):
+        super(CachedFauxku, self)._call(method, path, *args, **kwargs)
+        return self._content
+
+
+class AsyncCachedFauxku(AsyncFauxku):
+    def __init__(self, apps, *args, **kwargs):
+        super(AsyncCachedFauxku, self).__init__(*args, **kwargs)
+        self._content = serialize_apps(apps)
+
+    async def _call(self, method, path, **kwargs):
+        await super(AsyncCachedFauxku, self)._call(method, path, **kwargs)
+        return self._content
+
+
+def test_ttl_prefixes():
+    cache = ResponseCache({"/query/": 5, "/query/active-app": 1}, default_ttl=0)
+    assert cache.ttl_for("/query/apps") == 5
+    assert cache.ttl_for("/query/active-app") == 1
+    assert cache.ttl_for("/keypress/Home") == 0
+    assert not cache.cacheable("/keypress/Home")
+
+
+def test_expiry():
+    clock = FakeClock()
+    cache = ResponseCache({"/query/apps": 10}, clock=clock)
+
+    assert cache.get("/query/apps") is None
+    cache.set("/query/apps", b"apps")
+    assert cache.get("/query/apps") == b"apps"
+
+    clock.now = 10
+    assert cache.get("/query/apps") is None
+    assert cache.stats() == {"entries": 0, "hits": 1, "misses": 2}
+
+
+def test_invalidation():
+    cache = ResponseCache()
+    for path in ("/query/apps", "/query/active-app", "/query/device-info"):
+        cache.set(path, b"")
+
+    cache.invalidate_for("launch")
+    assert cache.get("/query/active-app") is None
+    assert cache.get("/query/apps") == b""
+
+    cache.invalidate_for("poweroff")
+    assert cache.get("/query/device-info") is None
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+
+def test_lookup_uses_one_request(apps):
+    roku = CachedFauxku(apps, "0.0.0.0", cache=True)
+
+    for app in apps:
+        assert roku[app.id] == app
+        assert roku[app.name] == app
+
+    assert len(roku.calls()) == 1
+    assert roku.cache.hits == len(apps) * 2 - 1
+
+
+def test_uncached_lookup_uses_one_request(apps):
+    roku = CachedFauxku(apps, "0.0.0.0")
+    assert roku["22"] == apps[1]
+    assert len(roku.calls()) == 1
+
+
+def test_commands_invalidate(apps):
+    roku = CachedFauxku(apps, "0.0.0.0", cache=True)
+
+    roku.active_app
+    roku.active_app
+    assert len(roku.calls()) == 1
+
+    roku.launch(roku["22"])
+    roku.active_app
+    assert roku.calls()[-1] == ("GET", "/query/active-app", (), {})
+
+    roku.apps
+    roku.store(roku["22"])
+    roku.apps
+    assert roku.calls()[-1] == ("GET", "/query/apps", (), {})
+
+    roku.home()
+    roku.apps
+    assert roku.calls()[-1] == ("POST", "/keypress/Home", (), {})
+
+
+async def test_async_cache(apps):
+    roku = AsyncCachedFauxku(apps, "0.0.0.0", cache=True)
+
+    assert (await roku.get_app("Faux Netflix")).id == "22"
+    assert (await roku.get_app(33)).name == "Faux YouTube"
+    assert len(roku.calls()) == 1
+
+    await roku.poweroff()
+    await roku.get_apps()
+    assert len(roku.calls()) == 2
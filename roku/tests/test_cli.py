@@ -0,0 +1,57 @@
+import json
+from collections import namedtuple
+
+import pytest
+from click.testing import CliRunner
+
+from roku.cli import cli
+from roku.emulator.server import BackgroundFleet
+
+Device = namedtuple("Device", ["location"])
+
+
+@pytest.fixture(scope="module")
+def fleet():
+    with BackgroundFleet(3) as fleet:
+        yield fleet
+
+
+@pytest.fixture
+def devices(fleet, mocker):
+    found = [Device(f"http://{host}:{port}/") for host, port in fleet.addresses]
+
+    async def discover_iter(*args, **kwargs):
+        for device in found:
+            yield device
+
+    mocker.patch("roku.discovery.discover", return_value=found)
+    mocker.patch("roku._async.core.discover_iter", discover_iter)
+    return found
+
+
+@pytest.mark.parametrize("flags", [[], ["--async"]])
+def test_discover_inspect_jsonl(devices, fleet, flags):
+    result = CliRunner().invoke(
+        cli, flags + ["discover", "--inspect", "--format", "jsonl", "-c", "2"]
+    )
+    assert result.exit_code == 0, result.output
+
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert sorted(r["port"] for r in records) == sorted(p for _, p in fleet.addresses)
+    assert {r["user_device_name"] for r in records} == {
+        "Emulated Roku 1",
+        "Emulated Roku 2",
+        "Emulated Roku 3",
+    }
+
+
+def test_discover_text(devices, fleet):
+    result = CliRunner().invoke(cli, ["--async", "discover", "--inspect"])
+    assert result.exit_code == 0, result.output
+    assert result.output.count("  Model:    Roku Ultra (4800X)") == 3
+
+
+def test_discover_none(mocker):
+    mocker.patch("roku.discovery.discover", return_value=[])
+    result = CliRunner().invoke(cli, ["discover"])
+    assert result.output == "No Roku devices found.\n"
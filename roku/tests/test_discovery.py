@@ -0,0 +1,194 @@
+import asyncio
+
+import pytest
+
+from roku._async import AsyncRoku
+from roku._async.discovery import _ListenerProtocol, discover, discover_iter
+from roku.discovery import DeviceRegistry, SSDPNotify
+
+
+def ssdp_response(serial, host):
+    return "\r\n".join(
+        [
+            "HTTP/1.1 200 OK",
+            "Cache-Control: max-age=3600",
+            "ST: roku:ecp",
+            f"USN: uuid:roku:ecp:{serial}",
+            f"LOCATION: http://{host}:8060/",
+            "",
+            "",
+        ]
+    ).encode()
+
+
+@pytest.fixture
+async def network(mocker):
+    """Replace the multicast socket with devices that answer each search
+    after a delay.
+    """
+    devices = []
+    searches = []
+    loop = asyncio.get_running_loop()
+
+    class FakeTransport(object):
+        def __init__(self, protocol):
+            self.protocol = protocol
+
+        def sendto(self, data, addr):
+            searches.append(loop.time())
+            for delay, payload in devices:
+                loop.call_later(delay, self.protocol.datagram_received, payload, addr)
+
+        def close(self):
+            pass
+
+    async def create_datagram_endpoint(protocol_factory, **kwargs):
+        protocol = protocol_factory()
+        transport = FakeTransport(protocol)
+        protocol.connection_made(transport)
+        return transport, protocol
+
+    mocker.patch.object(loop, "create_datagram_endpoint", create_datagram_endpoint)
+    return devices, searches
+
+
+async def test_streams_responses(network):
+    devices, _ = network
+    devices.append((0.01, ssdp_response("AAA", "192.168.1.100")))
+    devices.append((0.02, ssdp_response("BBB", "192.168.1.101")))
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    first = None
+    serials = []
+    async for response in discover_iter(timeout=2):
+        first = first or loop.time() - start
+        serials.append(response.serial)
+        if len(serials) == 2:
+            break
+
+    assert serials == ["AAA", "BBB"]
+    assert first < 0.5
+    assert loop.time() - start < 0.5
+
+
+async def test_max_devices_and_serial(network):
+    devices, _ = network
+    for i in range(5):
+        devices.append((0.01 * i, ssdp_response(f"S{i}", f"192.168.1.{100 + i}")))
+
+    found = [r async for r in discover_iter(timeout=2, max_devices=2)]
+    assert len(found) == 2
+
+    found = [r async for r in discover_iter(timeout=2, serial="S3")]
+    assert found[-1].serial == "S3"
+    assert len(found) == 4
+
+
+async def test_retries_share_window(network):
+    devices, searches = network
+    devices.append((0.01, ssdp_response("AAA", "192.168.1.100")))
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    responses = await discover(timeout=0.2, retries=3)
+
+    assert len(responses) == 1
+    assert len(searches) == 3
+    assert loop.time() - start < 0.4
+
+
+async def test_retries_must_be_positive(network):
+    devices, searches = network
+    with pytest.raises(ValueError):
+        await discover(timeout=0.2, retries=0)
+    assert len(searches) == 0
+
+
+async def test_client_discover_iter(network):
+    devices, _ = network
+    devices.append((0.01, ssdp_response("AAA", "192.168.1.100")))
+
+    rokus = [r async for r in AsyncRoku.discover_iter(timeout=2, max_devices=1)]
+
+    assert rokus[0].host == "192.168.1.100"
+
+
+def ssdp_notify(serial, host, nts="ssdp:alive", nt="roku:ecp", max_age=3600):
+    return "\r\n".join(
+        [
+            "NOTIFY * HTTP/1.1",
+            "HOST: 239.255.255.250:1900",
+            f"Cache-Control: max-age={max_age}",
+            f"NT: {nt}",
+            f"NTS: {nts}",
+            f"USN: uuid:roku:ecp:{serial}",
+            f"LOCATION: http://{host}:8060/",
+            "",
+            "",
+        ]
+    ).encode()
+
+
+class FakeClock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_parse_notify():
+    notify = SSDPNotify.parse(ssdp_notify("AAA", "192.168.1.100", max_age=60))
+    assert notify.nts == "ssdp:alive"
+    assert notify.st == "roku:ecp"
+    assert notify.serial == "AAA"
+    assert notify.max_age == 60
+    assert SSDPNotify.parse(ssdp_response("AAA", "192.168.1.100")) is None
+
+
+def test_registry_events():
+    clock = FakeClock()
+    registry = DeviceRegistry(clock=clock)
+    events = []
+    unsubscribe = registry.subscribe(lambda event, r: events.append((event, r.serial)))
+
+    registry.update(SSDPNotify.parse(ssdp_notify("AAA", "192.168.1.100", max_age=10)))
+    registry.update(SSDPNotify.parse(ssdp_notify("AAA", "192.168.1.100", max_age=10)))
+    registry.update(SSDPNotify.parse(ssdp_notify("AAA", "192.168.1.200", max_age=10)))
+    registry.update(SSDPNotify.parse(ssdp_notify("BBB", "192.168.1.101", max_age=60)))
+    assert len(registry) == 2
+
+    clock.now = 10
+    assert [d.serial for d in registry.devices] == ["BBB"]
+
+    registry.remove("uuid:roku:ecp:BBB")
+    unsubscribe()
+    registry.update(SSDPNotify.parse(ssdp_notify("CCC", "192.168.1.102")))
+
+    assert events == [
+        ("added", "AAA"),
+        ("updated", "AAA"),
+        ("added", "BBB"),
+        ("expired", "AAA"),
+        ("removed", "BBB"),
+    ]
+
+
+def test_listener_protocol():
+    registry = DeviceRegistry()
+    protocol = _ListenerProtocol(registry, "roku:ecp")
+    addr = ("192.168.1.100", 1900)
+
+    protocol.datagram_received(ssdp_notify("AAA", "192.168.1.100"), addr)
+    protocol.datagram_received(ssdp_response("BBB", "192.168.1.101"), addr)
+    protocol.datagram_received(
+        ssdp_notify("CCC", "192.168.1.102", nt="upnp:rootdevice"), addr
+    )
+    protocol.datagram_received(b"garbage", addr)
+    assert sorted(d.serial for d in registry) == ["AAA", "BBB"]
+
+    protocol.datagram_received(
+        ssdp_notify("AAA", "192.168.1.100", nts="ssdp:byebye"), addr
+    )
+    assert [d.serial for d in registry] == ["BBB"]
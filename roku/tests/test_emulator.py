@@ -0,0 +1,126 @@
+import pytest
+
+from roku import Roku, RokuException
+from roku._async import AsyncRoku
+from roku.emulator.core import Emulator
+from roku.emulator.server import BackgroundFleet, EmulatorFleet, EmulatorServer
+
+
+@pytest.fixture
+async def server():
+    async with EmulatorServer(port=0) as server:
+        yield server
+
+
+@pytest.fixture
+async def client(server):
+    async with AsyncRoku(server.host, server.port) as roku:
+        yield roku
+
+
+async def test_queries(client):
+    apps = await client.get_apps()
+    assert [app.name for app in apps][:2] == ["Hulu Plus", "TWiT"]
+
+    info = await client.get_device_info()
+    assert info.user_device_name == "Emulated Roku"
+    assert await client.get_power_state() == "On"
+
+    channels = [c async for c in client.iter_tv_channels()]
+    assert channels[0].number == "2.1"
+
+    icon = await client.icon(apps[0])
+    assert icon.startswith(b"\x89PNG")
+
+
+async def test_launch_and_play(server, client):
+    netflix = await client.get_app("Netflix")
+    await client.launch(netflix)
+
+    assert (await client.get_active_app()).name == "Netflix"
+
+    await client.play()
+    await client.forward()
+    player = await client.get_media_player()
+    assert player.state == "play"
+    assert player.app.id == "4"
+    assert player.position == 10000
+
+    await client.home()
+    assert (await client.get_active_app()).name == "Roku"
+
+
+async def test_store(server, client):
+    netflix = await client.get_app("Netflix")
+    await client.store(netflix)
+
+    assert server.emulator.history[-1] == ("launch", "11", {"contentID": "4"})
+    assert (await client.get_active_app()).name == "Roku Channel Store"
+
+
+async def test_literal_and_keys(server, client):
+    await client.literal("a b+c")
+    assert server.emulator.text == "a b+c"
+
+    await client.right("keydown")
+    await client.right("keyup")
+    await client.poweroff()
+
+    history = server.emulator.history
+    assert history[-3:] == [
+        ("keydown", "Right"),
+        ("keyup", "Right"),
+        ("keypress", "PowerOff"),
+    ]
+    assert await client.get_power_state() == "Off"
+
+
+async def test_input(server, client):
+    await client.touch(10, 20)
+    assert server.emulator.history[-1] == (
+        "input",
+        {"touch.0.x": "10", "touch.0.y": "20", "touch.0.op": "down"},
+    )
+
+
+async def test_injected_errors():
+    async with EmulatorServer(port=0, error_rate=1) as server:
+        async with AsyncRoku(server.host, server.port) as roku:
+            with pytest.raises(RokuException):
+                await roku.home()
+    assert server.requests == 1
+
+
+async def test_fleet():
+    async with EmulatorFleet(3) as fleet:
+        ports = {port for _, port in fleet.addresses}
+        assert len(ports) == 3
+        for server in fleet:
+            async with AsyncRoku(server.host, server.port) as roku:
+                info = await roku.get_device_info()
+                assert info.serial_num == server.emulator.serial_num
+
+
+def test_background_fleet():
+    with BackgroundFleet(2) as fleet:
+        for host, port in fleet.addresses:
+            roku = Roku(host, port)
+            roku.home()
+            assert roku["TWiT"].id == "2"
+
+
+def test_emulator_dispatch():
+    emulator = Emulator()
+    emulator("keypress", "Lit_x")
+    assert emulator.text == "x"
+    with pytest.raises(ValueError):
+        emulator("_apply", "Home")
+
+
+async def test_type_text_keeps_order_with_jitter():
+    text = "correct horse battery staple"
+    async with EmulatorServer(port=0, latency=0.01, jitter=0.009, seed=4) as server:
+        async with AsyncRoku(server.host, server.port) as roku:
+            result = await roku.type_text(text)
+    assert result.ok
+    assert server.emulator.text == text
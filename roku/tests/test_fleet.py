@@ -0,0 +1,153 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock
+
+import pytest
+
+from roku._async import AsyncRoku, AsyncRokuFleet
+from roku.fleet import RokuFleet
+from roku.models import Application
+from roku.util import serialize_apps
+
+from .conftest import AsyncFauxku
+
+
+class SlowFauxku(AsyncFauxku):
+    def __init__(self, *args, delay=1, **kwargs):
+        super(SlowFauxku, self).__init__(*args, **kwargs)
+        self.delay = delay
+
+    async def _call(self, method, path, **kwargs):
+        await asyncio.sleep(self.delay)
+        return await super(SlowFauxku, self)._call(method, path, **kwargs)
+
+
+def make_rokus(count):
+    return [AsyncFauxku(f"127.0.0.{i + 1}") for i in range(count)]
+
+
+async def test_broadcast_command():
+    rokus = make_rokus(5)
+    fleet = AsyncRokuFleet(rokus)
+
+    results = await fleet.home()
+
+    assert len(results) == 5
+    assert all(r.ok for r in results)
+    assert [r.host for r in results] == [r.host for r in rokus]
+    for roku in rokus:
+        assert roku.last_call() == ("POST", "/keypress/Home", (), {})
+
+
+async def test_duplicate_hosts():
+    fleet = AsyncRokuFleet(make_rokus(2) + make_rokus(2))
+    assert len(fleet) == 2
+
+
+async def test_launch():
+    rokus = make_rokus(3)
+    fleet = AsyncRokuFleet(rokus)
+
+    await fleet.launch(Application("22", "2.0.2", "Faux Netflix"))
+
+    for roku in rokus:
+        assert roku.last_call() == (
+            "POST",
+            "/launch/22",
+            (),
+            {"params": {"contentID": "22"}},
+        )
+
+
+async def test_concurrency_limit():
+    in_flight = 0
+    peak = 0
+
+    class CountingFauxku(AsyncFauxku):
+        async def _call(self, method, path, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return b""
+
+    rokus = [CountingFauxku(f"127.0.0.{i + 1}") for i in range(10)]
+    await AsyncRokuFleet(rokus, concurrency=3).home()
+
+    assert peak == 3
+
+
+async def test_runs_concurrently():
+    rokus = [SlowFauxku(f"127.0.0.{i + 1}", delay=0.1) for i in range(20)]
+    fleet = AsyncRokuFleet(rokus)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    results = await fleet.select()
+
+    assert all(r.ok for r in results)
+    assert loop.time() - start < 1
+
+
+async def test_per_device_timeout():
+    rokus = make_rokus(2) + [SlowFauxku("127.0.0.9", delay=5)]
+    fleet = AsyncRokuFleet(rokus, timeout=0.05)
+
+    results = await fleet.home()
+
+    assert [r.ok for r in results] == [True, True, False]
+    assert isinstance(results[2].error, asyncio.TimeoutError)
+
+
+async def test_deadline():
+    rokus = make_rokus(2) + [SlowFauxku("127.0.0.9", delay=5)]
+    fleet = AsyncRokuFleet(rokus, timeout=10, deadline=0.05)
+
+    results = await fleet.home()
+
+    assert [r.ok for r in results] == [True, True, False]
+    assert "deadline" in str(results[2].error)
+
+
+async def test_query(mocker):
+    faux_apps = (Application("0x", "1.2.3", "Fauxku Channel Store"),)
+    mocked_get = mocker.patch.object(AsyncRoku, "_get", new_callable=AsyncMock)
+    mocked_get.return_value = serialize_apps(faux_apps)
+
+    results = await AsyncRokuFleet(make_rokus(2)).query("get_apps")
+
+    assert [r.value for r in results] == [list(faux_apps), list(faux_apps)]
+
+
+async def test_empty_fleet():
+    assert await AsyncRokuFleet([]).home() == []
+
+
+def test_sync_fleet(mocker):
+    mocked_call = mocker.patch.object(AsyncRoku, "_call", new_callable=AsyncMock)
+    mocked_call.return_value = b""
+
+    with RokuFleet(["127.0.0.1", "127.0.0.2", "127.0.0.1"]) as fleet:
+        results = fleet.home()
+        pool = fleet._fleet.pool
+        fleet.select()
+        assert fleet._fleet.pool is pool
+
+    assert len(results) == 2
+    assert all(r.ok for r in results)
+    assert mocked_call.await_count == 4
+    assert fleet._loop is None
+
+
+def test_sync_fleet_start_failure(mocker):
+    with pytest.raises(ValueError):
+        RokuFleet(["127.0.0.1"], concurrency=0)
+
+    mocker.patch("roku._async.fleet.AsyncRokuFleet", side_effect=RuntimeError)
+    threads = threading.active_count()
+    fleet = RokuFleet(["127.0.0.1"])
+    with pytest.raises(RuntimeError):
+        fleet.home()
+    assert fleet._loop is None and fleet._thread is None
+    assert threading.active_count() == threads
@@ -0,0 +1,74 @@
+from roku import Application, Roku
+from roku._async import AsyncRoku
+from roku.emulator.server import BackgroundFleet, EmulatorFleet
+from roku.icons import IconCache
+
+
+def app(id, version="1.0"):
+    return Application(id, version, f"App {id}")
+
+
+def test_lru_byte_budget():
+    cache = IconCache(max_bytes=10)
+    cache.set(app(1), b"aaaa")
+    cache.set(app(2), b"bbbb")
+    assert cache.get(app(1)) == b"aaaa"
+
+    cache.set(app(3), b"cccc")
+    assert cache.get(app(2)) is None
+    assert cache.get(app(1)) == b"aaaa"
+    assert cache.size == 8
+    assert cache.stats() == {"entries": 2, "bytes": 8, "hits": 2, "misses": 1}
+
+
+def test_keyed_by_version():
+    cache = IconCache()
+    cache.set(app(1, "1.0"), b"old")
+    assert cache.get(app(1, "2.0")) is None
+
+    cache.set(app(1, None), b"unknown")
+    assert cache.get(app(1, None)) is None
+    assert len(cache) == 1
+
+
+def test_disk_store(tmp_path):
+    IconCache(directory=str(tmp_path)).set(app(1), b"icon")
+
+    cache = IconCache(directory=str(tmp_path))
+    assert cache.get(app(1)) == b"icon"
+    assert len(cache) == 1
+
+
+async def test_prefetch_shared_across_devices():
+    cache = IconCache()
+    async with EmulatorFleet(2) as fleet:
+        rokus = [
+            AsyncRoku(host, port=port, icon_cache=cache)
+            for host, port in fleet.addresses
+        ]
+        first = await rokus[0].prefetch_icons(concurrency=2)
+        requests = [server.requests for server in fleet]
+        second = await rokus[1].prefetch_icons()
+        for roku in rokus:
+            await roku.close()
+
+    assert len(first) == 4
+    assert all(icon.startswith(b"\x89PNG") for icon in first.values())
+    assert second == first
+    # the second device only served its app list
+    assert [server.requests for server in fleet] == [requests[0], requests[1] + 1]
+    assert cache.stats()["hits"] == 4
+
+
+def test_sync_prefetch():
+    cache = IconCache()
+    with BackgroundFleet(1) as fleet:
+        host, port = fleet.addresses[0]
+        roku = Roku(host, port=port, icon_cache=cache)
+        icons = roku.prefetch_icons(concurrency=4)
+        netflix = roku["Netflix"]
+        assert roku.icon(netflix) is icons[netflix]
+        roku.close()
+
+    assert len(icons) == 4
+    assert cache.stats()["hits"] == 1
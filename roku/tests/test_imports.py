@@ -0,0 +1,69 @@
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("requests", "urllib3", "aiohttp", "asyncio")
+
+
+def run(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout, result.stderr
+
+
+def cumulative(importtime, module):
+    """The cumulative import time of `module` in microseconds, as reported
+    by -X importtime.
+    """
+    for line in importtime.splitlines():
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            return int(parts[1])
+    raise LookupError(module)
+
+
+def loaded(code):
+    stdout, _ = run(f"{code}; import sys; print(' '.join(sys.modules))")
+    return set(stdout.split())
+
+
+def test_import_is_lazy():
+    modules = loaded("import roku")
+    assert not modules & set(HEAVY)
+    assert "roku.core" not in modules
+
+
+@pytest.mark.parametrize("name", ["Roku", "Application", "RokuException"])
+def test_blocking_client_does_not_import_http_libraries(name):
+    modules = loaded(f"from roku import {name}")
+    assert not modules & set(HEAVY)
+
+
+def test_star_import_without_aiohttp():
+    stdout, _ = run(
+        "import sys; sys.modules['aiohttp'] = None; "
+        "from roku import *; print(Roku.__name__, RokuException.__name__)"
+    )
+    assert stdout.split() == ["Roku", "RokuException"]
+
+
+def test_lazy_attributes():
+    import roku
+
+    assert roku.Roku.__module__ == "roku.core"
+    assert roku.AsyncRoku.__module__ == "roku._async.core"
+    assert "AsyncRoku" in dir(roku)
+    with pytest.raises(AttributeError):
+        roku.NotAThing
+
+
+def test_import_time():
+    _, importtime = run("import roku")
+    # generous enough for slow machines, but an eager import of requests
+    # alone takes longer than this
+    assert cumulative(importtime, "roku") < 20000
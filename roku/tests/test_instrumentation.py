@@ -0,0 +1,114 @@
+import pytest
+
+from roku import Roku, RokuException
+from roku._async import AsyncRoku
+from roku.emulator.server import BackgroundFleet, EmulatorServer
+from roku.instrumentation import (
+    Histogram,
+    HistogramCollector,
+    Instrumentation,
+    endpoint,
+)
+
+
+def test_endpoint():
+    assert endpoint("/keypress/Lit_a") == "/keypress"
+    assert endpoint("/launch/12?contentID=12") == "/launch"
+    assert endpoint("/query/icon/12") == "/query/icon"
+    assert endpoint("/query/apps") == "/query/apps"
+
+
+def test_histogram():
+    histogram = Histogram(bounds=(1, 2, 4, 8))
+    for value in (0.5, 1.5, 1.5, 3, 100):
+        histogram.record(value)
+
+    assert histogram.counts == [1, 2, 1, 0, 1]
+    assert histogram.mean == pytest.approx(106.5 / 5)
+    assert histogram.percentile(50) == 2
+    assert histogram.percentile(100) == 100
+    assert Histogram().percentile(50) is None
+
+
+class Recorder(Instrumentation):
+    def __init__(self):
+        self.events = []
+
+    def before_request(self, roku, method, path):
+        self.events.append(("before", method, path))
+
+    def after_request(self, roku, record):
+        self.events.append(("after", record))
+
+    def after_parse(self, roku, record):
+        self.events.append(("parse", record))
+
+
+def test_sync_hooks():
+    recorder = Recorder()
+    with BackgroundFleet(1) as fleet:
+        host, port = fleet.addresses[0]
+        roku = Roku(host, port=port, instrumentation=recorder)
+        roku.home()
+        apps = roku.apps
+        roku.close()
+
+    assert [event[0] for event in recorder.events] == [
+        "before",
+        "after",
+        "before",
+        "after",
+        "parse",
+    ]
+    keypress = recorder.events[1][1]
+    assert keypress.method == "POST"
+    assert keypress.path == "/keypress/Home"
+    assert keypress.status == 200
+    assert 0 <= keypress.first_byte_time <= keypress.total_time
+    query = recorder.events[3][1]
+    assert query.bytes > 0
+    parse = recorder.events[4][1]
+    assert parse.path == "/query/apps"
+    assert parse.bytes == query.bytes
+    assert len(apps) == 4
+
+
+async def test_async_collector():
+    collector = HistogramCollector()
+    async with EmulatorServer(port=0) as server:
+        async with AsyncRoku(
+            server.host, port=server.port, instrumentation=collector
+        ) as roku:
+            await roku.home()
+            await roku.right()
+            await roku.get_apps()
+            with pytest.raises(RokuException):
+                await roku._post("/launch/999")
+
+    device = f"{server.host}:{server.port}"
+    assert collector.histograms[(device, "/keypress", "total_time")].count == 2
+    assert collector.histograms[(device, "/query/apps", "bytes")].count == 1
+    assert collector.histograms[(device, "/query/apps", "parse_time")].count == 1
+    # a response with an error status is still a completed request
+    assert collector.histograms[(device, "/launch", "total_time")].count == 1
+    assert {row["metric"] for row in collector.snapshot()} == {
+        "total_time",
+        "first_byte_time",
+        "bytes",
+        "parse_time",
+    }
+
+
+async def test_collector_errors_and_disabled():
+    collector = HistogramCollector()
+    roku = AsyncRoku("127.0.0.1", port=1, timeout=1, instrumentation=collector)
+    with pytest.raises(Exception):
+        await roku.home()
+    assert collector.errors == {("127.0.0.1:1", "/keypress"): 1}
+
+    collector.enabled = False
+    with pytest.raises(Exception):
+        await roku.home()
+    await roku.close()
+    assert collector.errors == {("127.0.0.1:1", "/keypress"): 1}
+    assert collector.histograms == {}
@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+
+from roku import RokuException
+from roku._async import PipelinedConnection, PipelinedRoku
+from roku._async.pipeline import encode_request, read_response
+from roku.emulator.server import EmulatorServer
+from roku.instrumentation import HistogramCollector, Instrumentation
+from roku.models import Application
+
+OK = b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\n\r\n"
+
+
+async def serve(handler):
+    server = await asyncio.start_server(handler, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+async def read_path(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    return head.split(b" ", 2)[1].decode()
+
+
+def test_encode_request():
+    assert encode_request("POST", "/input", {"touch.0.x": 1}, "[::1]:8060") == (
+        b"POST /input?touch.0.x=1 HTTP/1.1\r\n"
+        b"Host: [::1]:8060\r\nContent-Length: 0\r\n\r\n"
+    )
+    conn = PipelinedConnection("192.168.1.100")
+    assert conn.encode("POST", "/keypress/Home") is conn.encode(
+        "POST", "/keypress/Home"
+    )
+
+
+async def test_emulator():
+    async with EmulatorServer(port=0) as server:
+        async with PipelinedRoku(server.host, port=server.port) as roku:
+            await asyncio.gather(roku.home(), roku.right(), roku.left())
+            await roku.literal("a b")
+            result = await roku.type_text("xyz")
+            app = await roku.get_app("Netflix")
+            await roku.launch(app)
+            with pytest.raises(RokuException):
+                await roku.launch(Application("404", None, "Missing"))
+            assert roku.pipeline.connections == 1
+
+    assert not result.failures
+    assert server.emulator.history[:9] == [
+        ("keypress", "Home"),
+        ("keypress", "Right"),
+        ("keypress", "Left"),
+        ("keypress", "Lit_a"),
+        ("keypress", "Lit_ "),
+        ("keypress", "Lit_b"),
+        ("keypress", "Lit_x"),
+        ("keypress", "Lit_y"),
+        ("keypress", "Lit_z"),
+    ]
+    assert server.emulator.history[9][:2] == ("launch", app.id)
+
+
+async def test_pipelining_and_responses():
+    release = asyncio.Event()
+    responses = [
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"3\r\nabc\r\n2;x=1\r\nde\r\n0\r\n\r\n",
+        b"HTTP/1.1 404 Not Found\r\ncontent-length: 4\r\n\r\nnope",
+    ] + [OK] * 4
+
+    async def handler(reader, writer):
+        for _ in range(6):
+            await read_path(reader)
+            await release.wait()
+            writer.write(responses.pop(0))
+        writer.close()
+
+    server, port = await serve(handler)
+    async with PipelinedConnection("127.0.0.1", port, max_in_flight=4) as conn:
+        futures = [conn.submit("POST", f"/keypress/{n}") for n in range(6)]
+        await asyncio.sleep(0.05)
+        assert len(conn._in_flight) == 4 and len(conn._outgoing) == 2
+
+        release.set()
+        results = await asyncio.gather(*futures)
+    server.close()
+
+    assert results[0] == (200, b"abcde")
+    assert results[1] == (404, b"nope")
+    assert results[2:] == [(200, b"")] * 4
+
+
+async def test_connection_close_resends():
+    seen = []
+
+    async def handler(reader, writer):
+        first = not seen
+        while True:
+            try:
+                seen.append(await read_path(reader))
+            except asyncio.IncompleteReadError:
+                break
+            if first:
+                await asyncio.sleep(0.01)
+                writer.write(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+                )
+                break
+            writer.write(OK)
+        writer.close()
+
+    server, port = await serve(handler)
+    async with PipelinedConnection("127.0.0.1", port) as conn:
+        results = await asyncio.gather(
+            *(conn.submit("POST", path) for path in ("/a", "/b", "/c"))
+        )
+        assert conn.connections == 2
+    server.close()
+
+    assert results == [(200, b"")] * 3
+    assert seen == ["/a", "/b", "/c"]
+
+
+async def test_timeout_fails_outstanding():
+    async def handler(reader, writer):
+        path = await read_path(reader)
+        if path == "/ok":
+            writer.write(OK)
+        await reader.read()
+        writer.close()
+
+    server, port = await serve(handler)
+    async with PipelinedConnection("127.0.0.1", port, timeout=0.05) as conn:
+        stuck = [conn.submit("POST", "/stuck") for _ in range(2)]
+        for future in stuck:
+            with pytest.raises(asyncio.TimeoutError):
+                await future
+        assert await conn.request("POST", "/ok") == (200, b"")
+        assert conn.connections == 2
+    server.close()
+
+
+async def test_instrumentation():
+    records = []
+
+    class Recorder(Instrumentation):
+        def after_request(self, roku, record):
+            records.append(record)
+
+    async with EmulatorServer(port=0) as server:
+        async with PipelinedRoku(
+            server.host, port=server.port, instrumentation=Recorder()
+        ) as roku:
+            await roku.literal("ab")
+    assert [(r.method, r.path, r.status) for r in records] == [
+        ("POST", "/keypress/Lit_a", 200),
+        ("POST", "/keypress/Lit_b", 200),
+    ]
+
+    collector = HistogramCollector()
+    async with EmulatorServer(port=0) as server:
+        async with PipelinedRoku(
+            server.host, port=server.port, instrumentation=collector
+        ) as roku:
+            await roku.literal("ab")
+    device = f"{server.host}:{server.port}"
+    metrics = {m: h.count for (d, e, m), h in collector.histograms.items()}
+    assert metrics == {"total_time": 2, "bytes": 2}
+    assert all(d == device and e == "/keypress" for d, e, m in collector.histograms)
+
+
+async def test_connect_timeout(mocker):
+    async def stall(*args, **kwargs):
+        await asyncio.sleep(10)
+
+    mocker.patch("asyncio.open_connection", stall)
+    async with PipelinedConnection("127.0.0.1", timeout=0.05) as conn:
+        future = conn.submit("POST", "/keypress/Home")
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(future, 1)
+
+
+async def test_header_forms():
+    reader = asyncio.StreamReader()
+    reader.feed_data(
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding:Chunked\r\n"
+        b"Connection: keep-alive, Close\r\n\r\n2\r\nok\r\n0\r\n\r\n"
+        b"HTTP/1.1 200 OK\r\nCONTENT-LENGTH:  3\r\n\r\nabc"
+    )
+    assert await read_response(reader) == (200, b"ok", True)
+    assert await read_response(reader) == (200, b"abc", False)
+
+
+async def test_type_text_window_keeps_order_with_jitter():
+    text = "correct horse battery staple"
+    async with EmulatorServer(port=0, latency=0.01, jitter=0.009, seed=4) as server:
+        async with PipelinedRoku(server.host, port=server.port) as roku:
+            result = await roku.type_text(text, window=4)
+    assert result.ok
+    assert server.emulator.text == text
@@ -0,0 +1,92 @@
+import os
+
+from roku import protocol
+from roku.models import Application
+
+TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
+
+APPS = b"""<apps>
+    <app id="12" version="4.1.218">Netflix</app>
+    <app id="837" version="1.0.80000286">YouTube</app>
+</apps>"""
+
+
+def response(name):
+    with open(os.path.join(TESTS_PATH, "responses", name), "rb") as infile:
+        return infile.read()
+
+
+def test_request_builders():
+    app = Application("12", "4.1.218", "Netflix")
+
+    assert protocol.launch_request(app, {"mediaType": "movie"}) == (
+        "POST",
+        "/launch/12",
+        {"mediaType": "movie", "contentID": "12"},
+    )
+    assert protocol.store_request(app) == ("POST", "/launch/11", {"contentID": "12"})
+    assert protocol.icon_request(app) == ("GET", "/query/icon/12", None)
+    assert protocol.literal_request("&") == ("POST", "/keypress/Lit_%26", None)
+    assert protocol.touch_request(1, 2, "up").params == {
+        "touch.0.x": 1,
+        "touch.0.y": 2,
+        "touch.0.op": "up",
+    }
+
+
+def test_launch_request_does_not_modify_params():
+    params = {}
+    protocol.launch_request(Application("12", None, "Netflix"), params)
+    assert params == {}
+
+
+def test_parse_apps():
+    roku = object()
+    apps = protocol.APPS.parse(APPS, roku)
+    assert [app.name for app in apps] == ["Netflix", "YouTube"]
+    assert all(app.roku is roku for app in apps)
+    assert protocol.ACTIVE_APP.parse(APPS).id == "12"
+    assert protocol.ACTIVE_APP.parse(b"<active-app></active-app>") is None
+
+
+def test_parse_current_app():
+    screensaver = b"""<active-app>
+        <app>Roku</app>
+        <screensaver id="55545" version="2.0.1">Default screensaver</screensaver>
+    </active-app>"""
+    app = protocol.CURRENT_APP.parse(screensaver)
+    assert app.id == "55545"
+    assert app.is_screensaver
+    assert protocol.CURRENT_APP.parse(b"<active-app/>") is None
+
+
+def test_parse_media_player():
+    player = protocol.MEDIA_PLAYER.parse(response("media-player.xml"))
+    assert player.state == "pause"
+    assert player.app.id == "33"
+    assert player.position == 11187
+    assert player.duration == 1858000
+
+    idle = protocol.parse_media_player(
+        b'<player state="close"><position>0 ms</position>'
+        b"<duration>0 ms</duration></player>"
+    )
+    assert idle.app is None
+    assert "close" in repr(idle)
+
+
+def test_parse_device_info():
+    snapshot = protocol.DEVICE_INFO.parse(response("device-info.xml"))
+    assert snapshot.power_state == "On"
+
+
+def test_light_states():
+    state = protocol.parse_app_state(
+        b'<active-app><app id="12">Netflix</app></active-app>'
+    )
+    assert state == protocol.AppState("12", "Netflix", False)
+    assert protocol.parse_app_state(b"<active-app/>") is None
+
+    player = protocol.parse_player_state(response("media-player.xml"))
+    assert player == protocol.PlayerState("pause", "33", 11187, 1858000)
+    assert protocol.parse_player_state(b'<player state="close"/>').position is None
@@ -0,0 +1,80 @@
+import asyncio
+
+import aiohttp
+import pytest
+
+from roku import RokuException
+from roku._async import AsyncRoku
+from roku.emulator.server import EmulatorServer
+from roku.proxy import Proxy
+
+
+@pytest.fixture
+async def device():
+    async with EmulatorServer(port=0, latency=0.05) as server:
+        yield server
+
+
+@pytest.fixture
+async def proxy(device):
+    async with Proxy(device.host, device.port, local_port=0) as proxy:
+        yield proxy
+
+
+@pytest.fixture
+async def client(proxy):
+    async with AsyncRoku(proxy.local_host, proxy.local_port) as roku:
+        yield roku
+
+
+async def test_coalesces_concurrent_gets(device, proxy):
+    rokus = [AsyncRoku(proxy.local_host, proxy.local_port) for _ in range(10)]
+    try:
+        results = await asyncio.gather(*(r.get_device_info() for r in rokus))
+    finally:
+        await asyncio.gather(*(r.close() for r in rokus))
+
+    assert len({info.serial_num for info in results}) == 1
+    assert device.requests == 1
+
+
+async def test_caches_queries(device, client):
+    await client.get_apps()
+    await client.get_apps()
+    assert device.requests == 1
+
+
+async def test_commands_invalidate(device, client):
+    assert (await client.get_active_app()).name == "Roku"
+
+    await client.launch(await client.get_app("Netflix"))
+
+    assert (await client.get_active_app()).name == "Netflix"
+    assert device.emulator.history[-1][0] == "launch"
+
+
+async def test_commands_in_order(device, client):
+    await client.type_text("abcdef")
+    assert device.emulator.text == "abcdef"
+
+
+async def test_icons(device, proxy, client):
+    app = await client.get_app("Netflix")
+    icon = await client.icon(app)
+    assert icon == device.emulator.get_icon(app.id)
+
+    url = f"{proxy.url}/query/icon/{app.id}"
+    async with aiohttp.ClientSession() as session:
+        async with session.get(url) as resp:
+            etag = resp.headers["ETag"]
+        async with session.get(url, headers={"If-None-Match": etag}) as resp:
+            assert resp.status == 304
+
+    assert proxy.upstream_requests == 2
+
+
+async def test_upstream_unavailable():
+    async with Proxy("127.0.0.1", 9, local_port=0, timeout=1) as proxy:
+        async with AsyncRoku(proxy.local_host, proxy.local_port) as roku:
+            with pytest.raises(RokuException):
+                await roku.get_apps()
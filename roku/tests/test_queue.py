@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from roku import RokuException
+
+from .conftest import AsyncFauxku
+
+
+class GatedFauxku(AsyncFauxku):
+    """Holds every request until the test lets it through."""
+
+    def __init__(self, *args, **kwargs):
+        super(GatedFauxku, self).__init__(*args, **kwargs)
+        self.gate = asyncio.Semaphore(0)
+
+    async def _call(self, method, path, **kwargs):
+        await self.gate.acquire()
+        return await super(GatedFauxku, self)._call(method, path, **kwargs)
+
+    def paths(self):
+        return [call[1] for call in self.calls()]
+
+
+async def drain(queue, roku):
+    for _ in range(100):
+        roku.gate.release()
+    await queue.join()
+
+
+async def test_order_and_collapse():
+    roku = GatedFauxku("0.0.0.0")
+    queue = roku.command_queue()
+
+    await queue.home()
+    await asyncio.sleep(0)  # home is now in flight
+    for _ in range(5):
+        await queue.volume_up()
+    await queue.right()
+    await queue.volume_up()
+
+    assert len(queue) == 3
+    assert queue.coalesced == 4
+    await drain(queue, roku)
+
+    assert roku.paths() == [
+        "/keypress/Home",
+        "/keypress/VolumeUp",
+        "/keypress/Right",
+        "/keypress/VolumeUp",
+    ]
+    await queue.close()
+
+
+async def test_collapse_limit_and_futures():
+    roku = GatedFauxku("0.0.0.0")
+    queue = roku.command_queue(collapse_limit=2)
+
+    await queue.home()
+    await asyncio.sleep(0)
+    futures = [await queue.volume_down() for _ in range(4)]
+    await drain(queue, roku)
+
+    assert roku.paths().count("/keypress/VolumeDown") == 2
+    assert all(future.done() and future.exception() is None for future in futures)
+    await queue.close()
+
+
+async def test_stale_moves_and_held_keys():
+    roku = GatedFauxku("0.0.0.0")
+    queue = roku.command_queue()
+
+    await queue.touch(0, 0, op="down")
+    await asyncio.sleep(0)
+    for x in range(1, 4):
+        await queue.touch(x, x, op="move")
+    await queue.touch(3, 3, op="up")
+    await queue.right("keydown")
+    await queue.right("keydown")
+    await queue.right("keyup")
+    await drain(queue, roku)
+
+    inputs = [call[3]["params"] for call in roku.calls() if call[1] == "/input"]
+    assert [(p["touch.0.op"], p["touch.0.x"]) for p in inputs] == [
+        ("down", 0),
+        ("move", 3),
+        ("up", 3),
+    ]
+    assert roku.paths()[-3:] == ["/keydown/Right", "/keydown/Right", "/keyup/Right"]
+    await queue.close()
+
+
+async def test_backpressure():
+    roku = GatedFauxku("0.0.0.0")
+    queue = roku.command_queue(max_depth=2)
+
+    await queue.home()
+    await asyncio.sleep(0)
+    await queue.left()
+    await queue.right()
+
+    blocked = asyncio.ensure_future(queue.up())
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    assert len(queue) == 2
+
+    roku.gate.release()
+    await asyncio.wait_for(blocked, 1)
+    await drain(queue, roku)
+    assert roku.paths() == [
+        "/keypress/Home",
+        "/keypress/Left",
+        "/keypress/Right",
+        "/keypress/Up",
+    ]
+    await queue.close()
+
+
+class FailingFauxku(AsyncFauxku):
+    async def _call(self, method, path, **kwargs):
+        if path == "/keypress/Left":
+            raise RokuException(b"busy")
+        return await super(FailingFauxku, self)._call(method, path, **kwargs)
+
+
+async def test_errors_do_not_stop_the_queue():
+    roku = FailingFauxku("0.0.0.0")
+    async with roku.command_queue() as queue:
+        failed = await queue.left()
+        sent = await queue.right()
+
+    with pytest.raises(RokuException):
+        failed.result()
+    assert sent.result() is None
+    assert [call[1] for call in roku.calls()] == ["/keypress/Right"]
+
+
+async def test_close_cancels_pending():
+    roku = GatedFauxku("0.0.0.0")
+    queue = roku.command_queue()
+    first = await queue.home()
+    second = await queue.right()
+    await asyncio.sleep(0)
+    await queue.close()
+    assert first.cancelled() and second.cancelled()
+    assert len(queue) == 0
+
+
+async def test_invalid_touch_op():
+    roku = GatedFauxku("0.0.0.0")
+    queue = roku.command_queue()
+    with pytest.raises(RokuException):
+        await queue.touch(1, 2, op="bogus")
+    assert len(queue) == 0
+    await queue.close()
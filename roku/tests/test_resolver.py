@@ -0,0 +1,112 @@
+import asyncio
+import socket
+
+import pytest
+
+from roku import Roku
+from roku._async import AsyncRoku
+from roku.emulator.server import EmulatorServer
+from roku.resolver import Resolver, is_ip, url_host
+
+
+def addrinfo(address):
+    family = socket.AF_INET6 if ":" in address else socket.AF_INET
+    return [(family, socket.SOCK_STREAM, 6, "", (address, 0))]
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_literals():
+    assert is_ip("192.168.1.100")
+    assert is_ip("fe80::1")
+    assert not is_ip("living-room.local")
+    assert url_host("fe80::1") == "[fe80::1]"
+    assert url_host("192.168.1.100") == "192.168.1.100"
+
+
+def test_literals_are_not_looked_up(mocker):
+    getaddrinfo = mocker.patch("socket.getaddrinfo")
+    resolver = Resolver()
+    assert resolver.resolve("192.168.1.100") == "192.168.1.100"
+    assert resolver.resolve("::1") == "::1"
+    assert getaddrinfo.call_count == 0
+
+
+def test_cache_ttl(mocker):
+    getaddrinfo = mocker.patch(
+        "socket.getaddrinfo", return_value=addrinfo("192.168.1.100")
+    )
+    clock = Clock()
+    resolver = Resolver(ttl=60, clock=clock)
+
+    assert resolver.resolve("roku.local") == "192.168.1.100"
+    assert resolver.resolve("roku.local") == "192.168.1.100"
+    assert getaddrinfo.call_count == 1
+
+    clock.now = 61
+    resolver.resolve("roku.local")
+    assert getaddrinfo.call_count == 2
+
+    resolver.invalidate("roku.local")
+    resolver.resolve("roku.local")
+    assert resolver.lookups == 3
+
+
+def test_prefers_ipv4(mocker):
+    mocker.patch(
+        "socket.getaddrinfo",
+        return_value=addrinfo("fe80::1") + addrinfo("192.168.1.100"),
+    )
+    assert Resolver().resolve("roku.local") == "192.168.1.100"
+
+
+async def test_async_resolve(mocker):
+    loop = asyncio.get_running_loop()
+    blocking = mocker.patch("socket.getaddrinfo")
+
+    async def getaddrinfo(host, port, **kwargs):
+        return addrinfo("fe80::1")
+
+    mocker.patch.object(loop, "getaddrinfo", getaddrinfo)
+    resolver = Resolver()
+    assert await resolver.async_resolve("roku.local") == "fe80::1"
+    assert blocking.call_count == 0
+
+
+def test_constructors_do_not_resolve(mocker):
+    getaddrinfo = mocker.patch("socket.getaddrinfo", side_effect=socket.gaierror)
+    roku = Roku("living-room.local")
+    async_roku = AsyncRoku("living-room.local")
+    assert roku.host == async_roku.host == "living-room.local"
+    assert getaddrinfo.call_count == 0
+
+
+def test_icon_url_uses_address(mocker):
+    mocker.patch("socket.getaddrinfo", return_value=addrinfo("fe80::1"))
+    roku = Roku("living-room.local", resolver=Resolver())
+    app = mocker.Mock(id="12")
+    assert roku.icon_url(app) == "http://[fe80::1]:8060/query/icon/12"
+
+
+def _has_ipv6():
+    try:
+        with socket.socket(socket.AF_INET6) as sock:
+            sock.bind(("::1", 0))
+    except OSError:
+        return False
+    return True
+
+
+@pytest.mark.skipif(not _has_ipv6(), reason="IPv6 loopback is not available")
+async def test_ipv6():
+    async with EmulatorServer(host="::1", port=0) as server:
+        async with AsyncRoku("::1", port=server.port) as roku:
+            await roku.home()
+            assert len(await roku.get_apps()) == 4
+    assert server.emulator.history[0] == ("keypress", "Home")
@@ -1,9 +1,14 @@
 import os
+import time
 from urllib.parse import quote_plus
 
 import pytest
+import requests
 
 from roku.core import Application, Roku, COMMANDS
+from roku.emulator.server import BackgroundFleet
+from roku.models import RokuException
+from roku.session import create_session
 from roku.util import serialize_apps
 
 TESTS_PATH = os.path.abspath(os.path.dirname(__file__))
@@ -87,16 +92,15 @@ def test_media_player(mocker, roku):
     with open(xml_path) as infile:
         content = infile.read()
 
-    faux_apps = (Application(33, "1.2.3", "Faux YouTube"),)
-
     mocked_get = mocker.patch.object(Roku, "_get")
     mocked_get.return_value = content.encode("utf-8")
-    mocker.patch.object(Roku, "apps", new=faux_apps)
 
     m = roku.media_player
 
     assert m.state == "pause"
-    assert m.app.name == "Faux YouTube"
+    assert m.app.id == "33"
+    assert m.app.roku is roku
+    assert mocked_get.call_count == 1
     assert m.position == 11187
     assert m.duration == 1858000
 
@@ -162,3 +166,126 @@ def test_icon_url(apps):
     for app in apps:
         assert app.roku.icon_url(app) == f"http://0.0.0.0:8060/query/icon/{app.id}"
         assert app.icon_url == f"http://0.0.0.0:8060/query/icon/{app.id}"
+
+
+def test_shared_session():
+    session = create_session(pool_maxsize=2, max_retries=3, backoff_factor=0.1)
+    first = Roku("0.0.0.0", session=session)
+    second = Roku("127.0.0.1", session=session)
+
+    first._connect()
+    second._connect()
+    assert first._conn is second._conn is session
+
+    first.close()
+    assert first._conn is session
+
+
+def test_session_retries():
+    adapter = create_session(max_retries=3).get_adapter("http://0.0.0.0:8060/")
+    assert adapter.max_retries.total == 3
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+    adapter = create_session(max_retries=3, retry_commands=True).get_adapter(
+        "http://0.0.0.0:8060/"
+    )
+    assert "POST" in adapter.max_retries.allowed_methods
+
+
+def test_read_timeout_is_a_timeout():
+    with BackgroundFleet(1, latency=0.5) as fleet:
+        host, port = fleet.addresses[0]
+        roku = Roku(host, port=port, timeout=0.1)
+        with pytest.raises(requests.ReadTimeout):
+            roku.device_info
+        roku.close()
+
+
+def test_prewarm(roku):
+    roku.prewarm()
+    assert roku.last_call() == ("GET", "/", (), {})
+
+
+def test_type_text(roku):
+    text = "Star gate!"
+    result = roku.type_text(text)
+
+    assert result.ok
+    assert result.sent == len(text)
+    for i, call in enumerate(roku.calls()):
+        assert call == ("POST", f"/keypress/Lit_{quote_plus(text[i])}", (), {})
+
+
+def test_type_text_failures(mocker, roku):
+    def _call(method, path, *args, **kwargs):
+        if path.endswith("_b"):
+            raise RokuException(b"nope")
+        return ""
+
+    mocker.patch.object(roku, "_call", side_effect=_call)
+
+    result = roku.type_text("abc")
+    assert not result.ok
+    assert result.sent == 3
+    assert [(f.index, f.char) for f in result.failures] == [(1, "b")]
+
+    result = roku.type_text("abc", stop_on_error=True)
+    assert result.sent == 2
+
+
+def test_type_text_pacing(roku):
+    start = time.monotonic()
+    roku.type_text("abcd", pacing=0.02)
+    assert time.monotonic() - start >= 0.06
+
+
+def test_device_snapshot(mocker, roku):
+    xml_path = os.path.join(TESTS_PATH, "responses", "device-info.xml")
+    with open(xml_path) as infile:
+        content = infile.read().encode("utf-8")
+
+    mocked_get = mocker.patch.object(Roku, "_get")
+    mocked_get.return_value = content
+
+    snapshot = roku.device_snapshot()
+
+    assert snapshot["serial-number"] == "111111111111"
+    assert snapshot.vendor_name == "Roku"
+    assert snapshot.user_device_name is None
+    assert snapshot.power_state == "On"
+    assert not snapshot.is_tv
+    assert snapshot.roku_type == "Stick"
+    assert snapshot.features == ["find-remote"]
+    assert snapshot.supports("find-remote")
+    assert not snapshot.supports("private-listening")
+    with pytest.raises(AttributeError):
+        snapshot.not_a_field
+
+    assert roku.device_snapshot(max_age=60) is snapshot
+    assert roku.device_snapshot() is snapshot
+    assert mocked_get.call_count == 2
+    assert roku.power_state == "On"
+    assert roku.device_info.serial_num == "111111111111"
+
+    # an equal document from a new request reuses the parsed snapshot
+    snapshot.fetched_at -= 120
+    mocked_get.return_value = bytes(bytearray(content))
+    assert roku.refresh_device_info() is snapshot
+    assert snapshot.age < 60
+
+    roku.poweroff()
+    assert roku.device_snapshot(max_age=60) is not snapshot
+    mocked_get.return_value = content.replace(b"PowerOn", b"Headless")
+    assert roku.power_state == "Off"
+
+
+def test_iter_apps(mocker, roku, apps):
+    content = serialize_apps(apps)
+    mocked_stream = mocker.patch.object(Roku, "_stream")
+    mocked_stream.return_value = iter([content[:40], content[40:]])
+
+    streamed = list(roku.iter_apps())
+
+    mocked_stream.assert_called_once_with("/query/apps")
+    assert streamed == apps
+    assert streamed[0].roku is roku
@@ -1,6 +1,11 @@
+import time
+
 import pytest
 
-from roku import scripting
+from roku import AsyncRoku, RokuException, scripting
+from roku.emulator.server import EmulatorFleet
+
+from .conftest import AsyncFauxku, Fauxku
 
 SCRIPT_PATH = "roku/tests/scripts/testscript.txt"
 
@@ -75,3 +80,255 @@ async def test_async_run_script(async_roku):
     calls = async_roku.calls()
     assert "keypress/Home" in calls[0][1]
     assert "keypress/Lit_x" in calls[1][1]
+
+
+def test_compile_script():
+    content = ("home", "literal:ab@2*1", "left@3*0.25")
+    plan = scripting.compile_script(scripting.parse_script(content), sleep=0.5)
+
+    assert len(plan) == 6
+    assert plan.request_count == 1 + 2 * 2 + 3
+    assert plan.duration == 0.5 + 2 * 1 + 3 * 0.25
+    assert plan.steps[1].requests == (
+        ("POST", "/keypress/Lit_a", None),
+        ("POST", "/keypress/Lit_b", None),
+    )
+
+
+def test_compile_script_invalid():
+    content = ("home", "launch:Netflix")
+    with pytest.raises(scripting.ScriptError):
+        scripting.compile_script(scripting.parse_script(content))
+
+
+def test_compile_script_missing_param():
+    content = ("home", "literal")
+    with pytest.raises(scripting.ScriptError, match="step 2: literal requires"):
+        scripting.compile_script(scripting.parse_script(content))
+
+
+def test_run_plan(roku):
+    content = ("home", "literal:x", "right:keydown")
+    plan = scripting.compile_script(scripting.parse_script(content), sleep=0)
+    scripting.run_plan(roku, plan)
+    assert [call[1] for call in roku.calls()] == [
+        "/keypress/Home",
+        "/keypress/Lit_x",
+        "/keydown/Right",
+    ]
+
+
+async def test_async_run_plan(async_roku):
+    content = ("home@2", "literal:x")
+    plan = scripting.compile_script(scripting.parse_script(content), sleep=0)
+    await scripting.async_run_plan(async_roku, plan)
+    assert [call[1] for call in async_roku.calls()] == [
+        "/keypress/Home",
+        "/keypress/Home",
+        "/keypress/Lit_x",
+    ]
+
+
+class SlowFauxku(Fauxku):
+    def _call(self, method, path, *args, **kwargs):
+        time.sleep(0.02)
+        return super(SlowFauxku, self)._call(method, path, *args, **kwargs)
+
+
+def test_run_scheduled_does_not_drift():
+    roku = SlowFauxku("0.0.0.0")
+    plan = scripting.compile_script(scripting.parse_script(("right@5",)), sleep=0.05)
+
+    start = time.monotonic()
+    stats = scripting.run_scheduled(roku, plan)
+    total = time.monotonic() - start
+
+    assert stats.count == 5
+    # four intervals of 50ms plus the final step and sleep; sleeping after
+    # each request would take at least 5 * (50 + 20)ms
+    assert total < 0.3
+    assert stats.max_lateness < 0.04
+    assert stats.mean_elapsed >= 0.02
+    # no step starts before its deadline, and deadlines do not drift
+    assert all(t.lateness >= 0 for t in stats.timings)
+    deadlines = [t.deadline for t in stats.timings]
+    assert all(abs(b - a - 0.05) < 1e-6 for a, b in zip(deadlines, deadlines[1:]))
+
+
+def test_run_scheduled_max_rate():
+    roku = SlowFauxku("0.0.0.0")
+    plan = scripting.compile_script(scripting.parse_script(("right@5",)), sleep=1)
+
+    start = time.monotonic()
+    stats = scripting.run_scheduled(roku, plan, max_rate=True)
+
+    assert time.monotonic() - start < 0.5
+    assert stats.mean_lateness == 0
+    assert set(stats.as_dict()) == {
+        "count",
+        "mean_lateness",
+        "max_lateness",
+        "jitter",
+        "mean_elapsed",
+    }
+
+
+async def test_async_run_scheduled(async_roku):
+    plan = scripting.compile_script(scripting.parse_script(("home@3",)), sleep=0.01)
+    stats = await scripting.async_run_scheduled(async_roku, plan)
+    assert stats.count == 3
+    assert len(async_roku.calls()) == 3
+
+
+class FailingFauxku(AsyncFauxku):
+    async def _call(self, method, path, **kwargs):
+        if len(self._calls) >= 2:
+            raise RokuException(b"gone")
+        return await super(FailingFauxku, self)._call(method, path, **kwargs)
+
+
+async def test_async_run_many():
+    rokus = [AsyncFauxku(f"127.0.0.{i + 1}") for i in range(3)]
+    script = scripting.parse_script(("home", "literal:ab", "select@2"))
+
+    runs = await scripting.async_run_many(rokus, script, sleep=0)
+
+    assert [run.host for run in runs] == [r.host for r in rokus]
+    assert all(run.error is None for run in runs)
+    assert all(run.stats.count == 4 for run in runs)
+    for roku in rokus:
+        assert len(roku.calls()) == 5
+
+
+async def test_async_run_many_lockstep():
+    rokus = [AsyncFauxku("127.0.0.1"), FailingFauxku("127.0.0.2")]
+    script = scripting.parse_script(("home@4",))
+
+    runs = await scripting.async_run_many(rokus, script, sleep=0.01, lockstep=True)
+
+    assert runs[0].error is None
+    assert runs[0].stats.count == 4
+    assert isinstance(runs[1].error, RokuException)
+    assert runs[1].stats.count == 2
+    for first, second in zip(runs[0].stats.timings, runs[1].stats.timings):
+        assert first.deadline == second.deadline
+
+
+async def test_async_run_many_hosts():
+    async with EmulatorFleet(3) as fleet:
+        script = scripting.parse_script(("literal:hi",))
+        runs = await scripting.async_run_many(fleet.addresses, script, sleep=0)
+
+        assert all(run.error is None for run in runs)
+        assert [run.port for run in runs] == [port for _, port in fleet.addresses]
+        assert all(server.emulator.text == "hi" for server in fleet)
+
+
+PROGRAM = """
+# open search and type the query twice
+set query = abc
+home
+repeat 2 {
+    literal:$query
+    repeat ${times} {
+        right
+    }
+}
+"""
+
+
+def test_parse_program():
+    program = scripting.parse_program(PROGRAM)
+
+    assert program[0] == scripting.Set("query", "abc")
+    assert program[1].command == "home"
+    assert program[1].requests == (("POST", "/keypress/Home", None),)
+    repeat = program[2]
+    assert repeat.count == "2"
+    assert repeat.body[0].requests is None
+    assert repeat.body[1].count == "${times}"
+
+
+@pytest.mark.parametrize(
+    "text,message",
+    [
+        ("home\nbogus", "line 2"),
+        ("home\n}", "line 2: unexpected }"),
+        ("home\nrepeat 2 {\nhome", "line 2: unclosed repeat"),
+        ("home\nliteral", "line 2: literal requires a param"),
+        ("wait_for volume == 3", "cannot wait for volume"),
+        ("home\n\n!!", "line 3: cannot parse"),
+    ],
+)
+def test_parse_program_errors(text, message):
+    with pytest.raises(scripting.ScriptError, match=message):
+        scripting.parse_program(text)
+
+
+def test_load_program_cached(tmp_path):
+    path = tmp_path / "program.txt"
+    path.write_text("home\nright")
+    first = scripting.load_program(str(path))
+    assert scripting.load_program(str(path)) is first
+
+    path.write_text("home\nleft")
+    assert scripting.load_program(str(path))[1].command == "left"
+
+
+def test_run_program(roku):
+    program = scripting.parse_program(PROGRAM)
+    scripting.run_program(roku, program, variables={"times": 2}, sleep=0)
+
+    paths = [call[1] for call in roku.calls()]
+    assert (
+        paths
+        == ["/keypress/Home"]
+        + [
+            "/keypress/Lit_a",
+            "/keypress/Lit_b",
+            "/keypress/Lit_c",
+            "/keypress/Right",
+            "/keypress/Right",
+        ]
+        * 2
+    )
+
+
+def test_run_program_missing_variable(roku):
+    program = scripting.parse_program("literal:$missing")
+    with pytest.raises(scripting.ScriptError, match="missing"):
+        scripting.run_program(roku, program, sleep=0)
+
+
+async def test_async_run_program_wait_for():
+    async with EmulatorFleet(1) as fleet:
+        server = next(iter(fleet))
+        program = scripting.parse_program(
+            "set app = Netflix\n"
+            "launch:$app\n"
+            "wait_for active_app == $app timeout 2 every 0.01\n"
+            "wait_for power_state == On\n"
+            "play"
+        )
+        roku = AsyncRoku(server.host, port=server.port)
+        try:
+            await scripting.async_run_program(roku, program, sleep=0)
+        finally:
+            await roku.close()
+
+        assert server.emulator.active_app.name == "Netflix"
+        assert server.emulator.player_state == "play"
+
+
+async def test_async_run_program_timeout():
+    async with EmulatorFleet(1) as fleet:
+        server = next(iter(fleet))
+        program = scripting.parse_program(
+            "wait_for active_app == Netflix timeout 0.05 every 0.01"
+        )
+        roku = AsyncRoku(server.host, port=server.port)
+        try:
+            with pytest.raises(scripting.ScriptTimeout):
+                await scripting.async_run_program(roku, program)
+        finally:
+            await roku.close()
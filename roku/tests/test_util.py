@@ -0,0 +1,92 @@
+from roku.models import Application, Channel
+from roku.util import deserialize_apps, iter_apps, iter_channels, serialize_apps
+
+CHANNELS = b"""<?xml version="1.0" encoding="UTF-8" ?>
+<tv-channels>
+    <channel>
+        <number>1.1</number>
+        <name>WAAA</name>
+    </channel>
+    <channel>
+        <number>2.1</number>
+        <name>WBBB</name>
+    </channel>
+    <channel>
+        <number>3.1</number>
+        <name>WCCC</name>
+    </channel>
+</tv-channels>
+"""
+
+
+def chunked(content, size=7):
+    for start in range(0, len(content), size):
+        end = start + size
+        yield content[start:end]
+
+
+def test_iter_apps():
+    faux_apps = [
+        Application("11", "1.0.1", "Fauxku Channel Store"),
+        Application("22", "2.0.2", "Faux Netflix"),
+    ]
+    content = serialize_apps(faux_apps)
+
+    apps = list(iter_apps(chunked(content)))
+
+    assert apps == faux_apps
+    assert [a.name for a in apps] == [a.name for a in faux_apps]
+    assert apps == deserialize_apps(content)
+
+
+def test_iter_channels():
+    channels = list(iter_channels(chunked(CHANNELS), roku="roku"))
+
+    assert channels == [
+        Channel("1.1", "WAAA"),
+        Channel("2.1", "WBBB"),
+        Channel("3.1", "WCCC"),
+    ]
+    assert channels[0].roku == "roku"
+
+
+def test_iter_channels_early_exit():
+    read = []
+
+    def chunks():
+        for chunk in chunked(CHANNELS):
+            read.append(chunk)
+            yield chunk
+
+    for channel in iter_channels(chunks()):
+        if channel.number == "1.1":
+            break
+
+    assert sum(len(chunk) for chunk in read) < len(CHANNELS)
+
+
+def test_iter_whole_document():
+    assert len(list(iter_channels(CHANNELS))) == 3
+
+
+def test_models_are_slotted():
+    app = Application("11", "1.0.1", "Fauxku Channel Store")
+    channel = Channel("1.1", "WAAA")
+    assert not hasattr(app, "__dict__")
+    assert not hasattr(channel, "__dict__")
+
+
+def test_models_hash():
+    first = Application("11", "1.0.1", "Fauxku Channel Store")
+    second = Application(11, "1.0.1", "Renamed", roku="roku")
+    assert first == second
+    assert len({first, second, Application("11", "1.0.2", "Fauxku")}) == 2
+    assert len({Channel("1.1", "WAAA"), Channel("1.1", "WAAA")}) == 1
+
+
+def test_strings_interned():
+    content = serialize_apps([Application("11", "1.0.1", "Fauxku Channel Store")])
+    first = deserialize_apps(content)[0]
+    second = deserialize_apps(bytes(bytearray(content)))[0]
+    assert first.name is second.name
+    assert first.version is second.version
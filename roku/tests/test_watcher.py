@@ -0,0 +1,162 @@
+import asyncio
+
+from roku import AsyncRoku, Roku
+from roku.emulator.core import Emulator
+from roku.emulator.server import BackgroundFleet, EmulatorServer
+from roku.watcher import (
+    AppLaunched,
+    PlaybackStateChanged,
+    PositionJumped,
+    StateTracker,
+)
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tracker_app_launched():
+    emulator = Emulator()
+    tracker = StateTracker(clock=Clock())
+
+    events = tracker.update_app(emulator.active_app_xml())
+    assert events[0].app.name == "Roku"
+    assert tracker.update_app(emulator.active_app_xml()) == []
+    assert tracker.parses == 1
+    assert tracker.interval == tracker.idle_interval
+
+    emulator.launch_app("4")
+    (event,) = tracker.update_app(emulator.active_app_xml())
+    assert isinstance(event, AppLaunched)
+    assert event.app.name == "Netflix"
+    assert event.previous.name == "Roku"
+    assert tracker.interval == tracker.active_interval
+
+
+def test_tracker_playback():
+    clock = Clock()
+    emulator = Emulator()
+    emulator.launch_app("4")
+    tracker = StateTracker(clock=clock)
+    tracker.update_app(emulator.active_app_xml())
+
+    (event,) = tracker.update_player(emulator.media_player_xml())
+    assert event == PlaybackStateChanged("close", None, "4", 0.0)
+
+    emulator.keypress("Play")
+    (event,) = tracker.update_player(emulator.media_player_xml())
+    assert event.state == "play"
+    assert event.previous == "close"
+    assert tracker.interval == tracker.playing_interval
+
+    # steady playback is not a jump
+    clock.now += 5
+    emulator.position += 5000
+    assert tracker.update_player(emulator.media_player_xml()) == []
+
+    clock.now += 1
+    emulator.keypress("Fwd")
+    (event,) = tracker.update_player(emulator.media_player_xml())
+    assert isinstance(event, PositionJumped)
+    assert event.position == 15000
+    assert event.expected == 6000
+
+
+def test_tracker_skips_player_when_idle():
+    emulator = Emulator()
+    tracker = StateTracker()
+    paths = []
+
+    def get(path):
+        paths.append(path)
+        if path.endswith("active-app"):
+            return emulator.active_app_xml()
+        return emulator.media_player_xml()
+
+    tracker.poll(get)
+    emulator.launch_app("4")
+    tracker.poll(get)
+    assert paths == [
+        "/query/active-app",
+        "/query/active-app",
+        "/query/media-player",
+    ]
+
+
+async def test_async_watcher():
+    async with EmulatorServer(port=0) as server:
+        roku = AsyncRoku(server.host, port=server.port)
+        watcher = roku.watch(playing_interval=0.01, active_interval=0.01)
+        watcher.tracker.idle_interval = 0.01
+        events = []
+
+        async def consume():
+            async for event in watcher:
+                events.append(event)
+                if isinstance(event, PlaybackStateChanged) and event.state == "play":
+                    watcher.stop()
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.05)
+        server.emulator.launch_app("4")
+        await asyncio.sleep(0.05)
+        server.emulator.keypress("Play")
+        await asyncio.wait_for(task, 2)
+        await roku.close()
+
+    assert [type(event) for event in events] == [
+        AppLaunched,
+        AppLaunched,
+        PlaybackStateChanged,
+        PlaybackStateChanged,
+    ]
+    assert events[1].app.name == "Netflix"
+
+
+def test_watcher():
+    with BackgroundFleet(1) as fleet:
+        host, port = fleet.addresses[0]
+        roku = Roku(host, port=port)
+        received = []
+        watcher = roku.watch(
+            callback=received.append, active_interval=0.01, idle_interval=0.01
+        )
+        emulator = fleet.fleet.servers[0].emulator
+        emulator.launch_app("2")
+        for event in watcher:
+            if isinstance(event, AppLaunched) and event.app.name == "TWiT":
+                break
+        watcher.stop()
+        roku.close()
+
+    assert any(
+        getattr(event, "app", None) and event.app.id == "2" for event in received
+    )
+
+
+def test_watcher_callback_errors(caplog):
+    with BackgroundFleet(1) as fleet:
+        host, port = fleet.addresses[0]
+        roku = Roku(host, port=port)
+        calls = []
+
+        def callback(event):
+            calls.append(event)
+            if len(calls) == 1:
+                raise ValueError("boom")
+            watcher.stop()
+
+        watcher = roku.watch(
+            callback=callback, active_interval=0.01, idle_interval=0.01
+        )
+        fleet.fleet.servers[0].emulator.launch_app("2")
+        events = list(watcher)
+        roku.close()
+
+    assert len(calls) == 2
+    assert events == calls
+    assert "watcher callback failed" in caplog.text
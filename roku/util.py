@@ -1,22 +1,124 @@
+import sys
 import xml.etree.ElementTree as ET
 from contextlib import closing
 
 from io import BytesIO
 
+from .models import Application, Channel
 
-def deserialize_apps(doc, roku=None):
-    from .core import Application
 
+class ElementStream(object):
+    """Incrementally parse an XML document fed in chunks, returning each
+    child of the root element once it is complete.
+
+    Returned elements are detached from the tree so that memory use does not
+    grow with the size of the document.
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+
+    def feed(self, data):
+        self._parser.feed(data)
+        return self._read()
+
+    def close(self):
+        self._parser.close()
+        return self._read()
+
+    def _read(self):
+        elements = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 1:
+                    self._root.remove(elem)
+                    elements.append(elem)
+        return elements
+
+
+def iter_elements(chunks):
+    if isinstance(chunks, (bytes, str)):
+        chunks = (chunks,)
+    stream = ElementStream()
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+    yield from stream.close()
+
+
+def intern(value):
+    """Intern strings so that identical app and channel details read from
+    many devices share a single copy.
+    """
+    if isinstance(value, str):
+        return sys.intern(value)
+    return value
+
+
+def app_from_element(elem, roku=None):
+    return Application(
+        id=intern(elem.get("id")),
+        version=intern(elem.get("version")),
+        name=intern(elem.text),
+        roku=roku,
+    )
+
+
+def channel_from_element(elem, roku=None):
+    return Channel(
+        number=intern(elem.find("number").text),
+        name=intern(elem.find("name").text),
+        roku=roku,
+    )
+
+
+def iter_apps(chunks, roku=None):
+    """Yield each Application in a /query/apps response as soon as it has
+    been read from `chunks`, an iterable of bytes.
+    """
+    for elem in iter_elements(chunks):
+        yield app_from_element(elem, roku)
+
+
+def iter_channels(chunks, roku=None):
+    """Yield each Channel in a /query/tv-channels response as soon as it has
+    been read from `chunks`, an iterable of bytes.
+    """
+    for elem in iter_elements(chunks):
+        yield channel_from_element(elem, roku)
+
+
+def deserialize_apps(doc, roku=None):
     applications = []
     root = ET.fromstring(doc)
     for elem in root:
-        app = Application(
-            id=elem.get("id"), version=elem.get("version"), name=elem.text
-        )
-        applications.append(app)
+        applications.append(app_from_element(elem, roku))
     return applications
 
 
+def index_apps(apps):
+    """Map both the names and ids of `apps` to the app. Names take priority
+    over ids and the first app with a given key wins.
+    """
+    index = {}
+    for app in apps:
+        index.setdefault(app.name, app)
+    for app in apps:
+        index.setdefault(app.id, app)
+    return index
+
+
+def deserialize_device_info(doc):
+    root = ET.fromstring(doc)
+    return {elem.tag: elem.text for elem in root}
+
+
 def serialize_apps(apps):
     root = ET.Element("apps")
 
@@ -34,16 +136,9 @@ def serialize_apps(apps):
 
 
 def deserialize_channels(doc, roku=None):
-    from .core import Channel
-
     channels = []
     root = ET.fromstring(doc)
 
     for elem in root:
-        channel = Channel(
-            number=elem.find("number").text,
-            name=elem.find("name").text,
-            roku=roku,
-        )
-        channels.append(channel)
+        channels.append(channel_from_element(elem, roku))
     return channels
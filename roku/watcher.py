@@ -0,0 +1,214 @@
+"""
+Watch a device for changes to its active app and media player.
+
+A StateTracker turns successive /query/active-app and /query/media-player
+responses into change events. Responses that are byte-for-byte identical
+to the previous poll are not parsed again. The tracker also picks how long
+to wait before the next poll: short while media is playing, long while the
+device is idle on the home screen or a screensaver.
+"""
+
+import logging
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from .protocol import (  # noqa
+    ACTIVE_APP,
+    MEDIA_PLAYER,
+    AppState,
+    PlayerState,
+    parse_app_state,
+    parse_player_state,
+)
+
+logger = logging.getLogger("roku")
+
+ACTIVE_APP_PATH = ACTIVE_APP.request.path
+MEDIA_PLAYER_PATH = MEDIA_PLAYER.request.path
+
+AppLaunched = namedtuple("AppLaunched", ["app", "previous", "at"])
+PlaybackStateChanged = namedtuple(
+    "PlaybackStateChanged", ["state", "previous", "app_id", "at"]
+)
+PositionJumped = namedtuple("PositionJumped", ["position", "expected", "app_id", "at"])
+
+PLAYING_STATES = ("play", "buffering", "startup")
+
+
+class StateTracker(object):
+    """Compare successive responses and report what changed.
+
+    A position that differs from where steady playback would have put it
+    by more than `jump_threshold` milliseconds is reported as a
+    PositionJumped event, such as after a seek or skip.
+    """
+
+    def __init__(
+        self,
+        playing_interval=0.5,
+        active_interval=2,
+        idle_interval=5,
+        jump_threshold=3000,
+        clock=time.monotonic,
+    ):
+        self.playing_interval = playing_interval
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.jump_threshold = jump_threshold
+        self.clock = clock
+        self.app = None
+        self.player = None
+        self.parses = 0
+        self._content = {}
+        self._player_at = None
+
+    @property
+    def needs_player(self):
+        """Whether the media player is worth polling; it is idle unless an
+        app other than a screensaver is in the foreground.
+        """
+        app = self.app
+        return app is not None and app.id is not None and not app.is_screensaver
+
+    @property
+    def interval(self):
+        if self.player is not None and self.player.state in PLAYING_STATES:
+            return self.playing_interval
+        if self.needs_player:
+            return self.active_interval
+        return self.idle_interval
+
+    def _changed(self, path, content):
+        if self._content.get(path) == content:
+            return False
+        self._content[path] = content
+        self.parses += 1
+        return True
+
+    def update_app(self, content):
+        """Feed an /query/active-app response, returning any events."""
+        if not self._changed(ACTIVE_APP_PATH, content):
+            return []
+        app, previous = parse_app_state(content), self.app
+        self.app = app
+        if not self.needs_player:
+            self._content.pop(MEDIA_PLAYER_PATH, None)
+            self.player = None
+        if app != previous:
+            return [AppLaunched(app, previous, self.clock())]
+        return []
+
+    def update_player(self, content):
+        """Feed a /query/media-player response, returning any events."""
+        now = self.clock()
+        if not self._changed(MEDIA_PLAYER_PATH, content):
+            if self.player is not None and self.player.state not in PLAYING_STATES:
+                self._player_at = now
+            return []
+
+        player, previous = parse_player_state(content), self.player
+        previous_at, self._player_at = self._player_at, now
+        self.player = player
+        events = []
+
+        previous_state = None if previous is None else previous.state
+        if player.state != previous_state:
+            events.append(
+                PlaybackStateChanged(player.state, previous_state, player.app_id, now)
+            )
+
+        if (
+            previous is not None
+            and previous.app_id == player.app_id
+            and previous.position is not None
+            and player.position is not None
+        ):
+            expected = previous.position
+            if previous.state in PLAYING_STATES:
+                expected += int((now - previous_at) * 1000)
+            if abs(player.position - expected) > self.jump_threshold:
+                events.append(
+                    PositionJumped(player.position, expected, player.app_id, now)
+                )
+        return events
+
+    def poll(self, get):
+        """Fetch the responses the current state calls for with `get(path)`
+        and return the resulting events.
+        """
+        events = self.update_app(get(ACTIVE_APP_PATH))
+        if self.needs_player:
+            events.extend(self.update_player(get(MEDIA_PLAYER_PATH)))
+        return events
+
+
+class Watcher(object):
+    """Poll a Roku from a background thread.
+
+    Events are passed to `callback` if one is given and can also be read by
+    iterating over the watcher, which blocks until the next event or until
+    the watcher is stopped. Errors while polling are logged and retried at
+    the idle interval; errors raised by `callback` are logged and the
+    watcher carries on. The callback may stop the watcher.
+    """
+
+    def __init__(self, roku, callback=None, **kwargs):
+        self.roku = roku
+        self.callback = callback
+        self.tracker = StateTracker(**kwargs)
+        self._events = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def __repr__(self):
+        return f"<Watcher: {self.roku.host}:{self.roku.port}>"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def __iter__(self):
+        while True:
+            event = self._events.get()
+            if event is None:
+                return
+            yield event
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        thread, self._thread = self._thread, None
+        if thread is None:
+            self._events.put(None)
+        elif thread is not threading.current_thread():
+            # the thread ends iteration when it exits
+            thread.join()
+
+    def _run(self):
+        try:
+            while not self._stopped.is_set():
+                try:
+                    events = self.tracker.poll(self.roku._get)
+                except Exception:
+                    logger.exception("watcher poll failed")
+                    self._stopped.wait(self.tracker.idle_interval)
+                    continue
+                for event in events:
+                    if self.callback is not None:
+                        try:
+                            self.callback(event)
+                        except Exception:
+                            logger.exception("watcher callback failed")
+                    self._events.put(event)
+                self._stopped.wait(self.tracker.interval)
+        finally:
+            self._events.put(None)